@@ -0,0 +1,96 @@
+"""
+Cross-tenant statistics for the superuser console.
+
+Per-tenant counts come from one grouped aggregate per table, merged in memory,
+so the cost does not grow with the number of tenants. A snapshot of the result
+can be precomputed by the refresh_admin_overview_snapshot Celery task.
+"""
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+SNAPSHOT_KEY = 'admin_overview:snapshot'
+# Snapshots older than this are ignored and the overview is computed live
+SNAPSHOT_MAX_AGE = 60 * 60
+
+# Fields tenant_breakdown rows can be sorted by
+SORT_FIELDS = (
+    'tenant_id', 'tenant_name', 'tenant_code', 'created_at',
+    'members', 'products', 'orders', 'warehouses',
+)
+
+
+def _counts_by_tenant(queryset):
+    """{tenant primary key: row count} from a single grouped query"""
+    rows = queryset.order_by().values('tenant_id').annotate(count=Count('id')).values_list('tenant_id', 'count')
+    # Records store the tenant as UUID(int=Tenant.id), see TenantAwareModel
+    return {getattr(tenant_id, 'int', tenant_id): count for tenant_id, count in rows}
+
+
+def compute_overview():
+    """
+    Compute system totals and per-tenant counts for every active tenant.
+
+    Returns:
+        dict: {'system_stats': {...}, 'tenant_breakdown': [...], 'generated_at': datetime}
+    """
+    from inventory.models import Product
+    from sales.models import Order
+    from tenants.models import Tenant, Membership
+    from users.models import User
+    from warehouse.models import Warehouse
+
+    members = _counts_by_tenant(Membership.objects.filter(is_active=True))
+    products = _counts_by_tenant(Product.objects.all())
+    orders = _counts_by_tenant(Order.objects.all())
+    warehouses = _counts_by_tenant(Warehouse.objects.all())
+
+    tenants = Tenant.objects.filter(is_active=True).values('id', 'name', 'code', 'created_at')
+    breakdown = [{
+        'tenant_id': tenant['id'],
+        'tenant_name': tenant['name'],
+        'tenant_code': tenant['code'],
+        'members': members.get(tenant['id'], 0),
+        'products': products.get(tenant['id'], 0),
+        'orders': orders.get(tenant['id'], 0),
+        'warehouses': warehouses.get(tenant['id'], 0),
+        'created_at': tenant['created_at'],
+    } for tenant in tenants]
+
+    return {
+        'system_stats': {
+            'total_tenants': len(breakdown),
+            'total_users': User.objects.filter(is_active=True).count(),
+            'total_products': sum(products.values()),
+            'total_orders': sum(orders.values()),
+        },
+        'tenant_breakdown': breakdown,
+        'generated_at': timezone.now(),
+    }
+
+
+def refresh_snapshot():
+    """Compute the overview and store it as the current snapshot"""
+    overview = compute_overview()
+    cache.set(SNAPSHOT_KEY, overview, SNAPSHOT_MAX_AGE)
+    return overview
+
+
+def get_snapshot():
+    """The stored snapshot, or None if there is none"""
+    return cache.get(SNAPSHOT_KEY)
+
+
+def sort_breakdown(rows, ordering):
+    """
+    Sort tenant_breakdown rows by a field, '-' prefix for descending.
+
+    Raises:
+        ValueError: If the field is not one of SORT_FIELDS
+    """
+    field = ordering.lstrip('-')
+    if field not in SORT_FIELDS:
+        raise ValueError(f"Cannot sort by '{field}'. Choose from: {', '.join(SORT_FIELDS)}")
+    # Tie-break on tenant_id so pages are stable
+    rows = sorted(rows, key=lambda row: row['tenant_id'])
+    return sorted(rows, key=lambda row: row[field], reverse=ordering.startswith('-'))
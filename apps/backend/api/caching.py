@@ -0,0 +1,107 @@
+"""
+Per-tenant response cache for dashboard endpoints.
+
+Cached responses are keyed by a per-tenant dashboard version. Signal handlers
+(api.signals) bump the version after any write to a model the dashboards read,
+which orphans every cached response for that tenant at once. Responses carry
+an ETag so polling clients get 304 Not Modified while nothing has changed.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+# Upper bound on how stale time-windowed figures (e.g. last 30 days) can get
+DASHBOARD_CACHE_TTL = 300
+
+
+def _tenant_key(tenant_id):
+    """Normalise a Tenant.id or a record's tenant_id to the same cache key part"""
+    from api.models import TenantMetrics
+    return TenantMetrics._meta.get_field('tenant_id').to_python(tenant_id)
+
+
+def _version_key(tenant_id):
+    return f"dashboard:version:{_tenant_key(tenant_id)}"
+
+
+def get_dashboard_version(tenant_id):
+    """Current dashboard version for a tenant"""
+    key = _version_key(tenant_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from a fresh value so an evicted version never revives old entries
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_dashboard(tenant_id):
+    """
+    Invalidate every cached dashboard response for a tenant once the current
+    transaction commits. Call after writes that bypass model signals.
+    """
+    if tenant_id is None:
+        return
+    key = _version_key(tenant_id)
+
+    def bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+    transaction.on_commit(bump)
+
+
+def _etag(data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return f'"{hashlib.md5(payload.encode()).hexdigest()}"'
+
+
+def _matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(',')]
+    return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def cached_dashboard_response(view_method):
+    """
+    Cache a tenant-scoped dashboard action per tenant, dashboard version and
+    query string, and answer If-None-Match with 304 when the ETag matches.
+    Place below @action so the action keeps its name.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        tenant = getattr(request, 'tenant', None)
+        if not tenant:
+            return view_method(self, request, *args, **kwargs)
+
+        key = (
+            f"dashboard:{_tenant_key(tenant.id)}:{get_dashboard_version(tenant.id)}:"
+            f"{view_method.__name__}:{request.GET.urlencode()}"
+        )
+        entry = cache.get(key)
+        if entry is None:
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            entry = (_etag(response.data), response.data)
+            cache.set(key, entry, DASHBOARD_CACHE_TTL)
+
+        etag, data = entry
+        # Let browsers keep the response but revalidate it on every poll
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if _matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
+
+    return wrapper
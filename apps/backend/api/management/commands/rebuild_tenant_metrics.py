@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.metrics import compute_metrics, find_drift, get_rollups
+from api.models import TenantMetrics
+
+
+class Command(BaseCommand):
+    help = "Verify TenantMetrics rollups against the source tables and rebuild rows that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help="Only check this tenant (ID as stored on records, or numeric tenant ID)")
+        parser.add_argument(
+            '--verify-only', action='store_true',
+            help="Report drift without changing anything (exits non-zero if any is found)"
+        )
+
+    def handle(self, *args, **options):
+        tenant_ids = self.get_tenant_ids(options['tenant'])
+        existing = {m.tenant_id: m for m in TenantMetrics.objects.filter(tenant_id__in=tenant_ids)}
+        drifted = 0
+
+        for tenant_id in sorted(tenant_ids, key=str):
+            metrics = existing.get(tenant_id)
+            if metrics is None:
+                drift = {'row': (None, 'missing')}
+            else:
+                drift = find_drift(metrics)
+
+            if not drift:
+                continue
+
+            drifted += 1
+            self.stdout.write(self.style.WARNING(f"Tenant {tenant_id}:"))
+            for metric, (stored, actual) in sorted(drift.items()):
+                self.stdout.write(f"  {metric}: stored={stored} actual={actual}")
+
+            if not options['verify_only']:
+                with transaction.atomic():
+                    # Lock the row so concurrent deltas queue behind the rebuild
+                    TenantMetrics.objects.select_for_update().filter(tenant_id=tenant_id).first()
+                    TenantMetrics.objects.update_or_create(
+                        tenant_id=tenant_id, defaults=compute_metrics(tenant_id)
+                    )
+
+        summary = f"Checked {len(tenant_ids)} tenant(s), {drifted} with drift"
+        if drifted and options['verify_only']:
+            self.stderr.write(self.style.ERROR(summary))
+            raise SystemExit(1)
+        if drifted:
+            summary += ", rebuilt"
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def get_tenant_ids(self, tenant):
+        """Every tenant ID that has metrics or any tracked record"""
+        field = TenantMetrics._meta.get_field('tenant_id')
+        if tenant:
+            return {field.to_python(int(tenant) if tenant.isdigit() else tenant)}
+
+        tenant_ids = set(TenantMetrics.objects.values_list('tenant_id', flat=True))
+        for rollup in get_rollups():
+            tenant_ids.update(
+                rollup.model.objects.order_by().values_list('tenant_id', flat=True).distinct()
+            )
+        return tenant_ids
@@ -0,0 +1,266 @@
+"""
+Incrementally maintained tenant metrics (api.models.TenantMetrics).
+
+Each tracked model has a Rollup describing what one record contributes to
+its tenant's metrics and how to aggregate the same figures from the source
+table. Signal handlers (api.signals) apply the difference between a record's
+contribution before and after a write as F() deltas on the tenant's row, in
+the same transaction as the write.
+
+Queryset update() and bulk_create() bypass signals; code using them should
+call apply_deltas() (and api.caching.invalidate_dashboard()) itself. `manage.py rebuild_tenant_metrics` recomputes
+every row from the source tables and reports any drift.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+MONEY = DecimalField(max_digits=20, decimal_places=2)
+
+# Value of stock on hand, computed in the database
+STOCK_VALUE = Sum(F('quantity') * F('unit_cost'), output_field=MONEY)
+
+
+def _money(value):
+    return Decimal(str(value or 0))
+
+
+def _sum(expression):
+    return Coalesce(Sum(expression, output_field=MONEY), 0, output_field=MONEY)
+
+
+class Rollup:
+    """
+    How one model feeds TenantMetrics.
+
+    Args:
+        model: Tracked model class
+        fields: Fields the contribution depends on
+        contribution: Callable taking those field values and returning {metric: value}
+        aggregates: {metric: aggregate expression} computing the same figures from the table
+    """
+
+    def __init__(self, model, fields, contribution, aggregates):
+        self.model = model
+        self.fields = fields
+        self.contribution = contribution
+        self.aggregates = aggregates
+
+    def values(self, instance):
+        """Current field values of an instance, or None if any is deferred or an unsaved expression"""
+        values = []
+        for field in self.fields:
+            value = instance.__dict__.get(field)
+            if field not in instance.__dict__ or hasattr(value, 'resolve_expression'):
+                return None
+            values.append(value)
+        return tuple(values)
+
+    def compute(self, tenant_id):
+        """Aggregate this model's metrics for a tenant from the source table"""
+        return self.model.objects.filter(tenant_id=tenant_id).aggregate(**self.aggregates)
+
+
+def product_contribution(quantity, unit_cost, reorder_level):
+    """What one product contributes to its tenant's inventory metrics"""
+    from inventory.models import STOCK_STATUS_IN, STOCK_STATUS_LOW, STOCK_STATUS_OUT, stock_status_for
+
+    quantity = int(quantity or 0)
+    stock_status = stock_status_for(quantity, int(reorder_level or 0))
+    return {
+        'product_count': 1,
+        'stock_value': quantity * _money(unit_cost),
+        'in_stock_count': int(stock_status == STOCK_STATUS_IN),
+        'low_stock_count': int(stock_status == STOCK_STATUS_LOW),
+        'out_of_stock_count': int(stock_status == STOCK_STATUS_OUT),
+    }
+
+
+def get_rollups():
+    """Rollups for every tracked model"""
+    from inventory.models import Product, STOCK_STATUS_IN, STOCK_STATUS_LOW, STOCK_STATUS_OUT
+    from sales.models import Order, Customer
+    from procurement.models import PurchaseOrder, PurchaseRequest, Supplier
+    from warehouse.models import Warehouse
+    from finance.models import CostCenter, Expense
+
+    return [
+        Rollup(
+            Product, ('quantity', 'unit_cost', 'reorder_level'), product_contribution,
+            {
+                'product_count': Count('id'),
+                'stock_value': Coalesce(STOCK_VALUE, 0, output_field=MONEY),
+                'in_stock_count': Count('id', filter=Q(stock_status=STOCK_STATUS_IN)),
+                'low_stock_count': Count('id', filter=Q(stock_status=STOCK_STATUS_LOW)),
+                'out_of_stock_count': Count('id', filter=Q(stock_status=STOCK_STATUS_OUT)),
+            },
+        ),
+        Rollup(
+            Order, ('status', 'total_amount'),
+            lambda status, total_amount: {
+                'order_count': 1,
+                'pending_orders': int(status == 'pending'),
+                'total_revenue': _money(total_amount),
+            },
+            {
+                'order_count': Count('id'),
+                'pending_orders': Count('id', filter=Q(status='pending')),
+                'total_revenue': _sum('total_amount'),
+            },
+        ),
+        Rollup(
+            Customer, (), lambda: {'customer_count': 1},
+            {'customer_count': Count('id')},
+        ),
+        Rollup(
+            PurchaseRequest, ('status',),
+            lambda status: {
+                'purchase_request_count': 1,
+                'pending_purchase_requests': int(status == 'pending'),
+            },
+            {
+                'purchase_request_count': Count('id'),
+                'pending_purchase_requests': Count('id', filter=Q(status='pending')),
+            },
+        ),
+        Rollup(
+            PurchaseOrder, ('total_amount',),
+            lambda total_amount: {
+                'purchase_order_count': 1,
+                'total_purchase_value': _money(total_amount),
+            },
+            {
+                'purchase_order_count': Count('id'),
+                'total_purchase_value': _sum('total_amount'),
+            },
+        ),
+        Rollup(
+            Supplier, (), lambda: {'supplier_count': 1},
+            {'supplier_count': Count('id')},
+        ),
+        Rollup(
+            Warehouse, ('status',),
+            lambda status: {
+                'warehouse_count': 1,
+                'active_warehouses': int(status == 'active'),
+            },
+            {
+                'warehouse_count': Count('id'),
+                'active_warehouses': Count('id', filter=Q(status='active')),
+            },
+        ),
+        Rollup(
+            CostCenter, ('budget', 'actual_cost'),
+            lambda budget, actual_cost: {
+                'total_budget': _money(budget),
+                'total_actual_cost': _money(actual_cost),
+            },
+            {
+                'total_budget': _sum('budget'),
+                'total_actual_cost': _sum('actual_cost'),
+            },
+        ),
+        Rollup(
+            Expense, ('amount',),
+            lambda amount: {
+                'expense_count': 1,
+                'total_expenses': _money(amount),
+            },
+            {
+                'expense_count': Count('id'),
+                'total_expenses': _sum('amount'),
+            },
+        ),
+    ]
+
+
+def diff(before, after):
+    """Per-metric difference between two contributions (either may be None)"""
+    before = before or {}
+    after = after or {}
+    return {
+        metric: after.get(metric, 0) - before.get(metric, 0)
+        for metric in set(before) | set(after)
+    }
+
+
+def apply_deltas(tenant_id, deltas):
+    """
+    Add deltas to a tenant's metrics with a single F() UPDATE.
+    Seeds the row from the source tables if the tenant has none yet.
+
+    Args:
+        tenant_id: Tenant ID the changed records belong to
+        deltas: dict - {metric: change}
+    """
+    from api.models import TenantMetrics
+
+    deltas = {metric: delta for metric, delta in deltas.items() if delta}
+    if tenant_id is None or not deltas:
+        return
+
+    updated = TenantMetrics.objects.filter(tenant_id=tenant_id).update(
+        updated_at=timezone.now(),
+        **{metric: F(metric) + delta for metric, delta in deltas.items()}
+    )
+    if not updated:
+        # First change for this tenant: the source tables already include it
+        refresh_metrics(tenant_id)
+
+
+def compute_metrics(tenant_id):
+    """
+    Compute a tenant's metrics from the source tables.
+
+    Returns:
+        dict: {metric: value} for every TenantMetrics figure
+    """
+    metrics = {}
+    for rollup in get_rollups():
+        metrics.update(rollup.compute(tenant_id))
+    return metrics
+
+
+def refresh_metrics(tenant_id):
+    """
+    Recompute and store a tenant's metrics.
+
+    Returns:
+        TenantMetrics: The stored row
+    """
+    from api.models import TenantMetrics
+
+    metrics, _ = TenantMetrics.objects.update_or_create(
+        tenant_id=tenant_id, defaults=compute_metrics(tenant_id)
+    )
+    return metrics
+
+
+def get_metrics(tenant_id):
+    """
+    Get a tenant's metrics row, building it on first use.
+
+    Returns:
+        TenantMetrics: The tenant's metrics
+    """
+    from api.models import TenantMetrics
+
+    metrics = TenantMetrics.objects.filter(tenant_id=tenant_id).first()
+    return metrics or refresh_metrics(tenant_id)
+
+
+def find_drift(metrics):
+    """
+    Compare a stored metrics row with the source tables.
+
+    Returns:
+        dict: {metric: (stored, actual)} for every figure that differs
+    """
+    actual = compute_metrics(metrics.tenant_id)
+    return {
+        metric: (getattr(metrics, metric), value)
+        for metric, value in actual.items()
+        if getattr(metrics, metric) != value
+    }
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.UUIDField(help_text='Tenant ID for multi-tenant isolation', unique=True)),
+                ('product_count', models.IntegerField(default=0)),
+                ('stock_value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('in_stock_count', models.IntegerField(default=0)),
+                ('low_stock_count', models.IntegerField(default=0)),
+                ('out_of_stock_count', models.IntegerField(default=0)),
+                ('order_count', models.IntegerField(default=0)),
+                ('pending_orders', models.IntegerField(default=0)),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('customer_count', models.IntegerField(default=0)),
+                ('purchase_request_count', models.IntegerField(default=0)),
+                ('pending_purchase_requests', models.IntegerField(default=0)),
+                ('purchase_order_count', models.IntegerField(default=0)),
+                ('total_purchase_value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('supplier_count', models.IntegerField(default=0)),
+                ('warehouse_count', models.IntegerField(default=0)),
+                ('active_warehouses', models.IntegerField(default=0)),
+                ('total_budget', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('total_actual_cost', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('expense_count', models.IntegerField(default=0)),
+                ('total_expenses', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Tenant Metrics',
+                'verbose_name_plural': 'Tenant Metrics',
+            },
+        ),
+    ]
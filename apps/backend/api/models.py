@@ -1,3 +1,55 @@
 from django.db import models
 
-# Create your models here.
+
+class TenantMetrics(models.Model):
+    """
+    Dashboard figures for one tenant, kept up to date incrementally.
+
+    Rows are adjusted with F() deltas whenever a tracked record changes (see
+    api.metrics); `manage.py rebuild_tenant_metrics` recomputes them from the
+    source tables to detect and repair drift.
+    """
+    tenant_id = models.UUIDField(unique=True, help_text="Tenant ID for multi-tenant isolation")
+    
+    # Inventory
+    product_count = models.IntegerField(default=0)
+    stock_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    in_stock_count = models.IntegerField(default=0)
+    low_stock_count = models.IntegerField(default=0)
+    out_of_stock_count = models.IntegerField(default=0)
+    
+    # Sales
+    order_count = models.IntegerField(default=0)
+    pending_orders = models.IntegerField(default=0)
+    total_revenue = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    customer_count = models.IntegerField(default=0)
+    
+    # Procurement
+    purchase_request_count = models.IntegerField(default=0)
+    pending_purchase_requests = models.IntegerField(default=0)
+    purchase_order_count = models.IntegerField(default=0)
+    total_purchase_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    supplier_count = models.IntegerField(default=0)
+    
+    # Warehouses
+    warehouse_count = models.IntegerField(default=0)
+    active_warehouses = models.IntegerField(default=0)
+    
+    # Finance
+    total_budget = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_actual_cost = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    expense_count = models.IntegerField(default=0)
+    total_expenses = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Tenant Metrics'
+        verbose_name_plural = 'Tenant Metrics'
+    
+    def __str__(self):
+        return f"Metrics for tenant {self.tenant_id}"
+    
+    @property
+    def budget_variance(self):
+        return self.total_actual_cost - self.total_budget
@@ -0,0 +1,59 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+
+from api.caching import invalidate_dashboard
+from api.metrics import apply_deltas, diff, get_rollups
+
+
+def _track(rollup):
+    """Connect the handlers keeping TenantMetrics in step with one model"""
+    
+    def stored_contribution(instance):
+        """What the record as currently stored in the database contributes"""
+        if not rollup.fields:
+            return rollup.contribution()
+        values = type(instance).objects.filter(pk=instance.pk).values_list(*rollup.fields).first()
+        return rollup.contribution(*values) if values is not None else None
+    
+    def before_save(sender, instance, **kwargs):
+        instance._metrics_before = None if instance._state.adding else stored_contribution(instance)
+    
+    def after_save(sender, instance, update_fields=None, **kwargs):
+        values = rollup.values(instance)
+        if values is None or (update_fields is not None and not set(rollup.fields) <= set(update_fields)):
+            # The instance does not hold every saved value; read them back
+            after = stored_contribution(instance)
+        else:
+            after = rollup.contribution(*values)
+        apply_deltas(instance.tenant_id, diff(instance._metrics_before, after))
+    
+    def before_delete(sender, instance, **kwargs):
+        instance._metrics_before = stored_contribution(instance)
+    
+    def after_delete(sender, instance, **kwargs):
+        apply_deltas(instance.tenant_id, diff(instance._metrics_before, None))
+    
+    uid = f"tenant_metrics_{rollup.model._meta.label_lower}"
+    pre_save.connect(before_save, sender=rollup.model, weak=False, dispatch_uid=uid)
+    post_save.connect(after_save, sender=rollup.model, weak=False, dispatch_uid=uid)
+    pre_delete.connect(before_delete, sender=rollup.model, weak=False, dispatch_uid=uid)
+    post_delete.connect(after_delete, sender=rollup.model, weak=False, dispatch_uid=uid)
+
+
+def dashboard_changed(sender, instance, **kwargs):
+    invalidate_dashboard(getattr(instance, 'tenant_id', None))
+
+
+def _dashboard_models():
+    """Models whose writes can change a dashboard response"""
+    from inventory.models import StockMovement
+    from warehouse.models import Transfer
+    return [rollup.model for rollup in get_rollups()] + [StockMovement, Transfer]
+
+
+for rollup in get_rollups():
+    _track(rollup)
+
+for model in _dashboard_models():
+    uid = f"dashboard_cache_{model._meta.label_lower}"
+    post_save.connect(dashboard_changed, sender=model, dispatch_uid=uid)
+    post_delete.connect(dashboard_changed, sender=model, dispatch_uid=uid)
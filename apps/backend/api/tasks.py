@@ -0,0 +1,10 @@
+from celery import shared_task
+
+from api import admin_overview
+
+
+@shared_task
+def refresh_admin_overview_snapshot():
+    """Precompute the cross-tenant admin overview"""
+    overview = admin_overview.refresh_snapshot()
+    return f"Admin overview snapshot refreshed for {len(overview['tenant_breakdown'])} tenants"
@@ -1,3 +1,110 @@
+from decimal import Decimal
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.metrics import find_drift, refresh_metrics
+from api.models import TenantMetrics
+from api.views import DashboardViewSet
+from inventory.models import Product
+from tenants.models import Tenant
+from users.models import User
+
+
+class DashboardQueryCountTests(TestCase):
+    """Dashboard endpoints read running totals from TenantMetrics, not the source tables"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Dashboard Co", code="dashboard-co")
+        cls.user = User.objects.create(email="dashboard@example.com")
+        Product.objects.bulk_create([
+            Product(
+                tenant_id=cls.tenant.id,
+                product_code=f"PRD-{i:03d}",
+                sku=f"SKU-{i}",
+                name=f"Product {i}",
+                category="A" if i % 2 else "B",
+                unit_cost=Decimal('2.50'),
+                quantity=i % 5,
+                reorder_level=2,
+            )
+            for i in range(50)
+        ])
+        # bulk_create skips the signals that maintain the rollup
+        refresh_metrics(cls.tenant.id)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, action, **headers):
+        request = APIRequestFactory().get(f'/api/dashboard/{action}/', **headers)
+        force_authenticate(request, user=self.user)
+        request.tenant = self.tenant
+        return DashboardViewSet.as_view({'get': action})(request)
+
+    def test_overview_query_count(self):
+        with self.assertNumQueries(2):
+            response = self.get('overview')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stats']['total_products'], 50)
+        self.assertEqual(response.data['metrics']['out_of_stock_items'], 10)
+        self.assertEqual(response.data['metrics']['low_stock_items'], 20)
+        self.assertEqual(response.data['metrics']['total_stock_value'], 250.0)
+
+    def test_inventory_stats_query_count(self):
+        with self.assertNumQueries(3):
+            response = self.get('inventory_stats')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total_products'], 50)
+        self.assertEqual(response.data['total_stock_value'], Decimal('250.00'))
+        self.assertEqual(response.data['stock_status'], {'in_stock': 20, 'low_stock': 20, 'out_of_stock': 10})
+        self.assertEqual(len(response.data['by_category']), 2)
+
+    def test_cached_response_and_etag(self):
+        response = self.get('overview')
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.get('overview', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # A write bumps the tenant's dashboard version
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.filter(tenant_id=self.tenant.id).first().delete()
+        response = self.get('overview', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stats']['total_products'], 49)
+
+
+class TenantMetricsRollupTests(TestCase):
+    """Writes keep TenantMetrics in step with the source tables"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Rollup Co", code="rollup-co")
+
+    def test_product_changes_apply_deltas(self):
+        product = Product.objects.create(
+            tenant_id=self.tenant.id, sku="SKU-1", name="Widget",
+            unit_cost=Decimal('4.00'), quantity=10, reorder_level=3,
+        )
+        product = Product.objects.get(pk=product.pk)
+        product.quantity = 2
+        product.save()
+
+        metrics = TenantMetrics.objects.get(tenant_id=self.tenant.id)
+        self.assertEqual(metrics.product_count, 1)
+        self.assertEqual(metrics.stock_value, Decimal('8.00'))
+        self.assertEqual(metrics.low_stock_count, 1)
+        self.assertEqual(metrics.in_stock_count, 0)
+        self.assertEqual(find_drift(metrics), {})
 
-# Create your tests here.
+        product.delete()
+        metrics.refresh_from_db()
+        self.assertEqual(metrics.product_count, 0)
+        self.assertEqual(metrics.stock_value, Decimal('0.00'))
+        self.assertEqual(find_drift(metrics), {})
@@ -4,7 +4,9 @@ Central API views for dashboard statistics and multi-tenant management.
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Sum, Count, Q, Avg
+from rest_framework.pagination import PageNumberPagination
+from django.db.models import Sum, Count, Q, Avg, F
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from datetime import timedelta
 
@@ -16,12 +18,19 @@ from finance.models import CostCenter, Expense
 from notifications.models import Notification
 from tenants.models import Tenant, Membership
 from users.models import User
+from api.admin_overview import compute_overview, get_snapshot, sort_breakdown
+from api.caching import cached_dashboard_response
+from api.metrics import MONEY, STOCK_VALUE, get_metrics
 
 
 class DashboardViewSet(viewsets.ViewSet):
     """
     Tenant-scoped dashboard statistics and analytics.
     Returns aggregated data for the current tenant only.
+    
+    Running totals come from the tenant's TenantMetrics row (see api.metrics);
+    only time-windowed and grouped figures are queried from the source tables.
+    Responses are cached per tenant until a relevant write (see api.caching).
     """
     permission_classes = [permissions.IsAuthenticated]
     
@@ -30,6 +39,7 @@ class DashboardViewSet(viewsets.ViewSet):
         return getattr(self.request, 'tenant', None)
     
     @action(detail=False, methods=['get'])
+    @cached_dashboard_response
     def overview(self, request):
         """
         Get overall dashboard statistics for tenant.
@@ -39,42 +49,14 @@ class DashboardViewSet(viewsets.ViewSet):
         if not tenant:
             return Response({'error': 'No tenant specified'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Calculate statistics
-        products = Product.objects.filter(tenant_id=tenant.id)
-        orders = Order.objects.filter(tenant_id=tenant.id)
-        warehouses = Warehouse.objects.filter(tenant_id=tenant.id)
-        cost_centers = CostCenter.objects.filter(tenant_id=tenant.id)
-        
-        # Total stock value
-        total_stock_value = sum(p.quantity * p.unit_cost for p in products)
-        
-        # Low stock items
-        low_stock_count = products.filter(
-            quantity__lte=F('reorder_level'),
-            quantity__gt=0
-        ).count() if products.exists() else 0
-        
-        # Out of stock
-        out_of_stock_count = products.filter(quantity=0).count()
+        metrics = get_metrics(tenant.id)
         
         # Recent orders (last 30 days)
         thirty_days_ago = timezone.now() - timedelta(days=30)
-        recent_orders = orders.filter(created_at__gte=thirty_days_ago)
-        pending_orders = orders.filter(status='pending').count()
-        
-        # Total revenue (last 30 days)
-        revenue = recent_orders.aggregate(total=Sum('total_amount'))['total'] or 0
-        
-        # Purchase requests pending approval
-        pending_prs = PurchaseRequest.objects.filter(
-            tenant_id=tenant.id, 
-            status='pending'
-        ).count()
-        
-        # Budget variance
-        budget_variance = cost_centers.aggregate(
-            variance=Sum(F('actual_cost') - F('budget'))
-        )['variance'] or 0
+        recent = Order.objects.filter(tenant_id=tenant.id, created_at__gte=thirty_days_ago).aggregate(
+            count=Count('id'),
+            revenue=Coalesce(Sum('total_amount'), 0, output_field=MONEY),
+        )
         
         return Response({
             'tenant': {
@@ -83,26 +65,27 @@ class DashboardViewSet(viewsets.ViewSet):
                 'code': tenant.code,
             },
             'metrics': {
-                'total_stock_value': float(total_stock_value),
-                'active_warehouses': warehouses.filter(status='active').count(),
-                'pending_orders': pending_orders,
-                'purchase_requests': pending_prs,
-                'low_stock_items': low_stock_count,
-                'out_of_stock_items': out_of_stock_count,
-                'recent_revenue_30d': float(revenue),
-                'budget_variance': float(budget_variance),
+                'total_stock_value': float(metrics.stock_value),
+                'active_warehouses': metrics.active_warehouses,
+                'pending_orders': metrics.pending_orders,
+                'purchase_requests': metrics.pending_purchase_requests,
+                'low_stock_items': metrics.low_stock_count,
+                'out_of_stock_items': metrics.out_of_stock_count,
+                'recent_revenue_30d': float(recent['revenue']),
+                'budget_variance': float(metrics.budget_variance),
             },
             'stats': {
-                'total_products': products.count(),
-                'total_customers': Customer.objects.filter(tenant_id=tenant.id).count(),
-                'total_suppliers': Supplier.objects.filter(tenant_id=tenant.id).count(),
-                'total_warehouses': warehouses.count(),
-                'total_orders': orders.count(),
-                'recent_orders_30d': recent_orders.count(),
+                'total_products': metrics.product_count,
+                'total_customers': metrics.customer_count,
+                'total_suppliers': metrics.supplier_count,
+                'total_warehouses': metrics.warehouse_count,
+                'total_orders': metrics.order_count,
+                'recent_orders_30d': recent['count'],
             }
         })
     
     @action(detail=False, methods=['get'])
+    @cached_dashboard_response
     def inventory_stats(self, request):
         """
         Get inventory-specific dashboard stats.
@@ -112,21 +95,13 @@ class DashboardViewSet(viewsets.ViewSet):
         if not tenant:
             return Response({'error': 'No tenant specified'}, status=status.HTTP_400_BAD_REQUEST)
         
-        products = Product.objects.filter(tenant_id=tenant.id)
-        
-        # Stock status breakdown
-        in_stock = products.filter(quantity__gt=F('reorder_level')).count()
-        low_stock = products.filter(
-            quantity__lte=F('reorder_level'), 
-            quantity__gt=0
-        ).count()
-        out_of_stock = products.filter(quantity=0).count()
+        metrics = get_metrics(tenant.id)
         
         # By category
-        by_category = products.values('category').annotate(
+        by_category = Product.objects.filter(tenant_id=tenant.id).values('category').annotate(
             count=Count('id'),
-            total_value=Sum(F('quantity') * F('unit_cost'))
-        )
+            total_value=Coalesce(STOCK_VALUE, 0, output_field=MONEY),
+        ).order_by('category')
         
         # Recent stock movements (last 7 days)
         seven_days_ago = timezone.now() - timedelta(days=7)
@@ -136,18 +111,19 @@ class DashboardViewSet(viewsets.ViewSet):
         ).count()
         
         return Response({
-            'total_products': products.count(),
-            'total_stock_value': sum(p.quantity * p.unit_cost for p in products),
+            'total_products': metrics.product_count,
+            'total_stock_value': metrics.stock_value,
             'stock_status': {
-                'in_stock': in_stock,
-                'low_stock': low_stock,
-                'out_of_stock': out_of_stock,
+                'in_stock': metrics.in_stock_count,
+                'low_stock': metrics.low_stock_count,
+                'out_of_stock': metrics.out_of_stock_count,
             },
             'by_category': list(by_category),
             'recent_movements_7d': recent_movements,
         })
     
     @action(detail=False, methods=['get'])
+    @cached_dashboard_response
     def sales_stats(self, request):
         """
         Get sales-specific dashboard stats.
@@ -157,6 +133,7 @@ class DashboardViewSet(viewsets.ViewSet):
         if not tenant:
             return Response({'error': 'No tenant specified'}, status=status.HTTP_400_BAD_REQUEST)
         
+        metrics = get_metrics(tenant.id)
         orders = Order.objects.filter(tenant_id=tenant.id)
         
         # Status breakdown
@@ -174,8 +151,8 @@ class DashboardViewSet(viewsets.ViewSet):
         ).order_by('-total_revenue')[:5]
         
         return Response({
-            'total_orders': orders.count(),
-            'total_revenue': orders.aggregate(total=Sum('total_amount'))['total'] or 0,
+            'total_orders': metrics.order_count,
+            'total_revenue': metrics.total_revenue,
             'recent_orders_30d': recent_orders.count(),
             'recent_revenue_30d': float(recent_revenue),
             'by_status': list(by_status),
@@ -189,6 +166,7 @@ class DashboardViewSet(viewsets.ViewSet):
         })
     
     @action(detail=False, methods=['get'])
+    @cached_dashboard_response
     def procurement_stats(self, request):
         """
         Get procurement-specific dashboard stats.
@@ -198,6 +176,7 @@ class DashboardViewSet(viewsets.ViewSet):
         if not tenant:
             return Response({'error': 'No tenant specified'}, status=status.HTTP_400_BAD_REQUEST)
         
+        metrics = get_metrics(tenant.id)
         purchase_orders = PurchaseOrder.objects.filter(tenant_id=tenant.id)
         purchase_requests = PurchaseRequest.objects.filter(tenant_id=tenant.id)
         suppliers = Supplier.objects.filter(tenant_id=tenant.id)
@@ -215,10 +194,10 @@ class DashboardViewSet(viewsets.ViewSet):
         ).order_by('-total_spent')[:5]
         
         return Response({
-            'total_suppliers': suppliers.count(),
-            'total_purchase_orders': purchase_orders.count(),
-            'total_purchase_requests': purchase_requests.count(),
-            'pending_approvals': purchase_requests.filter(status='pending').count(),
+            'total_suppliers': metrics.supplier_count,
+            'total_purchase_orders': metrics.purchase_order_count,
+            'total_purchase_requests': metrics.purchase_request_count,
+            'pending_approvals': metrics.pending_purchase_requests,
             'po_by_status': list(po_by_status),
             'pr_by_status': list(pr_by_status),
             'top_suppliers': [{
@@ -232,6 +211,7 @@ class DashboardViewSet(viewsets.ViewSet):
         })
     
     @action(detail=False, methods=['get'])
+    @cached_dashboard_response
     def warehouse_stats(self, request):
         """
         Get warehouse-specific dashboard stats.
@@ -241,28 +221,33 @@ class DashboardViewSet(viewsets.ViewSet):
         if not tenant:
             return Response({'error': 'No tenant specified'}, status=status.HTTP_400_BAD_REQUEST)
         
+        metrics = get_metrics(tenant.id)
         warehouses = Warehouse.objects.filter(tenant_id=tenant.id)
         transfers = Transfer.objects.filter(tenant_id=tenant.id)
         
-        # Average capacity utilization
-        avg_capacity = warehouses.aggregate(
-            avg_util=Avg('current_utilization')
-        )['avg_util'] or 0
+        # Capacity and client totals in one pass
+        warehouse_totals = warehouses.aggregate(
+            avg_util=Avg('current_utilization'),
+            total_clients=Sum('active_clients'),
+            total_skus=Sum('total_skus'),
+        )
+        avg_capacity = warehouse_totals['avg_util'] or 0
         
         # Transfer status
         transfer_by_status = transfers.values('status').annotate(count=Count('id'))
         
         return Response({
-            'total_warehouses': warehouses.count(),
-            'active_warehouses': warehouses.filter(status='active').count(),
-            'total_clients': warehouses.aggregate(total=Sum('active_clients'))['total'] or 0,
-            'total_skus': warehouses.aggregate(total=Sum('total_skus'))['total'] or 0,
+            'total_warehouses': metrics.warehouse_count,
+            'active_warehouses': metrics.active_warehouses,
+            'total_clients': warehouse_totals['total_clients'] or 0,
+            'total_skus': warehouse_totals['total_skus'] or 0,
             'avg_capacity_utilization': float(avg_capacity),
             'total_transfers': transfers.count(),
             'transfer_by_status': list(transfer_by_status),
         })
     
     @action(detail=False, methods=['get'])
+    @cached_dashboard_response
     def finance_stats(self, request):
         """
         Get finance-specific dashboard stats.
@@ -272,13 +257,14 @@ class DashboardViewSet(viewsets.ViewSet):
         if not tenant:
             return Response({'error': 'No tenant specified'}, status=status.HTTP_400_BAD_REQUEST)
         
+        metrics = get_metrics(tenant.id)
         cost_centers = CostCenter.objects.filter(tenant_id=tenant.id)
         expenses = Expense.objects.filter(tenant_id=tenant.id)
         
         # Budget summary
-        total_budget = cost_centers.aggregate(total=Sum('budget'))['total'] or 0
-        total_actual = cost_centers.aggregate(total=Sum('actual_cost'))['total'] or 0
-        variance = total_actual - total_budget
+        total_budget = metrics.total_budget
+        total_actual = metrics.total_actual_cost
+        variance = metrics.budget_variance
         
         # Expenses by category
         by_category = expenses.values('category').annotate(
@@ -296,13 +282,19 @@ class DashboardViewSet(viewsets.ViewSet):
             'total_actual_cost': float(total_actual),
             'budget_variance': float(variance),
             'variance_percentage': float((variance / total_budget * 100) if total_budget else 0),
-            'total_expenses': expenses.count(),
+            'total_expenses': metrics.expense_count,
             'recent_expenses_30d': recent_expenses.count(),
             'recent_total_30d': float(recent_total),
             'by_category': list(by_category),
         })
 
 
+class AdminOverviewPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
 class MultiTenantManagementViewSet(viewsets.ViewSet):
     """
     Multi-tenant management endpoints.
@@ -414,6 +406,11 @@ class MultiTenantManagementViewSet(viewsets.ViewSet):
         """
         Cross-tenant statistics (for superusers only).
         GET /api/multi-tenant/admin_overview/
+        
+        Query params:
+            ordering: Sort field, '-' prefix for descending (members, products, orders, ...)
+            page, page_size: Pagination of tenant_breakdown
+            live: 'true' to skip the precomputed snapshot
         """
         if not request.user.is_superuser:
             return Response(
@@ -421,36 +418,29 @@ class MultiTenantManagementViewSet(viewsets.ViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # System-wide statistics
-        total_tenants = Tenant.objects.filter(is_active=True).count()
-        total_users = User.objects.filter(is_active=True).count()
-        total_products = Product.objects.count()
-        total_orders = Order.objects.count()
-        
-        # Tenant breakdown
-        tenant_stats = []
-        for tenant in Tenant.objects.filter(is_active=True):
-            tenant_stats.append({
-                'tenant_id': tenant.id,
-                'tenant_name': tenant.name,
-                'tenant_code': tenant.code,
-                'members': Membership.objects.filter(tenant_id=tenant.id, is_active=True).count(),
-                'products': Product.objects.filter(tenant_id=tenant.id).count(),
-                'orders': Order.objects.filter(tenant_id=tenant.id).count(),
-                'warehouses': Warehouse.objects.filter(tenant_id=tenant.id).count(),
-                'created_at': tenant.created_at,
-            })
+        # Precomputed snapshot (refreshed by Celery) unless ?live=true
+        overview = None
+        if request.query_params.get('live', '').lower() not in ('1', 'true'):
+            overview = get_snapshot()
+        if overview is None:
+            overview = compute_overview()
+        
+        try:
+            breakdown = sort_breakdown(
+                overview['tenant_breakdown'], request.query_params.get('ordering', 'tenant_id')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        paginator = AdminOverviewPagination()
+        page = paginator.paginate_queryset(breakdown, request, view=self)
         
         return Response({
-            'system_stats': {
-                'total_tenants': total_tenants,
-                'total_users': total_users,
-                'total_products': total_products,
-                'total_orders': total_orders,
-            },
-            'tenant_breakdown': tenant_stats,
+            'system_stats': overview['system_stats'],
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'generated_at': overview['generated_at'],
+            'tenant_breakdown': page,
         })
 
-
-# Import F for calculated fields
-from django.db.models import F
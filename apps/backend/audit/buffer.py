@@ -0,0 +1,195 @@
+"""
+Buffered audit trail.
+
+Model signals (audit.signals) call record() instead of inserting an AuditLog
+row per write. Events are held per transaction and written with one
+bulk_create when it commits (transaction.on_commit), so rolled-back writes
+leave no audit rows and a transaction saving N records costs one INSERT.
+Events recorded inside a savepoint are dropped with it if it rolls back.
+
+Jobs that commit many small transactions (e.g. the Shopify sync, one
+transaction per record) run inside batched(): committed events are then held
+until AUDIT_BATCH_SIZE have accumulated or the block exits.
+
+With settings.AUDIT_ASYNC the batches are handed to the
+audit.tasks.write_audit_events Celery task instead of being written inline.
+
+The acting user is taken from acting_as() if set, otherwise from the request
+being served (audit.middleware.AuditContextMiddleware).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditLog
+
+# Committed events written per INSERT, and held by batched() before writing
+AUDIT_BATCH_SIZE = 500
+
+_actor = ContextVar('audit_actor', default=None)
+_request = ContextVar('audit_request', default=None)
+_pending = ContextVar('audit_pending', default=None)
+
+
+@contextmanager
+def acting_as(user):
+    """Attribute events recorded in this block to `user` (Celery tasks, commands)"""
+    token = _actor.set(user)
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+@contextmanager
+def request_context(request):
+    """Attribute events recorded in this block to the request's authenticated user"""
+    token = _request.set(request)
+    try:
+        yield
+    finally:
+        _request.reset(token)
+
+
+def current_user_id():
+    """ID of the user the current events are attributed to, or None"""
+    user = _actor.get()
+    if user is None:
+        request = _request.get()
+        # DRF authenticates inside the view and copies the user onto the request
+        user = getattr(request, 'user', None)
+    if user is None or not getattr(user, 'is_authenticated', False):
+        return None
+    return user.pk
+
+
+@contextmanager
+def batched():
+    """
+    Hold committed events across transactions and write them in batches of
+    AUDIT_BATCH_SIZE, flushing the rest when the outermost block exits.
+    Usable as a context manager or a decorator; nested blocks join the outer batch.
+    """
+    if _pending.get() is not None:
+        yield
+        return
+
+    token = _pending.set([])
+    try:
+        yield
+    finally:
+        events = _pending.get()
+        _pending.reset(token)
+        write(events)
+
+
+class _Batch:
+    """Events recorded at one savepoint depth of the current transaction"""
+
+    def __init__(self, state, key):
+        self.state = state
+        self.key = key
+        self.events = []
+
+    def committed(self):
+        self.state['batches'].pop(self.key, None)
+        _committed(self.events)
+
+
+def _transaction_state(connection):
+    """
+    Open batches of the connection's current transaction, keyed by savepoint stack.
+
+    Django replaces run_on_commit whenever a transaction ends or a savepoint
+    rolls back, and drops the callbacks registered since. A batch is live
+    exactly while its callback is still registered.
+    """
+    state = connection.__dict__.setdefault('audit_state', {'hooks': None, 'batches': {}})
+    if state['hooks'] is not connection.run_on_commit:
+        registered = {id(func) for _, func, _ in connection.run_on_commit}
+        state['batches'] = {
+            key: batch for key, batch in state['batches'].items()
+            if id(batch.callback) in registered
+        }
+        state['hooks'] = connection.run_on_commit
+    return state
+
+
+def record(instance, action, details=None, using=None):
+    """
+    Buffer an audit event for a model instance.
+
+    Args:
+        instance: Saved or deleted model instance (must have tenant_id)
+        action: str - CREATE, UPDATE, DELETE, ...
+        details: dict - Extra details stored with the instance id
+        using: Database alias the write went to
+    """
+    event = AuditLog(
+        tenant_id=instance.tenant_id,
+        user_id=current_user_id(),
+        action=action,
+        module=instance.__class__.__name__,
+        details={'id': instance.pk, **(details or {})},
+        timestamp=timezone.now(),
+    )
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        _committed([event])
+        return
+
+    state = _transaction_state(connection)
+    key = tuple(connection.savepoint_ids)
+    batch = state['batches'].get(key)
+    if batch is None:
+        batch = state['batches'][key] = _Batch(state, key)
+        batch.callback = batch.committed
+        transaction.on_commit(batch.callback, using=using, robust=True)
+    batch.events.append(event)
+
+
+def _committed(events):
+    pending = _pending.get()
+    if pending is None:
+        write(events)
+        return
+    pending.extend(events)
+    if len(pending) >= AUDIT_BATCH_SIZE:
+        write(pending[:])
+        pending.clear()
+
+
+def write(events):
+    """Write committed events, inline or through the audit Celery queue"""
+    if not events:
+        return
+    if settings.AUDIT_ASYNC:
+        from .tasks import write_audit_events
+
+        for start in range(0, len(events), AUDIT_BATCH_SIZE):
+            write_audit_events.delay([
+                serialize(event) for event in events[start:start + AUDIT_BATCH_SIZE]
+            ])
+        return
+    AuditLog.objects.bulk_create(events, batch_size=AUDIT_BATCH_SIZE)
+
+
+def serialize(event):
+    """JSON-safe form of an unsaved AuditLog for the task queue"""
+    return {
+        'tenant_id': str(event.tenant_id) if event.tenant_id is not None else None,
+        'user_id': event.user_id,
+        'action': event.action,
+        'module': event.module,
+        'details': event.details,
+        'timestamp': event.timestamp.isoformat(),
+    }
+
+
+def deserialize(data):
+    """Inverse of serialize()"""
+    return AuditLog(**{**data, 'timestamp': parse_datetime(data['timestamp'])})
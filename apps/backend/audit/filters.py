@@ -0,0 +1,34 @@
+import json
+
+from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+
+from .models import AuditLog
+
+
+class AuditLogFilter(filters.FilterSet):
+    """
+    Audit log filters. Every filter is served by an index on the tenant's
+    rows (see AuditLog.Meta), and since/until prune the monthly partitions.
+    """
+    object_id = filters.CharFilter(method='filter_object_id', help_text="ID of the audited record (details.id)")
+    since = filters.IsoDateTimeFilter(field_name='timestamp', lookup_expr='gte')
+    until = filters.IsoDateTimeFilter(field_name='timestamp', lookup_expr='lt')
+    details = filters.CharFilter(method='filter_details', help_text="JSON object the details must contain")
+
+    class Meta:
+        model = AuditLog
+        fields = ['module', 'action', 'user']
+
+    def filter_object_id(self, queryset, name, value):
+        # Integer primary keys are stored as JSON numbers
+        return queryset.filter(details__id=int(value) if value.isdigit() else value)
+
+    def filter_details(self, queryset, name, value):
+        try:
+            details = json.loads(value)
+        except ValueError:
+            details = None
+        if not isinstance(details, dict):
+            raise ValidationError({'details': "Use a JSON object, e.g. {\"fields\": [\"quantity\"]}"})
+        return queryset.filter(details__contains=details)
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from audit import partitions
+
+
+class Command(BaseCommand):
+    help = "Create upcoming monthly audit log partitions and archive partitions past the retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int, default=partitions.MONTHS_AHEAD,
+            help="Months to create partitions for beyond the current one"
+        )
+        parser.add_argument(
+            '--retention-months', type=int, default=settings.AUDIT_RETENTION_MONTHS,
+            help="Full months of audit log kept before the current one"
+        )
+        parser.add_argument(
+            '--archive-dir', default=settings.AUDIT_ARCHIVE_DIR,
+            help="Directory the archived partitions (.ndjson.gz) are written to"
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="List the partitions that would be archived without changing anything"
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            expired = partitions.expired_partitions(options['retention_months'])
+            for month in expired:
+                self.stdout.write(f"  would archive {partitions.partition_name(month)}")
+            self.stdout.write(self.style.SUCCESS(f"{len(expired)} partition(s) past retention"))
+            return
+
+        for name in partitions.ensure_partitions(options['ahead']):
+            self.stdout.write(f"  created {name}")
+        archived = partitions.archive_partitions(options['retention_months'], options['archive_dir'])
+        for name, path, rows in archived:
+            self.stdout.write(f"  archived {name}: {rows} row(s) to {path}")
+        self.stdout.write(self.style.SUCCESS(f"Archived {len(archived)} partition(s)"))
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['tenant_id', '-timestamp'], name='audit_audit_tenant__1b7744_idx'),
+        ),
+    ]
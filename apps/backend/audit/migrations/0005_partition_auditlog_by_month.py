@@ -0,0 +1,81 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Rebuilds audit_auditlog as a table range-partitioned by month on "timestamp"
+# (audit.partitions manages the partitions from here on). Existing rows are
+# copied into monthly partitions; indexes and foreign keys are recreated on
+# the parent under their original names. Postgres requires the partition key
+# in the primary key, so it becomes (id, "timestamp"); ids still come from
+# one sequence and stay unique.
+PARTITION_AUDITLOG_SQL = """
+DO $$
+DECLARE
+    month date;
+    last_month date;
+    statement text;
+    index_definitions text[];
+    constraint_definitions text[];
+BEGIN
+    ALTER TABLE audit_auditlog RENAME TO audit_auditlog_unpartitioned;
+
+    SELECT coalesce(array_agg(pg_get_indexdef(indexrelid)), '{}') INTO index_definitions
+    FROM pg_index
+    WHERE indrelid = 'audit_auditlog_unpartitioned'::regclass AND NOT indisprimary;
+
+    SELECT coalesce(array_agg(format('ALTER TABLE audit_auditlog ADD CONSTRAINT %I %s', conname, pg_get_constraintdef(oid))), '{}')
+    INTO constraint_definitions
+    FROM pg_constraint
+    WHERE conrelid = 'audit_auditlog_unpartitioned'::regclass AND contype = 'f';
+
+    CREATE TABLE audit_auditlog (LIKE audit_auditlog_unpartitioned INCLUDING DEFAULTS)
+        PARTITION BY RANGE ("timestamp");
+
+    SELECT date_trunc('month', coalesce(min("timestamp"), now()) AT TIME ZONE 'UTC')::date INTO month
+    FROM audit_auditlog_unpartitioned;
+    last_month := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date;
+    WHILE month <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF audit_auditlog FOR VALUES FROM (%L) TO (%L)',
+            'audit_auditlog_' || to_char(month, 'YYYY_MM'),
+            month::timestamp AT TIME ZONE 'UTC',
+            (month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        month := (month + interval '1 month')::date;
+    END LOOP;
+
+    INSERT INTO audit_auditlog SELECT * FROM audit_auditlog_unpartitioned;
+    DROP TABLE audit_auditlog_unpartitioned;
+
+    CREATE SEQUENCE audit_auditlog_id_seq OWNED BY audit_auditlog.id;
+    PERFORM setval('audit_auditlog_id_seq', coalesce(max(id), 0) + 1, false) FROM audit_auditlog;
+    ALTER TABLE audit_auditlog ALTER COLUMN id SET DEFAULT nextval('audit_auditlog_id_seq');
+    ALTER TABLE audit_auditlog ADD PRIMARY KEY (id, "timestamp");
+
+    FOREACH statement IN ARRAY index_definitions LOOP
+        EXECUTE regexp_replace(statement, ' ON (\\S+\\.)?audit_auditlog_unpartitioned ', ' ON audit_auditlog ');
+    END LOOP;
+    FOREACH statement IN ARRAY constraint_definitions LOOP
+        EXECUTE statement;
+    END LOOP;
+END
+$$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0004_auditlog_event_timestamp'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Not reversible: the partitioned table cannot be turned back in place
+        migrations.RunSQL(PARTITION_AUDITLOG_SQL),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['tenant_id', 'module', 'timestamp'], name='audit_audit_tenant__fbe75a_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.1 on 2026-10-17 05:00
+
+import django.contrib.postgres.indexes
+import django.db.models.fields.json
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0005_partition_auditlog_by_month'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(models.F('tenant_id'), django.db.models.fields.json.KeyTransform('id', 'details'), models.F('timestamp'), name='auditlog_tenant_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['details'], name='auditlog_details_gin', opclasses=['jsonb_path_ops']),
+        ),
+    ]
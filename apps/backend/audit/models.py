@@ -1,4 +1,8 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.db.models import F
+from django.db.models.fields.json import KeyTransform
+from django.utils import timezone
 from common.models import TenantAwareModel
 
 class AuditLog(TenantAwareModel):
@@ -6,4 +10,18 @@ class AuditLog(TenantAwareModel):
     action = models.CharField(max_length=120)
     module = models.CharField(max_length=120)
     details = models.JSONField(default=dict, blank=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event is recorded, not when the buffered row is written
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant_id', '-timestamp']),
+            models.Index(fields=['tenant_id', 'module', 'timestamp']),
+            # History of one record: details__id lookups compile to (details -> 'id')
+            models.Index(
+                F('tenant_id'), KeyTransform('id', 'details'), F('timestamp'),
+                name='auditlog_tenant_object_idx',
+            ),
+            # Containment queries on any detail (details__contains)
+            GinIndex(fields=['details'], opclasses=['jsonb_path_ops'], name='auditlog_details_gin'),
+        ]
@@ -0,0 +1,161 @@
+"""
+Monthly partitions of the audit log.
+
+audit_auditlog is range-partitioned on "timestamp" (migration 0005); each UTC
+calendar month lives in its own table, audit_auditlog_YYYY_MM. Postgres
+rejects rows for a month without a partition, so ensure_partitions() creates
+them MONTHS_AHEAD in advance (audit.tasks runs it daily).
+
+Retention is applied per partition by archive_partitions(): a partition older
+than the retention period is detached from the parent, written to a
+gzip-compressed NDJSON file (one JSON object per row) and dropped. The live
+table never sees a bulk DELETE.
+"""
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AuditLog
+
+MONTHS_AHEAD = 3
+
+PARTITION_NAME = re.compile(r'^audit_auditlog_(\d{4})_(\d{2})$')
+
+# Partition tables of the audit log, with whether each is still attached
+PARTITIONS_SQL = r"""
+    SELECT child.relname, inherits.inhrelid IS NOT NULL
+    FROM pg_class AS child
+    LEFT JOIN pg_inherits AS inherits
+        ON inherits.inhrelid = child.oid AND inherits.inhparent = %s::regclass
+    WHERE child.relkind = 'r'
+      AND child.relnamespace = current_schema()::regnamespace
+      AND child.relname ~ '^audit_auditlog_[0-9]{4}_[0-9]{2}$'
+"""
+
+
+def month_start(value):
+    """First day of the UTC month containing a datetime or date"""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc).date()
+    return value.replace(day=1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{AuditLog._meta.db_table}_{month:%Y_%m}"
+
+
+def _bound(month):
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def partitions():
+    """
+    Every audit partition table, including detached ones not yet archived.
+
+    Returns:
+        dict: {month (date): attached (bool)}
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(PARTITIONS_SQL, [AuditLog._meta.db_table])
+        rows = cursor.fetchall()
+    found = {}
+    for name, attached in rows:
+        year, month = PARTITION_NAME.match(name).groups()
+        found[date(int(year), int(month), 1)] = attached
+    return found
+
+
+def ensure_partitions(ahead=MONTHS_AHEAD, now=None):
+    """
+    Create the partitions for the current month and the next `ahead` months.
+
+    Returns:
+        list: Names of the partitions created
+    """
+    current = month_start(now or timezone.now())
+    existing = partitions()
+    quote = connection.ops.quote_name
+    created = []
+    for offset in range(ahead + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        name = partition_name(month)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {quote(name)} PARTITION OF {quote(AuditLog._meta.db_table)} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [_bound(month), _bound(add_months(month, 1))],
+            )
+        created.append(name)
+    return created
+
+
+def expired_partitions(retention_months, now=None):
+    """Months of the partitions entirely older than the retention period, oldest first"""
+    cutoff = add_months(month_start(now or timezone.now()), -retention_months)
+    return sorted(month for month in partitions() if month < cutoff)
+
+
+def archive_partitions(retention_months, archive_dir, now=None):
+    """
+    Detach, archive and drop every partition older than the retention period.
+    A partition left detached by an interrupted run is archived on the next one.
+
+    Args:
+        retention_months: int - Full months kept before the current one
+        archive_dir: str - Directory the .ndjson.gz files are written to
+
+    Returns:
+        list: (partition name, archive path, rows) for each partition archived
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    quote = connection.ops.quote_name
+    attached = partitions()
+    archived = []
+    for month in expired_partitions(retention_months, now):
+        name = partition_name(month)
+        if attached[month]:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {quote(AuditLog._meta.db_table)} DETACH PARTITION {quote(name)}")
+
+        path = os.path.join(archive_dir, f"{name}.ndjson.gz")
+        rows = write_archive(name, path)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {quote(name)}")
+            expected = cursor.fetchone()[0]
+            if rows != expected:
+                raise RuntimeError(f"Archived {rows} of {expected} rows from {name}; partition kept")
+            cursor.execute(f"DROP TABLE {quote(name)}")
+        archived.append((name, path, rows))
+    return archived
+
+
+def write_archive(table, path):
+    """
+    Stream a table to a gzip-compressed NDJSON file, oldest row first.
+    The file only appears under `path` once it is complete.
+
+    Returns:
+        int: Number of rows written
+    """
+    partial = f"{path}.partial"
+    rows = 0
+    query = f'COPY (SELECT row_to_json(t) FROM {connection.ops.quote_name(table)} AS t ORDER BY "timestamp", id) TO STDOUT'
+    with connection.cursor() as cursor, gzip.open(partial, 'wt', encoding='utf-8') as archive:
+        with cursor.copy(query) as copy:
+            for (line,) in copy.rows():
+                archive.write(line)
+                archive.write('\n')
+                rows += 1
+    os.replace(partial, path)
+    return rows
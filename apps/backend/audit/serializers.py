@@ -0,0 +1,16 @@
+from rest_framework import serializers
+
+from .models import AuditLog
+
+
+class AuditLogSerializer(serializers.ModelSerializer):
+    user_email = serializers.CharField(source='user.email', read_only=True, default=None)
+    object_id = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AuditLog
+        fields = ['id', 'timestamp', 'module', 'action', 'object_id', 'user', 'user_email', 'details']
+        read_only_fields = fields
+
+    def get_object_id(self, obj):
+        return (obj.details or {}).get('id')
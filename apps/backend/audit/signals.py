@@ -1,20 +1,41 @@
-from django.db.models.signals import post_save, post_delete
+"""
+Audit trail for every tenant-scoped model.
+
+Saves and deletes of TenantAwareModel subclasses are recorded through
+audit.buffer, which writes them in bulk once the transaction commits.
+Queryset update()/bulk_create() and raw SQL bypass these signals; code using
+them records its own summary event (see inventory.importer).
+"""
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
-from django.contrib.auth import get_user_model
-from audit.models import AuditLog
-from inventory.models import Product
-
-def _log(instance, action):
-    tenant_id = getattr(instance, "tenant_id", None)
-    AuditLog.objects.create(
-        tenant_id=tenant_id, user=None, action=action, module=instance.__class__.__name__,
-        details={"id": getattr(instance,"id", None)}
-    )
-
-@receiver(post_save, sender=Product)
-def product_saved(sender, instance, created, **kwargs):
-    _log(instance, "CREATE" if created else "UPDATE")
-
-@receiver(post_delete, sender=Product)
-def product_deleted(sender, instance, **kwargs):
-    _log(instance, "DELETE")
+
+from audit.buffer import record
+from common.models import TenantAwareModel
+
+# High-volume bookkeeping tables that are themselves logs or derived state
+AUDIT_EXCLUDED_MODELS = frozenset({
+    'audit.AuditLog',
+    'common.NumberSequence',
+    'inventory.StockMovement',
+    'inventory.StockLevel',
+    'inventory.StockCheckpoint',
+    'integrations.ShopifySyncLog',
+})
+
+
+def _audited(sender):
+    return issubclass(sender, TenantAwareModel) and sender._meta.label not in AUDIT_EXCLUDED_MODELS
+
+
+@receiver(post_save)
+def model_saved(sender, instance, created, raw=False, using=None, update_fields=None, **kwargs):
+    if raw or not _audited(sender):
+        return
+    details = {'fields': sorted(update_fields)} if update_fields else None
+    record(instance, "CREATE" if created else "UPDATE", details, using=using)
+
+
+@receiver(post_delete)
+def model_deleted(sender, instance, using=None, **kwargs):
+    if _audited(sender):
+        record(instance, "DELETE", using=using)
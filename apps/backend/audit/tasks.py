@@ -0,0 +1,26 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+
+from . import partitions
+from .buffer import AUDIT_BATCH_SIZE, deserialize
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def write_audit_events(events):
+    """Write a batch of audit events handed over by audit.buffer (AUDIT_ASYNC)"""
+    AuditLog.objects.bulk_create([deserialize(event) for event in events], batch_size=AUDIT_BATCH_SIZE)
+
+
+@shared_task
+def maintain_audit_partitions():
+    """Create the coming months' audit partitions and archive those past retention"""
+    created = partitions.ensure_partitions()
+    archived = partitions.archive_partitions(settings.AUDIT_RETENTION_MONTHS, settings.AUDIT_ARCHIVE_DIR)
+    for name, path, rows in archived:
+        logger.info("Archived audit partition %s (%d rows) to %s", name, rows, path)
+    return f"Created {len(created)} audit partition(s), archived {len(archived)}"
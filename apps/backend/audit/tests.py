@@ -1,3 +1,85 @@
+from django.db import transaction
 from django.test import TestCase
 
-# Create your tests here.
+from audit.buffer import acting_as, batched
+from audit.models import AuditLog
+from tenants.models import Tenant
+from users.models import User
+from warehouse.models import Warehouse
+
+
+class AuditBufferTests(TestCase):
+    """Audit events are written once their transaction commits, and only if it does"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Audit Co", code="audit-co")
+        cls.user = User.objects.create(email="audit@example.com")
+
+    def create(self, name):
+        return Warehouse.objects.create(tenant_id=self.tenant.id, warehouse_code=name, name=name)
+
+    def logged(self):
+        return sorted(
+            AuditLog.objects.filter(tenant_id=self.tenant.id, module='Warehouse')
+            .values_list('details__id', flat=True)
+        )
+
+    def test_written_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            warehouses = [self.create(f"WH-{i}") for i in range(3)]
+            self.assertEqual(self.logged(), [])
+
+        self.assertEqual(self.logged(), sorted(warehouse.pk for warehouse in warehouses))
+
+    def test_rolled_back_savepoint_drops_its_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            kept = self.create("WH-KEPT")
+            try:
+                with transaction.atomic():
+                    self.create("WH-DROPPED")
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            later = self.create("WH-LATER")
+
+        self.assertEqual(self.logged(), sorted([kept.pk, later.pk]))
+
+    def test_released_savepoint_keeps_its_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            kept = self.create("WH-KEPT")
+            with transaction.atomic():
+                inner = self.create("WH-INNER")
+
+        self.assertEqual(self.logged(), sorted([kept.pk, inner.pk]))
+
+    def test_acting_user(self):
+        with self.captureOnCommitCallbacks(execute=True), acting_as(self.user):
+            self.create("WH-1")
+
+        self.assertEqual(AuditLog.objects.get(tenant_id=self.tenant.id, module='Warehouse').user_id, self.user.pk)
+
+    def test_batched_holds_committed_events_until_the_outer_block_exits(self):
+        held = []
+
+        @batched()
+        def sync(*names):
+            for name in names:
+                # One committed transaction per record, as the Shopify sync does
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.create(name)
+            held.append(len(self.logged()))
+
+        @batched()
+        def sync_all():
+            sync("WH-1", "WH-2")
+            sync("WH-3")
+
+        sync_all()
+        self.assertEqual(held, [0, 0])
+        self.assertEqual(len(self.logged()), 3)
+
+        # The decorated function flushes on every call, not just the first
+        sync("WH-4")
+        self.assertEqual(held[-1], 3)
+        self.assertEqual(len(self.logged()), 4)
@@ -1,14 +1,11 @@
-from django.urls import path
-from rest_framework import generics, permissions
-from .models import AuditLog
-from rest_framework.serializers import ModelSerializer
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from .views import AuditLogViewSet
 
-class AuditLogSerializer(ModelSerializer):
-    class Meta: model = AuditLog; fields = "__all__"
+# No API root view: the list is served at the prefix itself
+router = SimpleRouter()
+router.register(r'', AuditLogViewSet, basename='audit-log')
 
-class ListAudit(generics.ListAPIView):
-    serializer_class = AuditLogSerializer
-    permission_classes = [permissions.IsAuthenticated]
-    def get_queryset(self): return AuditLog.objects.filter(tenant=self.request.tenant).order_by("-timestamp")
-
-urlpatterns = [path("", ListAudit.as_view())]
+urlpatterns = [
+    path('', include(router.urls)),
+]
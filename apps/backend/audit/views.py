@@ -1,3 +1,32 @@
-from django.shortcuts import render
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import permissions, viewsets
 
-# Create your views here.
+from common.mixins import TenantScopedMixin
+from common.pagination import TimelineCursorPagination
+
+from .filters import AuditLogFilter
+from .models import AuditLog
+from .serializers import AuditLogSerializer
+
+
+class AuditLogViewSet(TenantScopedMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for the tenant's audit trail (read-only).
+
+    list: Get audit events, newest first (cursor-paginated). Filter by
+        module, action, user, object_id (the audited record's ID) and a
+        since/until time range, e.g.
+        ?module=Product&object_id=123&since=2026-01-01T00:00:00Z
+    retrieve: Get single audit event
+    """
+    queryset = AuditLog.objects.all()
+    serializer_class = AuditLogSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = AuditLogFilter
+    # Keyset pages on the (tenant_id, ..., timestamp) indexes; no COUNT(*) or OFFSET
+    pagination_class = TimelineCursorPagination
+    ordering = ['-timestamp', '-id']
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('user')
@@ -46,6 +46,31 @@ app.conf.beat_schedule = {
         'task': 'notifications.tasks.cleanup_old_notifications',
         'schedule': crontab(day_of_week=1, hour=0, minute=0),
     },
+    # Copy native sequence values back for display; also restarts sequences idle since a period change
+    'maintain-native-number-sequences': {
+        'task': 'common.tasks.maintain_native_sequences',
+        'schedule': crontab(minute=0),
+    },
+    # Precompute the cross-tenant admin overview
+    'refresh-admin-overview-snapshot': {
+        'task': 'api.tasks.refresh_admin_overview_snapshot',
+        'schedule': crontab(minute='*/5'),
+    },
+    # Checkpoint yesterday's stock balances once its movements have settled
+    'write-stock-checkpoints': {
+        'task': 'inventory.tasks.write_stock_checkpoints',
+        'schedule': crontab(hour=0, minute=30),
+    },
+    # Check stock checkpoints against a full movement replay weekly
+    'verify-stock-checkpoints': {
+        'task': 'inventory.tasks.verify_stock_checkpoints',
+        'schedule': crontab(day_of_week=0, hour=2, minute=0),
+    },
+    # Create upcoming audit log partitions and archive expired ones
+    'maintain-audit-partitions': {
+        'task': 'audit.tasks.maintain_audit_partitions',
+        'schedule': crontab(hour=1, minute=0),
+    },
     # Shopify periodic syncs
     'shopify-sync-products': {
         'task': 'shopify_integration.tasks.periodic_sync.sync_shopify_products_periodic',
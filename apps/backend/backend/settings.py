@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -83,6 +84,9 @@ MIDDLEWARE = [
     
     # Multi-tenant middleware - extracts tenant from request headers
     'tenants.middleware.TenantMiddleware',
+
+    # Attributes buffered audit events (audit.buffer) to the requesting user
+    'audit.middleware.AuditContextMiddleware',
     
     # Industry-aware middleware - validates requests and filters responses by industry
     'common.industry_middleware.IndustryAwareMiddleware',
@@ -124,6 +128,36 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared across processes through Redis when REDIS_URL is set, otherwise per-process memory
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Audit trail
+# Buffered events are written inline on commit, or by the Celery worker when AUDIT_ASYNC=1
+
+AUDIT_ASYNC = os.getenv('AUDIT_ASYNC', '0') == '1'
+
+# Monthly audit partitions older than this many months are archived and dropped (audit.partitions)
+AUDIT_RETENTION_MONTHS = int(os.getenv('AUDIT_RETENTION_MONTHS', '12'))
+AUDIT_ARCHIVE_DIR = os.getenv('AUDIT_ARCHIVE_DIR', str(BASE_DIR / 'archive' / 'audit'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
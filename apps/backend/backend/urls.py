@@ -27,6 +27,7 @@ urlpatterns = [
     path('api/procurement/', include('procurement.urls')),
     path('api/warehouse/', include('warehouse.urls')),
     path('api/finance/', include('finance.urls')),
+    path('api/audit/', include('audit.urls')),
     path('api/pharma/', include('pharma.urls')),  # Pharmaceutical inventory
     path('api/shopify/', include('shopify_integration.urls')),
     path('api/integrations/', include('integrations.urls')),  # Integrations (Stripe, Email, etc.)
@@ -3,6 +3,7 @@ Industry-Aware Middleware
 Adapts API behavior based on tenant's industry at runtime.
 """
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import JsonResponse
 from django.core.exceptions import ValidationError
 from rest_framework.exceptions import ValidationError as DRFValidationError
@@ -14,41 +15,79 @@ import json
 class IndustryAwareMiddleware:
     """
     Middleware that validates requests and filters responses based on tenant's industry.
+    
+    Runs natively under both WSGI and ASGI; in an async stack the user is
+    loaded with request.auser() so neither hook needs a thread hop.
     """
     
+    sync_capable = True
+    async_capable = True
+    
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+            # Django adapts hooks to the stack's mode, so expose the async variant
+            self.process_view = self.aprocess_view
     
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
         # Add industry context to request
-        if hasattr(request, 'user') and hasattr(request.user, 'tenant'):
-            tenant = request.user.tenant
-            request.industry = tenant.industry if tenant else 'general'
-        else:
-            request.industry = 'general'
+        request.industry = self._get_industry(request.user if hasattr(request, 'user') else None)
         
         # Process request
         response = self.get_response(request)
         
         return response
     
+    async def __acall__(self, request):
+        user = await request.auser() if hasattr(request, 'auser') else None
+        request.industry = self._get_industry(user)
+        return await self.get_response(request)
+    
+    def _get_industry(self, user):
+        if user is not None and hasattr(user, 'tenant'):
+            tenant = user.tenant
+            return tenant.industry if tenant else 'general'
+        return 'general'
+    
     def process_view(self, request, view_func, view_args, view_kwargs):
         """
         Process view before it's executed.
         Validate incoming data against industry schema.
         """
-        # Skip for non-API requests
-        if not request.path.startswith('/api/'):
-            return None
-        
-        # Skip for GET, DELETE requests (no body validation needed)
-        if request.method in ['GET', 'DELETE', 'HEAD', 'OPTIONS']:
+        # Skip non-API requests and requests without a body to validate
+        if not self._needs_validation(request):
             return None
         
         # Skip if user not authenticated
         if not hasattr(request, 'user') or not request.user.is_authenticated:
             return None
         
+        return self._validate_request(request)
+    
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        """Async version of process_view()"""
+        if not self._needs_validation(request):
+            return None
+        
+        user = await request.auser() if hasattr(request, 'auser') else None
+        if user is None or not user.is_authenticated:
+            return None
+        
+        return self._validate_request(request)
+    
+    def _needs_validation(self, request):
+        # Skip for non-API requests
+        if not request.path.startswith('/api/'):
+            return False
+        
+        # Skip for GET, DELETE requests (no body validation needed)
+        return request.method not in ['GET', 'DELETE', 'HEAD', 'OPTIONS']
+    
+    def _validate_request(self, request):
         # Get tenant industry
         industry = getattr(request, 'industry', 'general')
         
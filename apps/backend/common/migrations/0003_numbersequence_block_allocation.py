@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='numbersequence',
+            name='allow_gaps',
+            field=models.BooleanField(default=False, help_text='Allow gaps in the sequence so numbers can be reserved in blocks'),
+        ),
+        migrations.AddField(
+            model_name='numbersequence',
+            name='block_size',
+            field=models.PositiveIntegerField(default=1, help_text='Numbers reserved per process at a time when gaps are allowed'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_numbersequence_block_allocation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='numbersequence',
+            name='backend',
+            field=models.CharField(choices=[('table', 'Counter row'), ('native', 'PostgreSQL sequence')], default='table', help_text='Counter row (gap-free) or PostgreSQL sequence (requires gaps to be allowed)', max_length=10),
+        ),
+    ]
@@ -1,9 +1,16 @@
 """
 Common mixins for ViewSets and API views
 """
+import csv
+import json
 
-from rest_framework import viewsets
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
 
 
 class TenantScopedMixin:
@@ -32,3 +39,79 @@ class TenantScopedMixin:
         """Automatically set updated_by when updating objects"""
         serializer.save(updated_by=self.request.user)
 
+
+class _Echo:
+    """File-like object whose write() returns the line instead of storing it"""
+    
+    def write(self, value):
+        return value
+
+
+class StreamingExportMixin:
+    """
+    Adds a GET `export/` action streaming the filtered list as CSV or NDJSON.
+    
+    The queryset goes through the ViewSet's filter backends (filterset, search,
+    ordering) and is read with a server-side cursor over values_list(), so
+    memory use stays flat however many rows are exported.
+    
+    Query params:
+        export_format: csv (default) or ndjson
+    
+    Set `export_fields` to (column, lookup) pairs, e.g. ('supplier_code', 'supplier__supplier_code').
+    """
+    export_fields = ()
+    export_filename = 'export'
+    export_chunk_size = 2000
+    
+    EXPORT_CONTENT_TYPES = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+    
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def export(self, request):
+        """Stream every row matching the list filters as CSV or NDJSON"""
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in self.EXPORT_CONTENT_TYPES:
+            return Response(
+                {"error": f"export_format must be one of: {', '.join(self.EXPORT_CONTENT_TYPES)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        columns = [column for column, _ in self.export_fields]
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list(*[lookup for _, lookup in self.export_fields]).iterator(
+            chunk_size=self.export_chunk_size
+        )
+        lines = self._csv_lines(columns, rows) if export_format == 'csv' else self._ndjson_lines(columns, rows)
+        
+        response = StreamingHttpResponse(
+            self._batched(lines), content_type=self.EXPORT_CONTENT_TYPES[export_format]
+        )
+        filename = f"{self.export_filename}-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    def _csv_lines(self, columns, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow(
+                value.isoformat() if hasattr(value, 'isoformat') else value for value in row
+            )
+    
+    def _ndjson_lines(self, columns, rows):
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+    
+    def _batched(self, lines):
+        # One write per chunk of rows rather than per row
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= self.export_chunk_size:
+                yield ''.join(batch)
+                batch = []
+        if batch:
+            yield ''.join(batch)
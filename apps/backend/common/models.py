@@ -60,6 +60,13 @@ class NumberSequence(TenantAwareModel):
         ('customer', 'Customer'),
     ]
     
+    BACKEND_TABLE = 'table'
+    BACKEND_NATIVE = 'native'
+    BACKEND_CHOICES = [
+        (BACKEND_TABLE, 'Counter row'),
+        (BACKEND_NATIVE, 'PostgreSQL sequence'),
+    ]
+    
     # tenant field is inherited from TenantAwareModel as tenant_id
     entity_type = models.CharField(max_length=50, choices=ENTITY_CHOICES)
     
@@ -75,6 +82,27 @@ class NumberSequence(TenantAwareModel):
     reset_on_year = models.BooleanField(default=False)
     reset_on_month = models.BooleanField(default=False)
     
+    # Block allocation (hi/lo): each process reserves `block_size` numbers at once.
+    # Only honoured when gaps are allowed, since unused numbers in a block are lost
+    # when the process exits.
+    allow_gaps = models.BooleanField(
+        default=False,
+        help_text="Allow gaps in the sequence so numbers can be reserved in blocks"
+    )
+    block_size = models.PositiveIntegerField(
+        default=1,
+        help_text="Numbers reserved per process at a time when gaps are allowed"
+    )
+    
+    # Where sequence values come from. The native backend draws values with nextval()
+    # and never locks this row; year/month resets restart the PostgreSQL sequence.
+    backend = models.CharField(
+        max_length=10,
+        choices=BACKEND_CHOICES,
+        default=BACKEND_TABLE,
+        help_text="Counter row (gap-free) or PostgreSQL sequence (requires gaps to be allowed)"
+    )
+    
     # Tracking last reset to determine when to reset
     last_reset_year = models.IntegerField(null=True, blank=True)
     last_reset_month = models.IntegerField(null=True, blank=True)
@@ -88,17 +116,44 @@ class NumberSequence(TenantAwareModel):
         verbose_name_plural = 'Number Sequences'
     
     def __str__(self):
+        from tenants.cache import get_tenant
         from tenants.models import Tenant
         try:
-            tenant = Tenant.objects.get(id=self.tenant_id)
+            tenant = get_tenant(self.tenant_id)
             return f"{tenant.name} - {self.entity_type}: {self.sample_format}"
         except Tenant.DoesNotExist:
             return f"Tenant {self.tenant_id} - {self.entity_type}: {self.sample_format}"
     
+    def clean(self):
+        from django.core.exceptions import ValidationError
+        if self.backend == self.BACKEND_NATIVE and not self.allow_gaps:
+            raise ValidationError({'backend': 'PostgreSQL sequences can leave gaps; enable allow_gaps first.'})
+    
+    @property
+    def native_sequence_name(self):
+        """Name of the PostgreSQL sequence backing this configuration"""
+        return f"{self._meta.db_table}_{self.pk}"
+    
     def save(self, *args, **kwargs):
         # Auto-generate sample format on save
         self.sample_format = self.generate_sample()
+        
+        # Switching backends: each one continues after the last value the other handed out
+        previous = None
+        if self.pk:
+            previous = type(self).objects.filter(pk=self.pk).values_list('backend', flat=True).first()
+        from common import sequences
+        if previous == self.BACKEND_NATIVE and self.backend == self.BACKEND_TABLE:
+            self.current_sequence = max(self.current_sequence, sequences.current_value(self))
+        
         super().save(*args, **kwargs)
+        
+        if previous == self.BACKEND_TABLE and self.backend == self.BACKEND_NATIVE:
+            sequences.resume_from_counter(self)
+        
+        # Drop this process's cached blocks/configs so the new settings apply immediately
+        from common.utils import discard_reserved_numbers
+        discard_reserved_numbers(self.tenant_id, self.entity_type)
     
     def generate_sample(self):
         """Generate sample format string for preview"""
@@ -135,7 +190,23 @@ class NumberSequence(TenantAwareModel):
         # Increment sequence
         self.current_sequence += 1
         
-        # Build the formatted number
+        # Save the updated sequence
+        self.save()
+        
+        return self.format_number(self.current_sequence, now)
+    
+    def format_number(self, value, now=None):
+        """
+        Format a raw sequence value using this sequence's configuration.
+        
+        Args:
+            value: int - Sequence value to format
+            now: datetime - Date used for the year/month parts (default: now)
+        
+        Returns:
+            str: Formatted number like "PRD-001" or "PO-2024-001"
+        """
+        now = now or datetime.now()
         parts = [self.prefix]
         
         if self.include_year:
@@ -144,9 +215,6 @@ class NumberSequence(TenantAwareModel):
             parts.append(str(now.month).zfill(2))
         
         # Add padded sequence number
-        parts.append(str(self.current_sequence).zfill(self.padding))
-        
-        # Save the updated sequence
-        self.save()
+        parts.append(str(value).zfill(self.padding))
         
         return self.separator.join(parts)
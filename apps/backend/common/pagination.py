@@ -0,0 +1,22 @@
+"""
+Pagination classes shared across apps
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class TimelineCursorPagination(CursorPagination):
+    """
+    Keyset pagination for append-only, time-ordered feeds (stock movements,
+    audit log, dispensing records).
+    
+    Pages are fetched with `WHERE <timestamp> < <cursor>` on the view's
+    ordering instead of COUNT(*) and OFFSET, so a deep page costs the same as
+    the first. Views set `ordering` to the timestamp field, newest first, with
+    `-id` as a tiebreaker for rows sharing a timestamp. Responses carry
+    `next`/`previous` cursor links and no total count.
+    """
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = settings.REST_FRAMEWORK.get('MAX_PAGE_SIZE', 100)
+    ordering = ('-timestamp', '-id')
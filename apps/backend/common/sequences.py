@@ -0,0 +1,213 @@
+"""
+PostgreSQL SEQUENCE backend for NumberSequence.
+
+Sequences using the native backend draw values with nextval(), which never
+waits on the NumberSequence row. nextval() is not rolled back with the
+surrounding transaction, so the backend is only offered to sequences that
+allow gaps. Year/month resets are checked against the cached config before
+every draw and applied by the first caller of a new period, under an advisory
+lock; the maintain_native_sequences task also applies them and copies the
+current values back to the NumberSequence rows.
+"""
+import threading
+import time
+
+from django.db import connection, transaction
+
+# Seconds a process trusts its cached copy of a native sequence's format
+CONFIG_TTL = 60
+
+# Native sequence configs cached by this process, keyed by (tenant_id, entity_type)
+_configs = {}
+# Names of PostgreSQL sequences this process has already created or seen
+_created = set()
+_lock = threading.Lock()
+
+
+def get_cached(key):
+    """Return the cached native NumberSequence for a key, or None if unknown or expired"""
+    with _lock:
+        entry = _configs.get(key)
+    if entry and entry[1] > time.monotonic():
+        return entry[0]
+    return None
+
+
+def remember(key, sequence, now):
+    """Make sure the PostgreSQL sequence exists and cache its config for this process"""
+    ensure_sequence(sequence, now)
+    with _lock:
+        _configs[key] = (sequence, time.monotonic() + CONFIG_TTL)
+
+
+def forget(tenant_id=None, entity_type=None):
+    """Drop cached configs so the next call reloads them from the database"""
+    with _lock:
+        for key in list(_configs):
+            if tenant_id is not None and key[0] != tenant_id:
+                continue
+            if entity_type is not None and key[1] != entity_type:
+                continue
+            del _configs[key]
+
+
+def ensure_sequence(sequence, now):
+    """
+    Lazily create the PostgreSQL sequence backing a NumberSequence.
+    It starts after the row's current value so switching backends never reuses a number.
+    """
+    from common.models import NumberSequence
+
+    name = sequence.native_sequence_name
+    if name in _created:
+        return
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE SEQUENCE IF NOT EXISTS {connection.ops.quote_name(name)} "
+                f"START WITH {int(sequence.current_sequence) + 1}"
+            )
+
+        # Resets count from the period the sequence was created in
+        rows = NumberSequence.objects.filter(pk=sequence.pk)
+        if sequence.reset_on_year and sequence.last_reset_year is None:
+            rows.filter(last_reset_year__isnull=True).update(last_reset_year=now.year)
+            sequence.last_reset_year = now.year
+        if sequence.reset_on_month and sequence.last_reset_month is None:
+            rows.filter(last_reset_month__isnull=True).update(last_reset_month=now.month)
+            sequence.last_reset_month = now.month
+
+        transaction.on_commit(lambda: _created.add(name))
+
+
+def next_value(sequence, now):
+    """Draw one value from the PostgreSQL sequence, restarting it first if a new period began"""
+    reset_if_due(sequence, now)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s)", [sequence.native_sequence_name])
+        return cursor.fetchone()[0]
+
+
+def next_values(sequence, count, now):
+    """Draw `count` values from the PostgreSQL sequence in one statement"""
+    reset_if_due(sequence, now)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(%s) FROM generate_series(1, %s)",
+            [sequence.native_sequence_name, count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def exists(sequence):
+    """Whether the PostgreSQL sequence has been created (it is only created on first use)"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [connection.ops.quote_name(sequence.native_sequence_name)])
+        return cursor.fetchone()[0]
+
+
+def current_value(sequence):
+    """
+    Return the last value handed out by the PostgreSQL sequence.
+    Until the sequence is created, the row's current_sequence is still current.
+    """
+    if not exists(sequence):
+        return sequence.current_sequence
+    name = connection.ops.quote_name(sequence.native_sequence_name)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT last_value, is_called FROM {name}")
+        last_value, is_called = cursor.fetchone()
+    return last_value if is_called else last_value - 1
+
+
+def resume_from_counter(sequence):
+    """
+    Moving back to the native backend: continue after the row's current_sequence.
+    A sequence left over from an earlier native period would otherwise resume at
+    its old value and reissue numbers the counter row has handed out since.
+    """
+    _created.discard(sequence.native_sequence_name)
+    if exists(sequence):
+        restart(sequence, sequence.current_sequence)
+
+
+def restart(sequence, value=0):
+    """Restart the PostgreSQL sequence so the next number is value + 1"""
+    name = connection.ops.quote_name(sequence.native_sequence_name)
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER SEQUENCE {name} RESTART WITH {int(value) + 1}")
+
+
+def is_reset_due(sequence, now):
+    """Same reset rules the counter-row backend applies on every call"""
+    if sequence.reset_on_year and sequence.last_reset_year != now.year:
+        return True
+    if sequence.reset_on_month and sequence.last_reset_month != now.month:
+        return True
+    return False
+
+
+def reset_if_due(sequence, now):
+    """
+    Restart the PostgreSQL sequence if the configuration entered a new year/month.
+
+    Runs before every draw so a value is never formatted with the new period
+    while the counter still runs on from the old one. The row is re-read under
+    an advisory lock, so only the first caller of a period restarts the sequence.
+
+    Returns:
+        bool: True if this call restarted the sequence
+    """
+    from common.models import NumberSequence
+
+    if not is_reset_due(sequence, now):
+        return False
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [sequence.native_sequence_name])
+        stored = NumberSequence.objects.get(pk=sequence.pk)
+        restarted = is_reset_due(stored, now)
+        if restarted:
+            restart(sequence)
+            if stored.reset_on_year:
+                stored.last_reset_year = now.year
+            if stored.reset_on_month:
+                stored.last_reset_month = now.month
+            NumberSequence.objects.filter(pk=sequence.pk).update(
+                current_sequence=0,
+                last_reset_year=stored.last_reset_year,
+                last_reset_month=stored.last_reset_month,
+            )
+
+        # `sequence` may be a cached config; it only moves to the new period once that has committed
+        def adopt_period():
+            sequence.last_reset_year = stored.last_reset_year
+            sequence.last_reset_month = stored.last_reset_month
+
+        transaction.on_commit(adopt_period)
+    return restarted
+
+
+def maintain_sequences(now):
+    """
+    Restart native sequences that entered a new year/month and copy the current
+    value of the others back to NumberSequence.current_sequence for display.
+
+    Returns:
+        dict: Number of sequences restarted and synced
+    """
+    from common.models import NumberSequence
+
+    restarted = synced = 0
+    for sequence in NumberSequence.objects.filter(backend=NumberSequence.BACKEND_NATIVE):
+        ensure_sequence(sequence, now)
+
+        if reset_if_due(sequence, now):
+            restarted += 1
+        else:
+            NumberSequence.objects.filter(pk=sequence.pk).update(current_sequence=current_value(sequence))
+            synced += 1
+
+    return {'restarted': restarted, 'synced': synced}
@@ -10,7 +10,15 @@ class NumberSequenceSerializer(serializers.ModelSerializer):
         fields = [
             "id", "entity_type", "prefix", "include_year", "include_month",
             "separator", "padding", "current_sequence", "reset_on_year",
-            "reset_on_month", "sample_format", "created_at", "updated_at"
+            "reset_on_month", "allow_gaps", "block_size", "backend", "sample_format",
+            "created_at", "updated_at"
         ]
         read_only_fields = ["id", "current_sequence", "sample_format", "created_at", "updated_at"]
+    
+    def validate(self, data):
+        backend = data.get('backend', getattr(self.instance, 'backend', NumberSequence.BACKEND_TABLE))
+        allow_gaps = data.get('allow_gaps', getattr(self.instance, 'allow_gaps', False))
+        if backend == NumberSequence.BACKEND_NATIVE and not allow_gaps:
+            raise serializers.ValidationError("PostgreSQL sequences can leave gaps; enable allow_gaps first")
+        return data
 
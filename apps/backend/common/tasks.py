@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from celery import shared_task
+
+from common import sequences
+
+
+@shared_task
+def maintain_native_sequences():
+    """Apply year/month resets to native number sequences and record their current values"""
+    result = sequences.maintain_sequences(datetime.now())
+    return f"Restarted {result['restarted']} and synced {result['synced']} native number sequences"
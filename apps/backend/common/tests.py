@@ -1,3 +1,54 @@
+from datetime import datetime
+
 from django.test import TestCase
 
-# Create your tests here.
+from common.models import NumberSequence
+from common.utils import get_next_number
+from tenants.models import Tenant
+
+
+class NativeSequenceTests(TestCase):
+    """Numbers stay unique across backend switches and period resets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Numbering Co", code="numbering-co")
+
+    def setUp(self):
+        self.sequence = NumberSequence.objects.create(
+            tenant_id=self.tenant.id, entity_type='product', prefix='PRD',
+            allow_gaps=True, backend=NumberSequence.BACKEND_NATIVE,
+        )
+
+    def next_number(self):
+        return get_next_number(self.tenant.id, 'product')
+
+    def switch(self, backend):
+        sequence = NumberSequence.objects.get(pk=self.sequence.pk)
+        sequence.backend = backend
+        sequence.save()
+
+    def test_switch_to_table_before_any_draw(self):
+        self.switch(NumberSequence.BACKEND_TABLE)
+
+        self.assertEqual(self.next_number(), "PRD-001")
+
+    def test_native_table_native(self):
+        self.assertEqual([self.next_number(), self.next_number()], ["PRD-001", "PRD-002"])
+
+        self.switch(NumberSequence.BACKEND_TABLE)
+        self.assertEqual(self.next_number(), "PRD-003")
+
+        # The PostgreSQL sequence still exists and must not resume at 3
+        self.switch(NumberSequence.BACKEND_NATIVE)
+        self.assertEqual(self.next_number(), "PRD-004")
+
+    def test_rollover_restarts_on_first_draw(self):
+        year = datetime.now().year
+        NumberSequence.objects.filter(pk=self.sequence.pk).update(
+            include_year=True, reset_on_year=True, last_reset_year=year - 1, current_sequence=500,
+        )
+
+        self.assertEqual([self.next_number(), self.next_number()], [f"PRD-{year}-001", f"PRD-{year}-002"])
+        self.sequence.refresh_from_db()
+        self.assertEqual(self.sequence.last_reset_year, year)
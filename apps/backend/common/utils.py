@@ -1,50 +1,215 @@
 """
 Utility functions for common operations across the application.
 """
-from django.db import transaction
+import threading
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from common import sequences as native_sequences
+
+
+# Entity types whose new sequences default to a native PostgreSQL sequence.
+# These are high-volume records where a gap in the numbering is acceptable.
+NATIVE_SEQUENCE_ENTITIES = {'dispensing'}
+
+# Blocks of sequence values reserved by this process, keyed by (tenant_id, entity_type)
+_number_blocks = {}
+_number_blocks_lock = threading.Lock()
+
+# Reserves a range of values, applying year/month resets in the same statement.
+# Every SET expression sees the pre-update row, so the reset checks stay consistent.
+RESERVE_NUMBERS_SQL = """
+    UPDATE {table} SET
+        current_sequence = CASE
+            WHEN (reset_on_year AND last_reset_year IS DISTINCT FROM %(year)s)
+              OR (reset_on_month AND last_reset_month IS DISTINCT FROM %(month)s)
+            THEN 0 ELSE current_sequence
+        END + CASE
+            WHEN %(count)s::integer IS NOT NULL THEN %(count)s::integer
+            WHEN allow_gaps AND block_size > 1 THEN block_size
+            ELSE 1
+        END,
+        last_reset_year = CASE
+            WHEN reset_on_year AND last_reset_year IS DISTINCT FROM %(year)s
+            THEN %(year)s ELSE last_reset_year
+        END,
+        last_reset_month = CASE
+            WHEN reset_on_month AND last_reset_month IS DISTINCT FROM %(month)s
+            THEN %(month)s ELSE last_reset_month
+        END,
+        updated_at = %(updated_at)s
+    WHERE tenant_id = %(tenant_id)s AND entity_type = %(entity_type)s AND backend = 'table'
+    RETURNING *
+"""
+
+
+class _NumberBlock:
+    """
+    A contiguous range of sequence values reserved by this process.
+    Keeps the sequence it was reserved from so numbers can be formatted without a query.
+    """
+    
+    def __init__(self, sequence, next_value, last_value, period):
+        self.sequence = sequence
+        self.next_value = next_value
+        self.last_value = last_value
+        self.period = period
+    
+    def take(self, period):
+        """Return the next value, or None if the block is used up or from another period"""
+        if self.period != period or self.next_value > self.last_value:
+            return None
+        value = self.next_value
+        self.next_value += 1
+        return value
+
+
+def _tenant_id(tenant):
+    """
+    Normalise a Tenant instance or bare tenant ID to the value stored in NumberSequence.tenant_id,
+    so numbering never needs to load the Tenant row.
+    """
+    from common.models import NumberSequence
+    tenant_id = getattr(tenant, 'pk', tenant)
+    return NumberSequence._meta.get_field('tenant_id').to_python(tenant_id)
 
 
 def get_next_number(tenant, entity_type):
     """
     Get next auto-generated number for entity type.
-    Thread-safe implementation using select_for_update.
+    
+    Sequences configured with allow_gaps reserve block_size numbers per process
+    in one locked UPDATE and hand them out from memory. Sequences using the
+    native backend draw from a PostgreSQL SEQUENCE and take no row lock at all.
+    All other sequences reserve a single number per call, so their numbering
+    stays gap-free.
     
     Args:
-        tenant: Tenant instance
+        tenant: Tenant instance or tenant ID
         entity_type: str - 'product', 'order', 'purchase_order', etc.
     
     Returns:
         str: Formatted number like "PRD-001" or "PO-2024-001"
     
     Example:
-        >>> tenant = Tenant.objects.get(id=1)
-        >>> number = get_next_number(tenant, 'product')
+        >>> number = get_next_number(product.tenant_id, 'product')
         >>> print(number)  # "PRD-001"
     """
+    tenant_id = _tenant_id(tenant)
+    key = (tenant_id, entity_type)
+    now = datetime.now()
+    period = (now.year, now.month)
+    
+    sequence = native_sequences.get_cached(key)
+    if sequence is not None:
+        return sequence.format_number(native_sequences.next_value(sequence, now), now)
+    
+    with _number_blocks_lock:
+        block = _number_blocks.get(key)
+        value = block.take(period) if block else None
+    
+    if value is None:
+        sequence, first_value, last_value = _reserve_numbers(tenant_id, entity_type, now)
+        if sequence.backend == sequence.BACKEND_NATIVE:
+            native_sequences.remember(key, sequence, now)
+            return sequence.format_number(native_sequences.next_value(sequence, now), now)
+        
+        block = _NumberBlock(sequence, first_value + 1, last_value, period)
+        value = first_value
+        
+        if sequence.allow_gaps and first_value < last_value:
+            # Share the rest of the block only once the reservation has committed,
+            # otherwise a rollback would leave us handing out unreserved numbers
+            transaction.on_commit(lambda: _install_block(key, block))
+    
+    return block.sequence.format_number(value, now)
+
+
+def _install_block(key, block):
+    """Make a committed block available to every thread in this process"""
+    with _number_blocks_lock:
+        _number_blocks[key] = block
+
+
+def _reserve_numbers(tenant_id, entity_type, now, count=None):
+    """
+    Reserve the next range of values for a sequence in one UPDATE ... RETURNING.
+    
+    Year/month resets are applied in the same statement. Without an explicit
+    count the range is block_size values long when the sequence allows gaps and
+    a single value otherwise.
+    
+    Args:
+        tenant_id: Tenant ID
+        entity_type: str - Entity type identifier
+        now: datetime - Date used for year/month resets
+        count: int - Exact number of values to reserve (default: per sequence config)
+    
+    Returns:
+        tuple: (NumberSequence, first_value, last_value); the range is
+        (None, None) when the sequence uses the native backend
+    """
     from common.models import NumberSequence
     
+    sql = RESERVE_NUMBERS_SQL.format(table=NumberSequence._meta.db_table)
+    params = {
+        'count': count,
+        'year': now.year,
+        'month': now.month,
+        'updated_at': timezone.now(),
+        'tenant_id': NumberSequence._meta.get_field('tenant_id').get_db_prep_value(tenant_id, connection),
+        'entity_type': entity_type,
+    }
+    
     with transaction.atomic():
-        # Get or create number sequence config for this tenant and entity
-        # Use select_for_update to prevent race conditions
-        sequence, created = NumberSequence.objects.select_for_update().get_or_create(
-            tenant_id=tenant.id,
-            entity_type=entity_type,
-            defaults={
-                'prefix': get_default_prefix(entity_type),
-                'padding': 3,
-                'separator': '-',
-            }
-        )
-        
-        # If we just created it, lock it anyway for consistency
-        if not created:
-            sequence = NumberSequence.objects.select_for_update().get(
-                tenant_id=tenant.id,
-                entity_type=entity_type
+        rows = list(NumberSequence.objects.raw(sql, params))
+        if not rows:
+            # Either a native sequence or the first number for this tenant/entity
+            native = entity_type in NATIVE_SEQUENCE_ENTITIES
+            sequence, created = NumberSequence.objects.get_or_create(
+                tenant_id=tenant_id,
+                entity_type=entity_type,
+                defaults={
+                    'prefix': get_default_prefix(entity_type),
+                    'padding': 3,
+                    'separator': '-',
+                    'allow_gaps': native,
+                    'backend': NumberSequence.BACKEND_NATIVE if native else NumberSequence.BACKEND_TABLE,
+                }
             )
-        
-        # Generate and return the next number
-        return sequence.get_next_number()
+            if sequence.backend == NumberSequence.BACKEND_NATIVE:
+                return sequence, None, None
+            rows = list(NumberSequence.objects.raw(sql, params))
+    
+    sequence = rows[0]
+    if count is None:
+        count = sequence.block_size if sequence.allow_gaps and sequence.block_size > 1 else 1
+    return sequence, sequence.current_sequence - count + 1, sequence.current_sequence
+
+
+def discard_reserved_numbers(tenant_id=None, entity_type=None):
+    """
+    Drop blocks of numbers reserved by this process.
+    Call after changing a sequence so the next number reflects the new state.
+    
+    Args:
+        tenant_id: Only drop blocks for this tenant or tenant ID (default: all tenants)
+        entity_type: Only drop blocks for this entity type (default: all types)
+    """
+    if tenant_id is not None:
+        tenant_id = _tenant_id(tenant_id)
+    
+    with _number_blocks_lock:
+        for key in list(_number_blocks):
+            if tenant_id is not None and key[0] != tenant_id:
+                continue
+            if entity_type is not None and key[1] != entity_type:
+                continue
+            del _number_blocks[key]
+    
+    native_sequences.forget(tenant_id, entity_type)
 
 
 def get_default_prefix(entity_type):
@@ -76,7 +241,7 @@ def reset_sequence(tenant, entity_type, new_value=0):
     Useful for data migrations or corrections.
     
     Args:
-        tenant: Tenant instance
+        tenant: Tenant instance or tenant ID
         entity_type: str - Entity type identifier
         new_value: int - Value to reset to (default: 0)
     
@@ -87,29 +252,51 @@ def reset_sequence(tenant, entity_type, new_value=0):
     
     with transaction.atomic():
         sequence = NumberSequence.objects.select_for_update().get(
-            tenant_id=tenant.id,
+            tenant_id=_tenant_id(tenant),
             entity_type=entity_type
         )
         sequence.current_sequence = new_value
         sequence.save()
-        return sequence
+        
+        if sequence.backend == sequence.BACKEND_NATIVE:
+            native_sequences.ensure_sequence(sequence, datetime.now())
+            native_sequences.restart(sequence, new_value)
+    
+    discard_reserved_numbers(tenant, entity_type)
+    return sequence
 
 
 def bulk_generate_numbers(tenant, entity_type, count):
     """
     Generate multiple numbers at once.
-    Useful for batch operations or testing.
+    Reserves the whole range in a single statement and formats it in memory,
+    so bulk imports cost one round trip regardless of count.
     
     Args:
-        tenant: Tenant instance
+        tenant: Tenant instance or tenant ID
         entity_type: str - Entity type identifier
         count: int - Number of numbers to generate
     
     Returns:
         list: List of generated numbers
+    
+    Example:
+        >>> codes = bulk_generate_numbers(tenant_id, 'product', 500)
+        >>> for product, code in zip(new_products, codes):
+        ...     product.product_code = code
     """
-    numbers = []
-    for _ in range(count):
-        numbers.append(get_next_number(tenant, entity_type))
-    return numbers
-
+    if count <= 0:
+        return []
+    
+    tenant_id = _tenant_id(tenant)
+    now = datetime.now()
+    sequence = native_sequences.get_cached((tenant_id, entity_type))
+    if sequence is None:
+        sequence, first_value, last_value = _reserve_numbers(tenant_id, entity_type, now, count=count)
+    
+    if sequence.backend == sequence.BACKEND_NATIVE:
+        native_sequences.remember((tenant_id, entity_type), sequence, now)
+        values = native_sequences.next_values(sequence, count, now)
+    else:
+        values = range(first_value, last_value + 1)
+    return [sequence.format_number(value, now) for value in values]
@@ -12,12 +12,31 @@ import os
 from .shopify_client import ShopifyClient, ShopifyDataTransformer
 from .models import ShopifyIntegration
 from inventory.models import Product
+from inventory.stock import record_quantity_change
 from sales.models import Order, Customer, OrderItem
 from warehouse.models import Warehouse
-from tenants.models import Tenant
+from tenants.cache import get_tenant
+from audit.buffer import batched
 
 logger = logging.getLogger(__name__)
 
+# Number of Shopify records processed together (matches Shopify's max page size)
+SYNC_BATCH_SIZE = 250
+
+
+def _batched(records, size: int, limit: Optional[int] = None):
+    """Yield lists of up to `size` records, stopping after `limit` records if given"""
+    batch = []
+    for i, record in enumerate(records):
+        if limit and i >= limit:
+            break
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 
 class ShopifySyncService:
     """
@@ -26,7 +45,7 @@ class ShopifySyncService:
     
     def __init__(self, tenant_id: int):
         self.tenant_id = tenant_id
-        self.tenant = Tenant.objects.get(id=tenant_id)
+        self.tenant = get_tenant(tenant_id)
         self.integration = ShopifyIntegration.objects.filter(tenant_id=tenant_id).first()
         
         if not self.integration:
@@ -45,6 +64,7 @@ class ShopifySyncService:
             logger.error(f"Shopify connection test failed for tenant {self.tenant_id}: {e}")
             return False
     
+    @batched()
     def sync_products(self, limit: Optional[int] = None) -> Dict[str, Any]:
         """
         Sync products from Shopify to inventory system.
@@ -64,41 +84,46 @@ class ShopifySyncService:
             # Get products from Shopify
             products_generator = self.client.get_all_products()
             
-            for i, shopify_product in enumerate(products_generator):
-                if limit and i >= limit:
-                    break
-                    
-                try:
-                    with transaction.atomic():
-                        # Transform product data
-                        product_data = ShopifyDataTransformer.transform_product(shopify_product, self.tenant_id)
-                        
-                        # Check if product already exists (by Shopify ID or SKU)
-                        existing_product = Product.objects.filter(
-                            tenant_id=self.tenant_id,
-                            shopify_id=product_data['shopify_id']
-                        ).first()
-                        
-                        if existing_product:
-                            # Update existing product
-                            for key, value in product_data.items():
-                                if key != 'tenant_id':  # Don't update tenant_id
-                                    setattr(existing_product, key, value)
-                            existing_product.save()
-                            updated_count += 1
-                            logger.debug(f"Updated product: {existing_product.name}")
-                        else:
-                            # Create new product
-                            product = Product.objects.create(**product_data)
-                            created_count += 1
-                            logger.debug(f"Created product: {product.name}")
-                        
-                        synced_count += 1
-                        
-                except Exception as e:
-                    error_msg = f"Error syncing product {shopify_product.get('title', 'Unknown')}: {e}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
+            for batch in _batched(products_generator, SYNC_BATCH_SIZE, limit):
+                # Look up existing products for the whole batch in one query
+                existing_products = self._existing_by_shopify_id(Product, batch)
+                
+                for shopify_product in batch:
+                    try:
+                        with transaction.atomic():
+                            # Transform product data
+                            product_data = ShopifyDataTransformer.transform_product(shopify_product, self.tenant_id)
+                            # Stock is booked through the ledger, not written to the product
+                            quantity = product_data.pop('quantity', 0)
+                            
+                            # Check if product already exists (by Shopify ID)
+                            existing_product = existing_products.get(product_data['shopify_id'])
+                            
+                            if existing_product:
+                                # Update existing product
+                                synced_fields = [key for key in product_data if key != 'tenant_id']
+                                for key in synced_fields:
+                                    setattr(existing_product, key, product_data[key])
+                                # Only the synced columns: the instance was loaded at the start of
+                                # the batch, and a full-row save would write back a stale quantity
+                                existing_product.save(update_fields=[*synced_fields, 'updated_at'])
+                                record_quantity_change(existing_product, quantity, reason="Shopify product sync")
+                                updated_count += 1
+                                logger.debug(f"Updated product: {existing_product.name}")
+                            else:
+                                # Shopify products keep their SHOP-<id> code; no sequence number is drawn
+                                product = Product.objects.create(**product_data)
+                                record_quantity_change(product, quantity, reason="Shopify product sync")
+                                existing_products[product.shopify_id] = product
+                                created_count += 1
+                                logger.debug(f"Created product: {product.name}")
+                            
+                            synced_count += 1
+                            
+                    except Exception as e:
+                        error_msg = f"Error syncing product {shopify_product.get('title', 'Unknown')}: {e}"
+                        logger.error(error_msg)
+                        errors.append(error_msg)
             
             # Update integration status
             self.integration.last_sync = timezone.now()
@@ -128,6 +153,7 @@ class ShopifySyncService:
                 'message': f"Product sync failed: {e}"
             }
     
+    @batched()
     def sync_orders(self, limit: Optional[int] = None, days_back: int = 30) -> Dict[str, Any]:
         """
         Sync orders from Shopify to sales system.
@@ -218,6 +244,7 @@ class ShopifySyncService:
                 'message': f"Order sync failed: {e}"
             }
     
+    @batched()
     def sync_customers(self, limit: Optional[int] = None) -> Dict[str, Any]:
         """
         Sync customers from Shopify.
@@ -237,41 +264,40 @@ class ShopifySyncService:
             # Get customers from Shopify
             customers_generator = self.client.get_all_customers()
             
-            for i, shopify_customer in enumerate(customers_generator):
-                if limit and i >= limit:
-                    break
-                    
-                try:
-                    with transaction.atomic():
-                        # Transform customer data
-                        customer_data = ShopifyDataTransformer.transform_customer(shopify_customer, self.tenant_id)
-                        
-                        # Check if customer already exists
-                        existing_customer = Customer.objects.filter(
-                            tenant_id=self.tenant_id,
-                            shopify_id=customer_data['shopify_id']
-                        ).first()
-                        
-                        if existing_customer:
-                            # Update existing customer
-                            for key, value in customer_data.items():
-                                if key not in ['tenant_id', 'customer_code']:  # Don't update these
-                                    setattr(existing_customer, key, value)
-                            existing_customer.save()
-                            updated_count += 1
-                            logger.debug(f"Updated customer: {existing_customer.name}")
-                        else:
-                            # Create new customer
-                            customer = Customer.objects.create(**customer_data)
-                            created_count += 1
-                            logger.debug(f"Created customer: {customer.name}")
-                        
-                        synced_count += 1
-                        
-                except Exception as e:
-                    error_msg = f"Error syncing customer {shopify_customer.get('email', 'Unknown')}: {e}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
+            for batch in _batched(customers_generator, SYNC_BATCH_SIZE, limit):
+                # Look up existing customers for the whole batch in one query
+                existing_customers = self._existing_by_shopify_id(Customer, batch)
+                
+                for shopify_customer in batch:
+                    try:
+                        with transaction.atomic():
+                            # Transform customer data
+                            customer_data = ShopifyDataTransformer.transform_customer(shopify_customer, self.tenant_id)
+                            
+                            # Check if customer already exists
+                            existing_customer = existing_customers.get(customer_data['shopify_id'])
+                            
+                            if existing_customer:
+                                # Update existing customer
+                                for key, value in customer_data.items():
+                                    if key not in ['tenant_id', 'customer_code']:  # Don't update these
+                                        setattr(existing_customer, key, value)
+                                existing_customer.save()
+                                updated_count += 1
+                                logger.debug(f"Updated customer: {existing_customer.name}")
+                            else:
+                                # Shopify customers keep their SHOP-CUST-<id> code; no sequence number is drawn
+                                customer = Customer.objects.create(**customer_data)
+                                existing_customers[customer.shopify_id] = customer
+                                created_count += 1
+                                logger.debug(f"Created customer: {customer.name}")
+                            
+                            synced_count += 1
+                            
+                    except Exception as e:
+                        error_msg = f"Error syncing customer {shopify_customer.get('email', 'Unknown')}: {e}"
+                        logger.error(error_msg)
+                        errors.append(error_msg)
             
             # Update integration status
             self.integration.last_sync = timezone.now()
@@ -301,6 +327,7 @@ class ShopifySyncService:
                 'message': f"Customer sync failed: {e}"
             }
     
+    @batched()
     def sync_inventory_levels(self) -> Dict[str, Any]:
         """
         Sync inventory levels from Shopify.
@@ -343,8 +370,7 @@ class ShopifySyncService:
                     if product.shopify_inventory_item_id in inventory_map:
                         new_quantity = inventory_map[product.shopify_inventory_item_id]
                         if product.quantity != new_quantity:
-                            product.quantity = new_quantity
-                            product.save()
+                            record_quantity_change(product, new_quantity, reason="Shopify inventory sync")
                             synced_count += 1
                             logger.debug(f"Updated inventory for {product.name}: {new_quantity}")
                 except Exception as e:
@@ -370,6 +396,12 @@ class ShopifySyncService:
                 'message': f"Inventory sync failed: {e}"
             }
     
+    def _existing_by_shopify_id(self, model, shopify_records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Fetch already-synced rows for a batch of Shopify records, keyed by Shopify ID"""
+        shopify_ids = [str(record.get('id')) for record in shopify_records]
+        queryset = model.objects.filter(tenant_id=self.tenant_id, shopify_id__in=shopify_ids)
+        return {obj.shopify_id: obj for obj in queryset}
+    
     def _create_order_items(self, order: Order, shopify_order: Dict[str, Any]):
         """Create order items from Shopify order line items"""
         line_items = shopify_order.get('line_items', [])
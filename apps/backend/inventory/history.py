@@ -0,0 +1,290 @@
+"""
+Historical stock balances from daily checkpoints.
+
+write_checkpoints() runs daily (inventory.tasks) and records, for every
+balance that moved during a day, its on-hand quantity at the end of that day
+(StockCheckpoint). A balance's latest checkpoint therefore stays valid until
+it moves again, and the balance at any time T is its latest checkpoint at or
+before T plus the movements between that checkpoint and T. Only the
+unsettled tail of movements is replayed, never the whole history.
+
+The first run for a tenant records every current balance as a baseline
+(worked back from StockLevel). Times before the baseline fall back to
+replaying all movements. find_checkpoint_drift() checks the stored
+checkpoints against a replay from the baseline and against StockLevel.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import groupby
+
+from django.db import connection, transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from .models import Product, StockCheckpoint, StockLevel, StockMovement
+
+# Movements are timestamped on insert but become visible on commit; wait this
+# long after midnight before checkpointing the day so none is missed
+SETTLE_DELAY = timedelta(minutes=15)
+
+ALL_WAREHOUSES = object()
+
+# Every balance of a tenant with the movements since a boundary taken back out.
+# One statement reads StockLevel and the movements from the same snapshot, so a
+# movement committing meanwhile is either in both or in neither.
+BASELINE_SQL = """
+    SELECT level.product_id, level.warehouse_id, level.on_hand - COALESCE((
+        SELECT sum(CASE
+            WHEN movement.movement_type IN ('in', 'transfer')
+                AND movement.destination_warehouse_id IS NOT DISTINCT FROM level.warehouse_id
+            THEN movement.quantity ELSE 0 END)
+        - sum(CASE
+            WHEN movement.movement_type IN ('out', 'transfer')
+                AND movement.source_warehouse_id IS NOT DISTINCT FROM level.warehouse_id
+            THEN movement.quantity ELSE 0 END)
+        FROM {movements} AS movement
+        WHERE movement.product_id = level.product_id AND movement.timestamp >= %(until)s
+    ), 0)
+    FROM {levels} AS level
+    WHERE level.tenant_id = %(tenant_id)s
+"""
+
+
+def checkpoint_boundary(now=None):
+    """Latest day boundary (UTC midnight) whose movements have settled"""
+    now = now or timezone.now()
+    midnight = now.astimezone(dt_timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight if now - midnight >= SETTLE_DELAY else midnight - timedelta(days=1)
+
+
+def _net_changes(movements, warehouse_id=ALL_WAREHOUSES, by_day=False):
+    """
+    Net balance changes of a movement queryset, aggregated in the database.
+
+    Returns:
+        dict: {(product_id, warehouse_id): delta}, keyed by (day_end, product_id,
+        warehouse_id) when by_day is set
+    """
+    changes = defaultdict(int)
+    day = {'day': TruncDay('timestamp', tzinfo=dt_timezone.utc)} if by_day else {}
+    sides = (
+        (1, ('in', 'transfer'), 'destination_warehouse_id'),
+        (-1, ('out', 'transfer'), 'source_warehouse_id'),
+    )
+    for sign, movement_types, warehouse_field in sides:
+        side = movements.filter(movement_type__in=movement_types)
+        if warehouse_id is not ALL_WAREHOUSES:
+            side = side.filter(**{warehouse_field: warehouse_id})
+        rows = (
+            side.order_by().annotate(**day)
+            .values(*day, 'product_id', warehouse_field)
+            .annotate(total=Sum('quantity'))
+        )
+        for row in rows:
+            key = (row['product_id'], row[warehouse_field])
+            if by_day:
+                key = (row['day'] + timedelta(days=1), *key)
+            changes[key] += sign * row['total']
+    return changes
+
+
+def _tenant_key(tenant_id):
+    return StockCheckpoint._meta.get_field('tenant_id').to_python(tenant_id)
+
+
+def _sort_key(key):
+    # Unassigned balances (warehouse None) sort first
+    *prefix, warehouse_id = key
+    return (*prefix, warehouse_id is not None, warehouse_id or 0)
+
+
+def _latest_checkpoints(checkpoints):
+    """{(product_id, warehouse_id): on_hand} from each balance's latest row"""
+    latest = (
+        checkpoints.order_by('product_id', 'warehouse_id', '-as_of')
+        .distinct('product_id', 'warehouse_id')
+        .values_list('product_id', 'warehouse_id', 'on_hand')
+    )
+    return {(product_id, warehouse_id): on_hand for product_id, warehouse_id, on_hand in latest}
+
+
+def write_checkpoints(tenant_id, until=None):
+    """
+    Checkpoint every balance that moved since the tenant's last checkpoint.
+
+    Args:
+        tenant_id: Tenant to checkpoint
+        until: datetime - Day boundary to checkpoint up to (default: checkpoint_boundary())
+
+    Returns:
+        int: Number of checkpoints written
+    """
+    until = until or checkpoint_boundary()
+    tenant_key = _tenant_key(tenant_id)
+    last = StockCheckpoint.objects.filter(tenant_id=tenant_key).aggregate(last=Max('as_of'))['last']
+    if last is None:
+        return _write_baseline(tenant_key, until)
+    if last >= until:
+        return 0
+
+    with transaction.atomic():
+        changes = _net_changes(
+            StockMovement.objects.filter(tenant_id=tenant_key, timestamp__gte=last, timestamp__lt=until),
+            by_day=True,
+        )
+        product_ids = {product_id for _, product_id, _ in changes}
+        balances = _latest_checkpoints(
+            StockCheckpoint.objects.filter(tenant_id=tenant_key, product_id__in=product_ids)
+        )
+
+        checkpoints = []
+        for (as_of, product_id, warehouse_id), delta in sorted(changes.items(), key=lambda item: _sort_key(item[0])):
+            key = (product_id, warehouse_id)
+            balances[key] = balances.get(key, 0) + delta
+            checkpoints.append(StockCheckpoint(
+                tenant_id=tenant_key, product_id=product_id, warehouse_id=warehouse_id,
+                as_of=as_of, on_hand=balances[key],
+            ))
+        StockCheckpoint.objects.bulk_create(checkpoints, batch_size=2000)
+    return len(checkpoints)
+
+
+def _write_baseline(tenant_key, until):
+    """Checkpoint every current balance at `until`, working back from StockLevel"""
+    sql = BASELINE_SQL.format(movements=StockMovement._meta.db_table, levels=StockLevel._meta.db_table)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, {'until': until, 'tenant_id': tenant_key})
+            checkpoints = [
+                StockCheckpoint(
+                    tenant_id=tenant_key, product_id=product_id, warehouse_id=warehouse_id,
+                    as_of=until, on_hand=on_hand,
+                )
+                for product_id, warehouse_id, on_hand in cursor.fetchall()
+            ]
+        StockCheckpoint.objects.bulk_create(checkpoints, batch_size=2000)
+    return len(checkpoints)
+
+
+def stock_as_of(tenant_id, at, product_id=None, warehouse_id=ALL_WAREHOUSES):
+    """
+    Stock balances at a point in time.
+
+    Args:
+        tenant_id: Tenant to report on
+        at: datetime - Point in time; movements before it are included
+        product_id: Only this product
+        warehouse_id: Only this warehouse (None for unassigned stock)
+
+    Returns:
+        dict: {(product_id, warehouse_id): on_hand} for non-zero balances
+    """
+    tenant_key = _tenant_key(tenant_id)
+    checkpoints = StockCheckpoint.objects.filter(tenant_id=tenant_key, as_of__lte=at)
+    movements = StockMovement.objects.filter(tenant_id=tenant_key, timestamp__lt=at)
+    if product_id is not None:
+        checkpoints = checkpoints.filter(product_id=product_id)
+        movements = movements.filter(product_id=product_id)
+    if warehouse_id is not ALL_WAREHOUSES:
+        checkpoints = checkpoints.filter(warehouse_id=warehouse_id)
+
+    # Balances that moved after this boundary have no checkpoint before `at`
+    boundary = checkpoints.aggregate(boundary=Max('as_of'))['boundary']
+    balances = {}
+    if boundary is not None:
+        balances = _latest_checkpoints(checkpoints)
+        movements = movements.filter(timestamp__gte=boundary)
+
+    for key, delta in _net_changes(movements, warehouse_id).items():
+        balances[key] = balances.get(key, 0) + delta
+    return {key: on_hand for key, on_hand in balances.items() if on_hand}
+
+
+def month_end(year, month):
+    """Boundary just after the last moment of a month (UTC)"""
+    if month == 12:
+        return datetime(year + 1, 1, 1, tzinfo=dt_timezone.utc)
+    return datetime(year, month + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def stock_valuation(tenant_id, at):
+    """
+    Quantity and value of each product's stock at a point in time.
+    Values use the products' current unit cost; cost history is not kept.
+
+    Returns:
+        dict: {'as_of', 'total_quantity', 'total_value', 'products': [...]}
+    """
+    quantities = defaultdict(int)
+    for (product_id, _), on_hand in stock_as_of(tenant_id, at).items():
+        quantities[product_id] += on_hand
+
+    products = Product.objects.filter(pk__in=quantities).values('id', 'product_code', 'sku', 'name', 'unit_cost')
+    rows = []
+    for product in products.order_by('product_code'):
+        quantity = quantities[product['id']]
+        rows.append({**product, 'quantity': quantity, 'value': quantity * product['unit_cost']})
+    return {
+        'as_of': at,
+        'total_quantity': sum(row['quantity'] for row in rows),
+        'total_value': sum((row['value'] for row in rows), 0),
+        'products': rows,
+    }
+
+
+def find_checkpoint_drift(tenant_id):
+    """
+    Compare a tenant's checkpoints with a replay of movements from the baseline,
+    and the latest balances with StockLevel.
+
+    Returns:
+        list: (product_id, warehouse_id, as_of, stored, expected) for each
+        mismatch; as_of is None for the comparison with current balances
+    """
+    tenant_key = _tenant_key(tenant_id)
+    checkpoints = StockCheckpoint.objects.filter(tenant_id=tenant_key)
+    baseline = checkpoints.order_by('as_of').values_list('as_of', flat=True).first()
+    if baseline is None:
+        return []
+
+    drift = []
+    expected = {
+        (product_id, warehouse_id): on_hand
+        for product_id, warehouse_id, on_hand in checkpoints.filter(as_of=baseline)
+        .values_list('product_id', 'warehouse_id', 'on_hand')
+    }
+    changes = defaultdict(dict)
+    movements = StockMovement.objects.filter(tenant_id=tenant_key, timestamp__gte=baseline)
+    for (as_of, product_id, warehouse_id), delta in _net_changes(movements, by_day=True).items():
+        changes[as_of][product_id, warehouse_id] = delta
+
+    stored_rows = (
+        checkpoints.filter(as_of__gt=baseline).order_by('as_of')
+        .values_list('as_of', 'product_id', 'warehouse_id', 'on_hand')
+    )
+    stored_by_day = {
+        as_of: {(product_id, warehouse_id): on_hand for _, product_id, warehouse_id, on_hand in rows}
+        for as_of, rows in groupby(stored_rows.iterator(chunk_size=2000), key=lambda row: row[0])
+    }
+    last = max(stored_by_day, default=baseline)
+
+    for as_of in sorted(set(changes) | set(stored_by_day)):
+        if as_of > last:
+            # Not checkpointed yet
+            break
+        day_changes = changes.get(as_of, {})
+        for key, delta in day_changes.items():
+            expected[key] = expected.get(key, 0) + delta
+        stored = stored_by_day.get(as_of, {})
+        for key in sorted(set(day_changes) | set(stored), key=_sort_key):
+            if stored.get(key) != expected.get(key, 0):
+                drift.append((*key, as_of, stored.get(key), expected.get(key, 0)))
+
+    current = stock_as_of(tenant_id, timezone.now())
+    levels = StockLevel.objects.filter(tenant_id=tenant_key).values_list('product_id', 'warehouse_id', 'on_hand')
+    actual = {(product_id, warehouse_id): on_hand for product_id, warehouse_id, on_hand in levels if on_hand}
+    for key in sorted(set(current) | set(actual), key=_sort_key):
+        if current.get(key, 0) != actual.get(key, 0):
+            drift.append((*key, None, current.get(key, 0), actual.get(key, 0)))
+    return drift
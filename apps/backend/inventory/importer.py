@@ -0,0 +1,293 @@
+"""
+Bulk product import from CSV or XLSX files.
+
+Rows are read lazily and validated in chunks, and every valid chunk is
+streamed with COPY into a temporary staging table. A single
+INSERT ... ON CONFLICT (tenant_id, sku) then merges the staged catalog into
+inventory.Product: new SKUs get product codes pre-allocated as one range,
+existing SKUs are updated in place. Stock quantities are booked through the
+stock ledger (inventory.stock.apply_adjustments) and the whole import is
+recorded as one AuditLog entry instead of one per product.
+
+Used by the products/import API action and `manage.py import_products`.
+"""
+import csv
+import io
+import os
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Product
+from .serializers import ProductImportRowSerializer
+from .stock import apply_adjustments
+
+# Rows validated and copied per round trip
+IMPORT_CHUNK_SIZE = 5000
+
+# Row errors returned to the caller; the count of failed rows is always exact
+MAX_REPORTED_ERRORS = 1000
+
+STAGING_TABLE = 'product_import_staging'
+CODES_TABLE = 'product_import_codes'
+
+STAGING_COLUMNS = (
+    'row_number', 'sku', 'name', 'description', 'category', 'unit',
+    'unit_cost', 'selling_price', 'quantity', 'reorder_level', 'status', 'supplier_id',
+)
+
+CREATE_STAGING_SQL = f"""
+    CREATE TEMPORARY TABLE {STAGING_TABLE} (
+        row_number integer NOT NULL,
+        sku varchar(64) NOT NULL,
+        name varchar(200) NOT NULL,
+        description text NOT NULL,
+        category varchar(120) NOT NULL,
+        unit varchar(20) NOT NULL,
+        unit_cost numeric(12, 2) NOT NULL,
+        selling_price numeric(12, 2) NOT NULL,
+        quantity integer,
+        reorder_level integer NOT NULL,
+        status varchar(40) NOT NULL,
+        supplier_id bigint
+    ) ON COMMIT DROP
+"""
+
+CREATE_CODES_SQL = f"""
+    CREATE TEMPORARY TABLE {CODES_TABLE} (
+        position bigint PRIMARY KEY,
+        product_code varchar(100) NOT NULL
+    ) ON COMMIT DROP
+"""
+
+# A SKU repeated in the file keeps its last row
+DEDUPLICATE_SQL = f"""
+    DELETE FROM {STAGING_TABLE} AS earlier USING {STAGING_TABLE} AS later
+    WHERE earlier.sku = later.sku AND earlier.row_number < later.row_number
+"""
+
+COUNT_NEW_SQL = f"""
+    SELECT count(*) FROM {STAGING_TABLE} AS staged
+    WHERE NOT EXISTS (
+        SELECT 1 FROM {{table}} AS product
+        WHERE product.tenant_id = %(tenant_id)s AND product.sku = staged.sku
+    )
+"""
+
+# New SKUs are numbered in file order and matched to the pre-allocated codes.
+# Stock is not written here: quantity starts at 0 and the ledger books it.
+MERGE_SQL = f"""
+    WITH new_skus AS (
+        SELECT staged.sku, row_number() OVER (ORDER BY staged.row_number) AS position
+        FROM {STAGING_TABLE} AS staged
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {{table}} AS product
+            WHERE product.tenant_id = %(tenant_id)s AND product.sku = staged.sku
+        )
+    ),
+    merged AS (
+        INSERT INTO {{table}} (
+            tenant_id, product_code, sku, name, description, category, unit,
+            unit_cost, selling_price, quantity, reorder_level, status, supplier_id,
+            shopify_id, shopify_variant_id, shopify_inventory_item_id, shopify_handle, shopify_tags,
+            created_at, updated_at, created_by_id, updated_by_id
+        )
+        SELECT
+            %(tenant_id)s, COALESCE(codes.product_code, ''), staged.sku, staged.name,
+            staged.description, staged.category, staged.unit, staged.unit_cost,
+            staged.selling_price, 0, staged.reorder_level, staged.status, staged.supplier_id,
+            '', '', '', '', '',
+            %(now)s, %(now)s, %(user_id)s, %(user_id)s
+        FROM {STAGING_TABLE} AS staged
+        LEFT JOIN new_skus ON new_skus.sku = staged.sku
+        LEFT JOIN {CODES_TABLE} AS codes ON codes.position = new_skus.position
+        ON CONFLICT (tenant_id, sku) WHERE sku <> '' DO UPDATE SET
+            name = EXCLUDED.name,
+            description = EXCLUDED.description,
+            category = EXCLUDED.category,
+            unit = EXCLUDED.unit,
+            unit_cost = EXCLUDED.unit_cost,
+            selling_price = EXCLUDED.selling_price,
+            reorder_level = EXCLUDED.reorder_level,
+            status = EXCLUDED.status,
+            supplier_id = EXCLUDED.supplier_id,
+            updated_at = EXCLUDED.updated_at,
+            updated_by_id = EXCLUDED.updated_by_id
+        RETURNING id, sku, xmax = 0 AS created
+    )
+    SELECT merged.id, merged.created, staged.quantity, staged.row_number
+    FROM merged JOIN {STAGING_TABLE} AS staged ON staged.sku = merged.sku
+"""
+
+
+class ImportFileError(Exception):
+    """Raised when an import file cannot be read"""
+
+
+def read_rows(file, filename):
+    """
+    Yield (row_number, {column: value}) for each data row of a CSV or XLSX file.
+    Column names are matched case-insensitively; row numbers count the header as row 1.
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.xlsx':
+        rows = _xlsx_rows(file)
+    elif extension in ('.csv', ''):
+        rows = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    else:
+        raise ImportFileError(f"Unsupported file type '{extension}'; upload a .csv or .xlsx file")
+
+    header = next(rows, None)
+    if not header:
+        raise ImportFileError("The file is empty")
+    columns = [str(name or '').strip().lower() for name in header]
+
+    for row_number, values in enumerate(rows, start=2):
+        row = {
+            column: value for column, value in zip(columns, values)
+            if column and value not in (None, '')
+        }
+        if row:
+            yield row_number, row
+
+
+def _xlsx_rows(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("XLSX import requires openpyxl (pip install openpyxl)")
+    # Read-only mode streams rows instead of loading the whole sheet
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def import_products(tenant, file, filename, user=None):
+    """
+    Import a product catalog file for a tenant.
+
+    Valid rows are merged on SKU; rows failing validation are skipped and
+    reported. A row whose quantity cannot be booked (e.g. too little stock
+    for a decrease) is reported as failed; its catalog fields are still
+    merged. Runs in one transaction, so either every valid row is imported
+    or none is.
+
+    Args:
+        tenant: Tenant instance the products belong to
+        file: Binary file object with the CSV or XLSX contents
+        filename: str - Original file name, used to detect the format
+        user: User running the import (audit trail and stock movements)
+
+    Returns:
+        dict: {'rows', 'created', 'updated', 'failed', 'errors'}
+
+    Raises:
+        ImportFileError: If the file cannot be read
+    """
+    from api.caching import invalidate_dashboard
+    from api.metrics import refresh_metrics
+    from audit.models import AuditLog
+    from common.utils import bulk_generate_numbers
+    from procurement.models import Supplier
+
+    tenant_id = Product._meta.get_field('tenant_id').to_python(tenant.id)
+    suppliers = dict(
+        Supplier.objects.filter(tenant_id=tenant.id).exclude(supplier_code='')
+        .values_list('supplier_code', 'id')
+    )
+    validator = ProductImportRowSerializer()
+    summary = {'rows': 0, 'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+
+    def fail(row_number, errors):
+        summary['failed'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({'row': row_number, 'errors': errors})
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(CREATE_STAGING_SQL)
+        cursor.execute(CREATE_CODES_SQL)
+
+        for chunk in _chunks(read_rows(file, filename), IMPORT_CHUNK_SIZE):
+            staged = []
+            for row_number, row in chunk:
+                summary['rows'] += 1
+                try:
+                    data = validator.run_validation(row)
+                except ValidationError as exc:
+                    fail(row_number, exc.detail)
+                    continue
+                supplier_id = None
+                if data['supplier_code']:
+                    supplier_id = suppliers.get(data['supplier_code'])
+                    if supplier_id is None:
+                        fail(row_number, {'supplier_code': ["Unknown supplier"]})
+                        continue
+                staged.append((
+                    row_number, data['sku'], data['name'], data['description'], data['category'],
+                    data['unit'], data['unit_cost'], data['selling_price'], data['quantity'],
+                    data['reorder_level'], data['status'], supplier_id,
+                ))
+
+            if not staged:
+                continue
+            with cursor.copy(f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN") as copy:
+                for record in staged:
+                    copy.write_row(record)
+
+        cursor.execute(DEDUPLICATE_SQL)
+        table = Product._meta.db_table
+        cursor.execute(COUNT_NEW_SQL.format(table=table), {'tenant_id': tenant_id})
+        new_count = cursor.fetchone()[0]
+
+        # One reservation for every new SKU instead of a sequence hit per save()
+        codes = bulk_generate_numbers(tenant, 'product', new_count)
+        with cursor.copy(f"COPY {CODES_TABLE} (position, product_code) FROM STDIN") as copy:
+            for position, code in enumerate(codes, start=1):
+                copy.write_row((position, code))
+
+        cursor.execute(MERGE_SQL.format(table=table), {
+            'tenant_id': tenant_id, 'now': timezone.now(), 'user_id': getattr(user, 'pk', None),
+        })
+        stock = []
+        for product_id, created, quantity, row_number in cursor.fetchall():
+            outcome = 'created' if created else 'updated'
+            summary[outcome] += 1
+            if quantity is not None:
+                stock.append((row_number, outcome, {
+                    'product_id': product_id, 'adjustment_type': 'set',
+                    'quantity': quantity, 'reason': "Product import",
+                }))
+
+        for chunk in _chunks(stock, IMPORT_CHUNK_SIZE):
+            results = apply_adjustments(tenant.id, [line for _, _, line in chunk], performed_by=user)
+            for (row_number, outcome, _), result in zip(chunk, results):
+                if result['status'] == 'error':
+                    # The catalog fields were merged but the stock was not booked
+                    summary[outcome] -= 1
+                    fail(row_number, {'quantity': [f"{result['error']}; product saved, stock not changed"]})
+
+        # The merge bypasses the rollup and audit signals
+        refresh_metrics(tenant.id)
+        invalidate_dashboard(tenant.id)
+        AuditLog.objects.create(
+            tenant_id=tenant.id, user=user, action="IMPORT", module="Product",
+            details={
+                'file': filename,
+                'rows': summary['rows'],
+                'created': summary['created'],
+                'updated': summary['updated'],
+                'failed': summary['failed'],
+            },
+        )
+
+    return summary
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.importer import ImportFileError, import_products
+from tenants.models import Tenant
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Import or update a tenant's product catalog from a CSV or XLSX file (merged on SKU)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or XLSX file; the first row holds column names")
+        parser.add_argument('--tenant', required=True, help="Tenant code or numeric tenant ID")
+        parser.add_argument('--user', help="Email of the user to record the import against")
+
+    def handle(self, *args, **options):
+        tenant_ref = options['tenant']
+        lookup = {'pk': int(tenant_ref)} if tenant_ref.isdigit() else {'code': tenant_ref}
+        tenant = Tenant.objects.filter(**lookup).first()
+        if tenant is None:
+            raise CommandError(f"Tenant '{tenant_ref}' not found")
+
+        user = None
+        if options['user']:
+            user = User.objects.filter(email=options['user']).first()
+            if user is None:
+                raise CommandError(f"User '{options['user']}' not found")
+
+        try:
+            with open(options['path'], 'rb') as file:
+                summary = import_products(tenant, file, options['path'], user=user)
+        except (OSError, ImportFileError) as exc:
+            raise CommandError(str(exc))
+
+        for error in summary['errors']:
+            self.stdout.write(self.style.WARNING(f"  Row {error['row']}: {error['errors']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['rows']} row(s): {summary['created']} created, "
+            f"{summary['updated']} updated, {summary['failed']} failed"
+        ))
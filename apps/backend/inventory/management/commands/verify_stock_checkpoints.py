@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from inventory.history import find_checkpoint_drift, write_checkpoints
+from inventory.models import StockCheckpoint, StockLevel
+
+
+class Command(BaseCommand):
+    help = "Compare stock checkpoints with a full replay of stock movements and with current balances"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', help="Only check this tenant (ID as stored on records, or numeric tenant ID)")
+        parser.add_argument(
+            '--checkpoint', action='store_true',
+            help="Write any pending checkpoints before verifying"
+        )
+
+    def handle(self, *args, **options):
+        field = StockCheckpoint._meta.get_field('tenant_id')
+        tenant = options['tenant']
+        if tenant:
+            tenant_ids = [field.to_python(int(tenant) if tenant.isdigit() else tenant)]
+        else:
+            tenant_ids = StockLevel.objects.order_by().values_list('tenant_id', flat=True).distinct()
+
+        checked = drifted = 0
+        for tenant_id in tenant_ids:
+            checked += 1
+            if options['checkpoint']:
+                write_checkpoints(tenant_id)
+            drift = find_checkpoint_drift(tenant_id)
+            if not drift:
+                continue
+
+            drifted += 1
+            self.stdout.write(self.style.WARNING(f"Tenant {tenant_id}:"))
+            for product_id, warehouse_id, as_of, stored, expected in drift:
+                when = f"{as_of:%Y-%m-%d}" if as_of else "current"
+                self.stdout.write(
+                    f"  product {product_id} @ {warehouse_id or 'unassigned'} ({when}): "
+                    f"stored={stored} expected={expected}"
+                )
+
+        summary = f"Checked {checked} tenant(s), {drifted} with drift"
+        if drifted:
+            self.stderr.write(self.style.ERROR(summary))
+            raise SystemExit(1)
+        self.stdout.write(self.style.SUCCESS(summary))
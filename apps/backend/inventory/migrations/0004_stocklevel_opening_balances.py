@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def create_opening_balances(apps, schema_editor):
+    """Carry each product's current quantity into an unassigned StockLevel row"""
+    Product = apps.get_model('inventory', 'Product')
+    StockLevel = apps.get_model('inventory', 'StockLevel')
+    
+    batch = []
+    products = Product.objects.exclude(quantity=0).values_list('id', 'tenant_id', 'quantity')
+    for product_id, tenant_id, quantity in products.iterator(chunk_size=2000):
+        batch.append(StockLevel(tenant_id=tenant_id, product_id=product_id, warehouse=None, on_hand=quantity))
+        if len(batch) >= 2000:
+            StockLevel.objects.bulk_create(batch)
+            batch = []
+    StockLevel.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_stocklevel'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_opening_balances, migrations.RunPython.noop),
+    ]
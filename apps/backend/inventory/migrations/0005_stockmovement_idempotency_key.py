@@ -0,0 +1,25 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_stocklevel_opening_balances'),
+        ('warehouse', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Client-supplied key; a retried request with the same key is applied once', max_length=255, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='stockmovement',
+            constraint=models.UniqueConstraint(condition=models.Q(('idempotency_key__isnull', False)), fields=('tenant_id', 'idempotency_key'), name='unique_stock_movement_idempotency_key'),
+        ),
+    ]
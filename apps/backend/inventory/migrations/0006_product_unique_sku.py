@@ -0,0 +1,31 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:44
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_skus(apps, schema_editor):
+    """Fail with the offending SKUs rather than a bare constraint violation"""
+    Product = apps.get_model('inventory', 'Product')
+    duplicates = list(
+        Product.objects.exclude(sku='').values('tenant_id', 'sku')
+        .annotate(count=Count('id')).filter(count__gt=1)[:20]
+    )
+    if duplicates:
+        listed = ", ".join(f"{row['sku']} (tenant {row['tenant_id']})" for row in duplicates)
+        raise RuntimeError(f"Rename or merge duplicate product SKUs before migrating: {listed}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_stockmovement_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_skus, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(condition=models.Q(('sku', ''), _negated=True), fields=('tenant_id', 'sku'), name='unique_product_sku_per_tenant'),
+        ),
+    ]
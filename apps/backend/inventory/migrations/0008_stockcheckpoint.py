@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_product_search_trgm_indexes'),
+        ('warehouse', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tenant_id', models.UUIDField(db_index=True, help_text='Tenant ID for multi-tenant isolation')),
+                ('as_of', models.DateTimeField(help_text='Day boundary; includes every movement before it')),
+                ('on_hand', models.IntegerField()),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_checkpoints', to='inventory.product')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated', to=settings.AUTH_USER_MODEL)),
+                ('warehouse', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stock_checkpoints', to='warehouse.warehouse')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tenant_id', '-as_of'], name='inventory_s_tenant__3ce180_idx'), models.Index(fields=['product', 'warehouse', '-as_of'], name='inventory_s_product_a42208_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('warehouse__isnull', False)), fields=('product', 'warehouse', 'as_of'), name='unique_stock_checkpoint_per_warehouse'), models.UniqueConstraint(condition=models.Q(('warehouse__isnull', True)), fields=('product', 'as_of'), name='unique_unassigned_stock_checkpoint')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_stockcheckpoint'),
+        ('procurement', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock_status',
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(quantity=0, then=models.Value('out-of-stock')), models.When(quantity__lte=models.F('reorder_level'), then=models.Value('low-stock')), default=models.Value('in-stock')), output_field=models.CharField(max_length=20)),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant_id', 'stock_status'], name='inventory_p_tenant__0bda80_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock_status', 'low-stock')), fields=['tenant_id', 'quantity'], name='product_low_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('stock_status', 'out-of-stock')), fields=['tenant_id'], name='product_out_of_stock_idx'),
+        ),
+    ]
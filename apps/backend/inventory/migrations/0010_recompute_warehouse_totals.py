@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def recompute_warehouse_totals(apps, schema_editor):
+    """
+    Reset each warehouse's utilization and SKU count to its StockLevel rows.
+    The counters held hand-entered figures before the ledger started applying
+    deltas to them, and 0004 put all opening stock in the unassigned bucket.
+    """
+    Warehouse = apps.get_model('warehouse', 'Warehouse')
+    StockLevel = apps.get_model('inventory', 'StockLevel')
+
+    levels = StockLevel.objects.filter(warehouse=OuterRef('pk')).order_by().values('warehouse')
+    Warehouse.objects.update(
+        current_utilization=Coalesce(
+            Subquery(levels.annotate(total=Sum('on_hand')).values('total'), output_field=IntegerField()), 0
+        ),
+        total_skus=Coalesce(
+            Subquery(levels.filter(on_hand__gt=0).annotate(skus=Count('id')).values('skus')), 0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_product_stock_status'),
+        ('warehouse', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_warehouse_totals, migrations.RunPython.noop),
+    ]
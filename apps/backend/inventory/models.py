@@ -1,7 +1,22 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from common.models import TenantAwareModel
 
 
+STOCK_STATUS_IN = 'in-stock'
+STOCK_STATUS_LOW = 'low-stock'
+STOCK_STATUS_OUT = 'out-of-stock'
+
+
+def stock_status_for(quantity, reorder_level):
+    """Stock status of a quantity, as Product.stock_status computes it in the database"""
+    if quantity == 0:
+        return STOCK_STATUS_OUT
+    if quantity <= reorder_level:
+        return STOCK_STATUS_LOW
+    return STOCK_STATUS_IN
+
+
 class Product(TenantAwareModel):
     # User-facing formatted number (e.g., "PRD-001")
     product_code = models.CharField(max_length=100, blank=True, db_index=True)
@@ -21,6 +36,16 @@ class Product(TenantAwareModel):
     quantity = models.IntegerField(default=0, help_text="Current stock quantity")
     reorder_level = models.IntegerField(default=0)
     status = models.CharField(max_length=40, default="active")
+    # Kept by the database on every write, including raw ledger UPDATEs and imports
+    stock_status = models.GeneratedField(
+        expression=models.Case(
+            models.When(quantity=0, then=models.Value(STOCK_STATUS_OUT)),
+            models.When(quantity__lte=models.F('reorder_level'), then=models.Value(STOCK_STATUS_LOW)),
+            default=models.Value(STOCK_STATUS_IN),
+        ),
+        output_field=models.CharField(max_length=20),
+        db_persist=True,
+    )
     
     # Relationships
     supplier = models.ForeignKey(
@@ -45,15 +70,36 @@ class Product(TenantAwareModel):
         indexes = [
             models.Index(fields=['tenant_id', 'product_code']),
             models.Index(fields=['tenant_id', 'status']),
+            models.Index(fields=['tenant_id', 'stock_status']),
+            # Low/out-of-stock lists and alerts read only these small slices
+            models.Index(
+                fields=['tenant_id', 'quantity'], condition=models.Q(stock_status=STOCK_STATUS_LOW),
+                name='product_low_stock_idx',
+            ),
+            models.Index(
+                fields=['tenant_id'], condition=models.Q(stock_status=STOCK_STATUS_OUT),
+                name='product_out_of_stock_idx',
+            ),
+            # Serve ProductViewSet search (common.search.TrigramSearchFilter)
+            GinIndex(fields=['name'], opclasses=['gin_trgm_ops'], name='product_name_trgm'),
+            GinIndex(fields=['sku'], opclasses=['gin_trgm_ops'], name='product_sku_trgm'),
+            GinIndex(fields=['product_code'], opclasses=['gin_trgm_ops'], name='product_code_trgm'),
+            GinIndex(fields=['description'], opclasses=['gin_trgm_ops'], name='product_description_trgm'),
+        ]
+        constraints = [
+            # Imports merge on SKU (INSERT ... ON CONFLICT); blank SKUs are not matched
+            models.UniqueConstraint(
+                fields=['tenant_id', 'sku'],
+                condition=~models.Q(sku=''),
+                name='unique_product_sku_per_tenant',
+            ),
         ]
     
     def save(self, *args, **kwargs):
         # Auto-generate product_code if not set
         if not self.product_code:
             from common.utils import get_next_number
-            from tenants.models import Tenant
-            tenant = Tenant.objects.get(id=self.tenant_id)
-            self.product_code = get_next_number(tenant, 'product')
+            self.product_code = get_next_number(self.tenant_id, 'product')
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -96,6 +142,12 @@ class StockMovement(TenantAwareModel):
         related_name='stock_movements'
     )
     timestamp = models.DateTimeField(auto_now_add=True)
+    idempotency_key = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True,
+        help_text="Client-supplied key; a retried request with the same key is applied once"
+    )
     
     class Meta:
         ordering = ['-timestamp']
@@ -103,6 +155,99 @@ class StockMovement(TenantAwareModel):
             models.Index(fields=['tenant_id', '-timestamp']),
             models.Index(fields=['product', '-timestamp']),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tenant_id', 'idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='unique_stock_movement_idempotency_key',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.movement_type} - {self.product.name} ({self.quantity})"
+
+
+class StockLevel(TenantAwareModel):
+    """
+    Materialized stock balance of a product in one warehouse.
+    
+    Maintained by inventory.stock from every StockMovement; Product.quantity is
+    the sum of on_hand over a product's rows. Stock not assigned to any
+    warehouse is kept in the row with warehouse=None.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_levels')
+    warehouse = models.ForeignKey(
+        "warehouse.Warehouse",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='stock_levels'
+    )
+    on_hand = models.IntegerField(default=0)
+    reserved = models.IntegerField(default=0, help_text="Quantity allocated to orders but not yet shipped")
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'warehouse'],
+                condition=models.Q(warehouse__isnull=False),
+                name='unique_stock_level_per_warehouse',
+            ),
+            models.UniqueConstraint(
+                fields=['product'],
+                condition=models.Q(warehouse__isnull=True),
+                name='unique_unassigned_stock_level',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tenant_id', 'warehouse']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} @ {self.warehouse_id or 'unassigned'}: {self.on_hand}"
+    
+    @property
+    def available(self):
+        return self.on_hand - self.reserved
+
+
+class StockCheckpoint(TenantAwareModel):
+    """
+    Stock balance of a product in one warehouse at a day boundary.
+    
+    Written daily by inventory.history for the balances that moved that day,
+    so a balance's latest checkpoint stays valid until it moves again.
+    Historical balances are the latest checkpoint plus the movements since.
+    The first run records every balance as the baseline.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stock_checkpoints')
+    warehouse = models.ForeignKey(
+        "warehouse.Warehouse",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='stock_checkpoints'
+    )
+    as_of = models.DateTimeField(help_text="Day boundary; includes every movement before it")
+    on_hand = models.IntegerField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['product', 'warehouse', 'as_of'],
+                condition=models.Q(warehouse__isnull=False),
+                name='unique_stock_checkpoint_per_warehouse',
+            ),
+            models.UniqueConstraint(
+                fields=['product', 'as_of'],
+                condition=models.Q(warehouse__isnull=True),
+                name='unique_unassigned_stock_checkpoint',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tenant_id', '-as_of']),
+            models.Index(fields=['product', 'warehouse', '-as_of']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id} @ {self.warehouse_id or 'unassigned'} on {self.as_of:%Y-%m-%d}: {self.on_hand}"
@@ -1,5 +1,7 @@
+from decimal import Decimal
+
 from rest_framework import serializers
-from .models import Product, StockMovement
+from .models import Product, StockLevel, StockMovement
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -14,27 +16,14 @@ class ProductSerializer(serializers.ModelSerializer):
             "id", "product_code", "sku", "name", "description", "category", "unit",
             "unit_cost", "selling_price", "quantity", "reorder_level", "status",
             "supplier", "supplier_name", "supplier_code",
-            "total_value", "created_at", "updated_at"
+            "total_value", "created_at", "updated_at", "stock_status"
         ]
-        read_only_fields = ["id", "product_code", "total_value", "created_at", "updated_at"]
+        # stock_status is maintained by the database from quantity and reorder_level
+        read_only_fields = ["id", "product_code", "total_value", "created_at", "updated_at", "stock_status"]
     
     def get_total_value(self, obj) -> float:
         """Calculate total value of current stock"""
         return float(obj.quantity * obj.unit_cost)
-    
-    def to_representation(self, instance):
-        """Customize output to match frontend expectations"""
-        data = super().to_representation(instance)
-        
-        # Calculate stock status
-        if instance.quantity == 0:
-            data['stock_status'] = 'out-of-stock'
-        elif instance.quantity <= instance.reorder_level:
-            data['stock_status'] = 'low-stock'
-        else:
-            data['stock_status'] = 'in-stock'
-        
-        return data
 
 
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
@@ -53,6 +42,41 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
             if 'tenant' in data:
                 raise serializers.ValidationError("Cannot change tenant")
         return data
+    
+    def validate_sku(self, value):
+        request = self.context.get('request')
+        tenant = getattr(request, 'tenant', None)
+        if value and tenant:
+            duplicates = Product.objects.filter(tenant_id=tenant.id, sku=value)
+            if self.instance:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError("A product with this SKU already exists")
+        return value
+    
+    def update(self, instance, validated_data):
+        # Write only the submitted columns so a concurrent stock movement's
+        # quantity is never overwritten with the value loaded here
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    """One row of a product import file (see inventory.importer)"""
+    sku = serializers.CharField(max_length=64)
+    name = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    category = serializers.CharField(max_length=120, required=False, allow_blank=True, default='')
+    unit = serializers.CharField(max_length=20, required=False, default='pcs')
+    unit_cost = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0'), required=False, default=Decimal('0'))
+    selling_price = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0'), required=False, default=Decimal('0'))
+    # Omitted quantities leave the stock of existing products untouched
+    quantity = serializers.IntegerField(min_value=0, required=False, default=None)
+    reorder_level = serializers.IntegerField(min_value=0, required=False, default=0)
+    status = serializers.CharField(max_length=40, required=False, default='active')
+    supplier_code = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
 
 
 class StockMovementSerializer(serializers.ModelSerializer):
@@ -80,6 +104,23 @@ class StockMovementSerializer(serializers.ModelSerializer):
         return None
 
 
+class StockLevelSerializer(serializers.ModelSerializer):
+    """Serializer for per-warehouse stock balances"""
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    product_code = serializers.CharField(source='product.product_code', read_only=True)
+    warehouse_name = serializers.CharField(source='warehouse.name', read_only=True, allow_null=True)
+    available = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = StockLevel
+        fields = [
+            "id", "product", "product_name", "product_code",
+            "warehouse", "warehouse_name",
+            "on_hand", "reserved", "available", "updated_at"
+        ]
+        read_only_fields = fields
+
+
 class StockAdjustmentSerializer(serializers.Serializer):
     """Serializer for stock adjustments from frontend"""
     product_id = serializers.IntegerField(required=True)
@@ -0,0 +1,535 @@
+"""
+Stock ledger: applies StockMovements to per-warehouse StockLevel balances.
+
+Every change to stock goes through record_movement(), which inserts the
+movement and, in the same transaction, adjusts the affected StockLevel rows,
+Product.quantity (the sum of the product's balances) and each warehouse's
+current_utilization/total_skus with single-row UPDATEs. Stock without a
+warehouse is kept in the product's unassigned (warehouse=None) balance.
+
+Setting a product's total quantity without naming a warehouse ('set'
+adjustments, quantity edits, Shopify sync, imports) adds an increase to the
+unassigned balance. A decrease without a warehouse (such a 'set', or a
+'remove') is drawn from the unassigned balance first, then from the
+warehouses in ascending id order (allocate_decrease()), with one 'out'
+movement per balance drawn from.
+
+Decrements are conditional (`WHERE on_hand + delta >= 0`), so concurrent
+adjustments never lose updates or drive a balance negative without taking
+row locks up front. A movement recorded with an idempotency key is applied
+at most once per tenant; retries get the original movement back.
+"""
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Product, StockLevel, StockMovement
+
+# Adds to one balance and returns it, matching no row if that would take it
+# below zero. Every SET expression sees the pre-update row, so the new value is
+# on_hand as returned.
+LEVEL_UPDATE_SQL = """
+    UPDATE {table} SET on_hand = on_hand + %(delta)s, updated_at = %(now)s
+    WHERE product_id = %(product_id)s AND {warehouse_condition}
+        AND on_hand + %(delta)s >= 0
+    RETURNING *
+"""
+
+PRODUCT_UPDATE_SQL = """
+    UPDATE {table} SET quantity = quantity + %(delta)s, updated_at = %(now)s
+    WHERE id = %(product_id)s AND quantity + %(delta)s >= 0
+    RETURNING *
+"""
+
+# Set-based counterparts adding per-row deltas passed as parallel arrays
+LEVEL_BULK_UPDATE_SQL = """
+    UPDATE {table} AS level SET on_hand = level.on_hand + change.delta, updated_at = %s
+    FROM unnest(%s::bigint[], %s::integer[]) AS change(id, delta)
+    WHERE level.id = change.id
+"""
+
+PRODUCT_BULK_UPDATE_SQL = """
+    UPDATE {table} AS product SET quantity = product.quantity + change.delta, updated_at = %s
+    FROM unnest(%s::bigint[], %s::integer[]) AS change(id, delta)
+    WHERE product.id = change.id
+"""
+
+WAREHOUSE_BULK_UPDATE_SQL = """
+    UPDATE {table} AS warehouse SET
+        current_utilization = warehouse.current_utilization + change.delta,
+        total_skus = warehouse.total_skus + change.skus
+    FROM unnest(%s::bigint[], %s::integer[], %s::integer[]) AS change(id, delta, skus)
+    WHERE warehouse.id = change.id
+"""
+
+
+class InsufficientStock(Exception):
+    """Raised when a movement would take a stock balance below zero"""
+
+
+class IdempotencyKeyReused(Exception):
+    """Raised when an idempotency key was already used for a different product"""
+
+
+def movement_changes(movement_type, quantity, source_warehouse_id=None, destination_warehouse_id=None):
+    """
+    Balance changes a movement makes.
+
+    Returns:
+        list: (warehouse_id, delta) pairs; warehouse_id None is the unassigned balance
+    """
+    if movement_type == 'in':
+        return [(destination_warehouse_id, quantity)]
+    if movement_type == 'out':
+        return [(source_warehouse_id, -quantity)]
+    # Transfers move stock between warehouses without changing the product total
+    return [(source_warehouse_id, -quantity), (destination_warehouse_id, quantity)]
+
+
+def change_level(tenant_id, product_id, warehouse_id, delta):
+    """
+    Add delta to one StockLevel balance, creating the row on first use.
+
+    Returns:
+        StockLevel: The balance after the change
+
+    Raises:
+        InsufficientStock: If the balance would go below zero
+    """
+    params = {'delta': delta, 'now': timezone.now(), 'product_id': product_id, 'warehouse_id': warehouse_id}
+    sql = LEVEL_UPDATE_SQL.format(
+        table=StockLevel._meta.db_table,
+        warehouse_condition='warehouse_id IS NULL' if warehouse_id is None else 'warehouse_id = %(warehouse_id)s',
+    )
+
+    rows = list(StockLevel.objects.raw(sql, params))
+    if rows:
+        return rows[0]
+    if delta < 0:
+        # Either no balance yet or not enough in it
+        raise InsufficientStock()
+    try:
+        with transaction.atomic():
+            return StockLevel.objects.create(
+                tenant_id=tenant_id, product_id=product_id, warehouse_id=warehouse_id, on_hand=delta
+            )
+    except IntegrityError:
+        # Created concurrently; add to that row instead
+        return list(StockLevel.objects.raw(sql, params))[0]
+
+
+def change_product_quantity(product_id, delta):
+    """
+    Add delta to Product.quantity and keep the dashboard rollups in step.
+
+    Returns:
+        Product: The product row after the change
+    """
+    from api.caching import invalidate_dashboard
+    from api.metrics import apply_deltas, diff, product_contribution
+
+    sql = PRODUCT_UPDATE_SQL.format(table=Product._meta.db_table)
+    rows = list(Product.objects.raw(sql, {'delta': delta, 'now': timezone.now(), 'product_id': product_id}))
+    if not rows:
+        raise InsufficientStock()
+    product = rows[0]
+
+    # Queryset updates bypass the rollup signals
+    before = product_contribution(product.quantity - delta, product.unit_cost, product.reorder_level)
+    after = product_contribution(product.quantity, product.unit_cost, product.reorder_level)
+    apply_deltas(product.tenant_id, diff(before, after))
+    invalidate_dashboard(product.tenant_id)
+    return product
+
+
+def change_warehouse_totals(warehouse_id, delta, level):
+    """Track a balance change in the warehouse's utilization and SKU count"""
+    from warehouse.models import Warehouse
+
+    if warehouse_id is None:
+        return
+    was_stocked = level.on_hand - delta > 0
+    Warehouse.objects.filter(pk=warehouse_id).update(
+        current_utilization=F('current_utilization') + delta,
+        total_skus=F('total_skus') + (int(level.on_hand > 0) - int(was_stocked)),
+    )
+
+
+def allocate_decrease(balances, quantity):
+    """
+    Split a product-wide decrease across its balances: the unassigned balance
+    first, then warehouses in ascending id order.
+
+    Args:
+        balances: dict - {warehouse_id: on_hand} for the product
+        quantity: int - Units to take (positive)
+
+    Returns:
+        list: (warehouse_id, units) pairs, in draw order
+
+    Raises:
+        InsufficientStock: If the balances hold fewer than `quantity` units
+    """
+    parts = []
+    order = sorted(balances, key=lambda warehouse_id: (warehouse_id is not None, warehouse_id or 0))
+    for warehouse_id in order:
+        if quantity <= 0:
+            break
+        units = min(balances[warehouse_id], quantity)
+        if units > 0:
+            parts.append((warehouse_id, units))
+            quantity -= units
+    if quantity > 0:
+        raise InsufficientStock()
+    return parts
+
+
+def apply_movement(movement):
+    """
+    Apply a saved StockMovement to the stock balances.
+    Must run in the transaction that inserted the movement.
+
+    Returns:
+        Product: The product row after the movement
+    """
+    changes = movement_changes(
+        movement.movement_type, movement.quantity,
+        movement.source_warehouse_id, movement.destination_warehouse_id,
+    )
+    # Product row first: the order record_quantity_change and
+    # apply_adjustments take their locks in, so they cannot deadlock
+    net = sum(delta for _, delta in changes)
+    product = change_product_quantity(movement.product_id, net) if net else None
+
+    for warehouse_id, delta in changes:
+        level = change_level(movement.tenant_id, movement.product_id, warehouse_id, delta)
+        change_warehouse_totals(warehouse_id, delta, level)
+
+    return product or Product.objects.get(pk=movement.product_id)
+
+
+def record_movement(product, movement_type, quantity, source_warehouse_id=None,
+                    destination_warehouse_id=None, reason='', performed_by=None, idempotency_key=None):
+    """
+    Record a stock movement and apply it to the balances atomically.
+
+    Args:
+        product: Product the movement is for
+        movement_type: str - 'in', 'out' or 'transfer'
+        quantity: int - Units moved (positive)
+        source_warehouse_id: Warehouse stock leaves ('out' and 'transfer')
+        destination_warehouse_id: Warehouse stock arrives at ('in' and 'transfer')
+        reason: str - Reason for the movement
+        performed_by: User recording the movement
+        idempotency_key: str - Client key; a movement already recorded with it is returned instead
+
+    Returns:
+        StockMovement: The movement; product.quantity and stock_status are updated in place.
+        `movement.replayed` is True if it was recorded by an earlier request.
+
+    Raises:
+        InsufficientStock: If the movement would take a balance below zero
+    """
+    if idempotency_key:
+        existing = find_replay(product, idempotency_key)
+        if existing:
+            return existing
+    try:
+        with transaction.atomic():
+            # Inserted first so a concurrent retry waits on the key's unique index
+            movement = StockMovement.objects.create(
+                tenant_id=product.tenant_id,
+                product=product,
+                quantity=quantity,
+                movement_type=movement_type,
+                source_warehouse_id=source_warehouse_id,
+                destination_warehouse_id=destination_warehouse_id,
+                reason=reason,
+                performed_by=performed_by,
+                idempotency_key=idempotency_key or None,
+            )
+            updated = apply_movement(movement)
+            product.quantity, product.stock_status = updated.quantity, updated.stock_status
+    except IntegrityError:
+        existing = idempotency_key and find_replay(product, idempotency_key)
+        if not existing:
+            raise
+        return existing
+    movement.replayed = False
+    return movement
+
+
+def find_replay(product, idempotency_key):
+    """
+    The movement already recorded under an idempotency key, if any.
+    Refreshes product.quantity so the caller can answer as the first request did.
+
+    Raises:
+        IdempotencyKeyReused: If the key belongs to another product's movement
+    """
+    movement = StockMovement.objects.filter(
+        tenant_id=product.tenant_id, idempotency_key=idempotency_key
+    ).first()
+    if movement is None:
+        return None
+    if movement.product_id != product.pk:
+        raise IdempotencyKeyReused()
+    product.quantity, product.stock_status = (
+        Product.objects.values_list('quantity', 'stock_status').get(pk=product.pk)
+    )
+    movement.replayed = True
+    return movement
+
+
+def record_quantity_change(product, new_quantity, warehouse_id=None, reason='', performed_by=None,
+                           idempotency_key=None):
+    """
+    Record the movement that takes a product's quantity to new_quantity.
+
+    The product row (and, for a decrease without a warehouse, its balances)
+    is locked while the difference is worked out, so a concurrent adjustment
+    cannot land between reading and applying it. Without a warehouse, a
+    decrease is spread over the balances by allocate_decrease().
+
+    Returns:
+        StockMovement: The movement (the first one, which carries the
+        idempotency key, if the decrease was spread), or None if the
+        quantity is unchanged
+
+    Raises:
+        InsufficientStock: If the product or the warehouse holds too little stock
+    """
+    if idempotency_key:
+        existing = find_replay(product, idempotency_key)
+        if existing:
+            return existing
+    with transaction.atomic():
+        current = Product.objects.select_for_update().values_list('quantity', flat=True).get(pk=product.pk)
+        product.quantity = current
+        delta = new_quantity - current
+        if not delta:
+            return None
+        if delta > 0:
+            return record_movement(
+                product, 'in', delta, destination_warehouse_id=warehouse_id,
+                reason=reason, performed_by=performed_by, idempotency_key=idempotency_key,
+            )
+        return remove_stock(
+            product, -delta, warehouse_id=warehouse_id,
+            reason=reason, performed_by=performed_by, idempotency_key=idempotency_key,
+        )
+
+
+def remove_stock(product, quantity, warehouse_id=None, reason='', performed_by=None, idempotency_key=None):
+    """
+    Record the movements taking `quantity` units out of a product's stock.
+
+    With a warehouse this is one 'out' movement from it. Without one, the
+    product row and its balances are locked and the units are drawn by
+    allocate_decrease(), so any stock the product holds can be removed.
+
+    Returns:
+        StockMovement: The movement (the first one, which carries the
+        idempotency key, if the removal was spread)
+
+    Raises:
+        InsufficientStock: If the warehouse, or the product as a whole, holds too little stock
+    """
+    if warehouse_id is not None:
+        return record_movement(
+            product, 'out', quantity, source_warehouse_id=warehouse_id,
+            reason=reason, performed_by=performed_by, idempotency_key=idempotency_key,
+        )
+    if idempotency_key:
+        existing = find_replay(product, idempotency_key)
+        if existing:
+            return existing
+    with transaction.atomic():
+        # Product row first, then its balances: the order apply_adjustments locks in
+        product.quantity = Product.objects.select_for_update().values_list('quantity', flat=True).get(pk=product.pk)
+        balances = dict(
+            StockLevel.objects.select_for_update().filter(product_id=product.pk)
+            .order_by('pk').values_list('warehouse_id', 'on_hand')
+        )
+        movements = []
+        for index, (source_id, units) in enumerate(allocate_decrease(balances, quantity)):
+            movement = record_movement(
+                product, 'out', units, source_warehouse_id=source_id,
+                reason=reason, performed_by=performed_by,
+                idempotency_key=idempotency_key if not index else None,
+            )
+            if movement.replayed:
+                # Recorded by a concurrent request with the same key
+                return movement
+            movements.append(movement)
+        return movements[0]
+
+
+def apply_adjustments(tenant_id, adjustments, performed_by=None):
+    """
+    Apply many stock adjustments in one transaction.
+
+    Lines are resolved in order against locked balances, so a line that
+    would take a balance below zero fails on its own without affecting the
+    others. A 'set' or 'remove' line without a warehouse that lowers the
+    total is spread over the product's balances by allocate_decrease(). Changes are then written with one set-based UPDATE per table and
+    a single bulk insert of the movements.
+
+    Args:
+        tenant_id: Tenant the products must belong to
+        adjustments: list - Validated StockAdjustmentSerializer data
+        performed_by: User recording the adjustments
+
+    Returns:
+        list: One result per line: {'status': 'applied'|'unchanged'|'error', ...}
+    """
+    from api.caching import invalidate_dashboard
+    from api.metrics import apply_deltas, diff, product_contribution
+    from warehouse.models import Warehouse
+
+    results = []
+    movements = []
+    if not adjustments:
+        return results
+
+    with transaction.atomic():
+        # Lock products, then balances, in id order
+        products = {
+            product.pk: product
+            for product in Product.objects.select_for_update()
+            .filter(tenant_id=tenant_id, pk__in={a['product_id'] for a in adjustments})
+            .order_by('pk')
+        }
+        levels = {
+            (level.product_id, level.warehouse_id): level
+            for level in StockLevel.objects.select_for_update().filter(product_id__in=products).order_by('pk')
+        }
+        warehouse_ids = set(
+            Warehouse.objects.filter(
+                tenant_id=tenant_id, pk__in={a.get('warehouse_id') for a in adjustments} - {None}
+            ).values_list('pk', flat=True)
+        )
+
+        quantities = {pk: product.quantity for pk, product in products.items()}
+        on_hand = {key: level.on_hand for key, level in levels.items()}
+
+        for index, adjustment in enumerate(adjustments):
+            product = products.get(adjustment['product_id'])
+            warehouse_id = adjustment.get('warehouse_id')
+            if product is None:
+                results.append({'status': 'error', 'error': "Product not found"})
+                continue
+            if warehouse_id is not None and warehouse_id not in warehouse_ids:
+                results.append({'status': 'error', 'error': "Warehouse not found"})
+                continue
+
+            quantity = adjustment['quantity']
+            if adjustment['adjustment_type'] == 'add':
+                delta = quantity
+            elif adjustment['adjustment_type'] == 'remove':
+                delta = -quantity
+            else:  # set
+                delta = quantity - quantities[product.pk]
+
+            if not delta:
+                results.append({'status': 'unchanged', 'quantity': quantities[product.pk]})
+                continue
+
+            parts = [(warehouse_id, delta)]
+            if delta < 0 and warehouse_id is None:
+                balances = {
+                    level_warehouse_id: units
+                    for (product_id, level_warehouse_id), units in on_hand.items()
+                    if product_id == product.pk
+                }
+                try:
+                    parts = [(source_id, -units) for source_id, units in allocate_decrease(balances, -delta)]
+                except InsufficientStock:
+                    parts = None
+            if parts is None or any(on_hand.get((product.pk, part_id), 0) + part < 0 for part_id, part in parts):
+                results.append({'status': 'error', 'error': "Insufficient stock"})
+                continue
+
+            for part_id, part in parts:
+                key = (product.pk, part_id)
+                on_hand[key] = on_hand.get(key, 0) + part
+                movements.append((index, StockMovement(
+                    tenant_id=product.tenant_id,
+                    product=product,
+                    quantity=abs(part),
+                    movement_type='in' if part > 0 else 'out',
+                    destination_warehouse_id=part_id if part > 0 else None,
+                    source_warehouse_id=part_id if part < 0 else None,
+                    reason=adjustment.get('reason', ''),
+                    performed_by=performed_by,
+                )))
+            quantities[product.pk] += delta
+            results.append({'status': 'applied', 'quantity': quantities[product.pk]})
+
+        if not movements:
+            return results
+
+        level_changes = {key: value - (levels[key].on_hand if key in levels else 0) for key, value in on_hand.items()}
+        level_changes = {key: delta for key, delta in level_changes.items() if delta}
+        _bulk_add(
+            LEVEL_BULK_UPDATE_SQL.format(table=StockLevel._meta.db_table),
+            *zip(*[(levels[key].pk, delta) for key, delta in level_changes.items() if key in levels])
+        )
+        StockLevel.objects.bulk_create([
+            StockLevel(
+                tenant_id=products[product_id].tenant_id, product_id=product_id,
+                warehouse_id=warehouse_id, on_hand=delta,
+            )
+            for (product_id, warehouse_id), delta in level_changes.items()
+            if (product_id, warehouse_id) not in levels
+        ])
+
+        warehouse_changes = {}
+        for (product_id, warehouse_id), delta in level_changes.items():
+            if warehouse_id is None:
+                continue
+            was_stocked = on_hand[product_id, warehouse_id] - delta > 0
+            skus = int(on_hand[product_id, warehouse_id] > 0) - int(was_stocked)
+            total, sku_total = warehouse_changes.get(warehouse_id, (0, 0))
+            warehouse_changes[warehouse_id] = (total + delta, sku_total + skus)
+        _bulk_add(
+            WAREHOUSE_BULK_UPDATE_SQL.format(table=Warehouse._meta.db_table),
+            *zip(*[(pk, delta, skus) for pk, (delta, skus) in warehouse_changes.items()]),
+            with_timestamp=False,
+        )
+
+        product_changes = {pk: quantities[pk] - product.quantity for pk, product in products.items()}
+        product_changes = {pk: delta for pk, delta in product_changes.items() if delta}
+        _bulk_add(
+            PRODUCT_BULK_UPDATE_SQL.format(table=Product._meta.db_table),
+            *zip(*product_changes.items())
+        )
+
+        # Set-based writes bypass the rollup signals
+        metric_deltas = {}
+        for pk in product_changes:
+            product = products[pk]
+            before = product_contribution(product.quantity, product.unit_cost, product.reorder_level)
+            after = product_contribution(quantities[pk], product.unit_cost, product.reorder_level)
+            for metric, delta in diff(before, after).items():
+                metric_deltas[metric] = metric_deltas.get(metric, 0) + delta
+        apply_deltas(tenant_id, metric_deltas)
+        invalidate_dashboard(tenant_id)
+
+        StockMovement.objects.bulk_create([movement for _, movement in movements], batch_size=1000)
+
+    for index, movement in movements:
+        # A spread decrease reports its first movement
+        results[index].setdefault('movement_id', movement.pk)
+    return results
+
+
+def _bulk_add(sql, *arrays, with_timestamp=True):
+    """Run one of the set-based UPDATEs for parallel arrays of ids and deltas"""
+    if not arrays:
+        return
+    params = [list(array) for array in arrays]
+    if with_timestamp:
+        params.insert(0, timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
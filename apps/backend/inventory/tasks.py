@@ -0,0 +1,32 @@
+import logging
+
+from celery import shared_task
+
+from inventory import history
+from inventory.models import StockLevel
+
+logger = logging.getLogger(__name__)
+
+
+def _tenant_ids():
+    return StockLevel.objects.order_by().values_list('tenant_id', flat=True).distinct()
+
+
+@shared_task
+def write_stock_checkpoints():
+    """Checkpoint the stock balances that moved since each tenant's last checkpoint"""
+    boundary = history.checkpoint_boundary()
+    written = sum(history.write_checkpoints(tenant_id, until=boundary) for tenant_id in _tenant_ids())
+    return f"Wrote {written} stock checkpoints up to {boundary:%Y-%m-%d}"
+
+
+@shared_task
+def verify_stock_checkpoints():
+    """Replay movements against the stored checkpoints and log any drift"""
+    drifted = 0
+    for tenant_id in _tenant_ids():
+        drift = history.find_checkpoint_drift(tenant_id)
+        if drift:
+            drifted += 1
+            logger.warning("Stock checkpoints for tenant %s drifted at %d point(s)", tenant_id, len(drift))
+    return f"Verified stock checkpoints, {drifted} tenant(s) with drift"
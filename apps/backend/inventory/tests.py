@@ -1,3 +1,383 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from inventory.history import checkpoint_boundary, find_checkpoint_drift, stock_as_of, write_checkpoints
+from inventory.importer import ImportFileError, import_products
+from inventory.models import Product, StockCheckpoint, StockLevel, StockMovement
+from inventory.stock import InsufficientStock, record_movement, record_quantity_change, remove_stock
+from inventory.views import ProductViewSet
+from tenants.models import Tenant
+from users.models import User
+from warehouse.models import Warehouse
+
+
+class StockLedgerTests(TestCase):
+    """Movements keep StockLevel, Product.quantity and the warehouse counters in step"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Ledger Co", code="ledger-co")
+        cls.north = Warehouse.objects.create(tenant_id=cls.tenant.id, warehouse_code="WH-N", name="North")
+        cls.south = Warehouse.objects.create(tenant_id=cls.tenant.id, warehouse_code="WH-S", name="South")
+        cls.product = Product.objects.create(
+            tenant_id=cls.tenant.id, product_code="PRD-001", sku="SKU-1", name="Widget"
+        )
+
+    def balances(self):
+        return dict(StockLevel.objects.filter(product=self.product).values_list('warehouse_id', 'on_hand'))
+
+    def test_movements_update_balances_and_totals(self):
+        record_movement(self.product, 'in', 10, destination_warehouse_id=self.north.pk)
+        record_movement(self.product, 'transfer', 4, source_warehouse_id=self.north.pk,
+                        destination_warehouse_id=self.south.pk)
+        record_movement(self.product, 'out', 1, source_warehouse_id=self.south.pk)
+
+        self.assertEqual(self.balances(), {self.north.pk: 6, self.south.pk: 3})
+        self.assertEqual(self.product.quantity, 9)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 9)
+        self.north.refresh_from_db()
+        self.assertEqual((self.north.current_utilization, self.north.total_skus), (6, 1))
+
+    def test_decrease_below_zero_is_rejected(self):
+        record_movement(self.product, 'in', 2, destination_warehouse_id=self.north.pk)
+
+        with self.assertRaises(InsufficientStock):
+            record_movement(self.product, 'out', 3, source_warehouse_id=self.north.pk)
+
+        self.assertEqual(self.balances(), {self.north.pk: 2})
+        self.assertEqual(StockMovement.objects.filter(product=self.product).count(), 1)
+
+    def test_replayed_key_returns_original_movement(self):
+        first = record_movement(self.product, 'in', 5, idempotency_key="retry-1")
+        again = record_movement(self.product, 'in', 5, idempotency_key="retry-1")
+
+        self.assertFalse(first.replayed)
+        self.assertTrue(again.replayed)
+        self.assertEqual(again.pk, first.pk)
+        self.assertEqual(self.product.quantity, 5)
+        self.assertEqual(StockMovement.objects.filter(product=self.product).count(), 1)
+
+    def test_quantity_decrease_spreads_over_balances(self):
+        record_movement(self.product, 'in', 3)
+        record_movement(self.product, 'in', 5, destination_warehouse_id=self.north.pk)
+        record_movement(self.product, 'in', 5, destination_warehouse_id=self.south.pk)
+
+        # Unassigned stock first, then warehouses in id order
+        movement = record_quantity_change(self.product, 4, idempotency_key="count-1")
+
+        self.assertEqual(self.balances(), {None: 0, self.north.pk: 0, self.south.pk: 4})
+        self.assertEqual(self.product.quantity, 4)
+        outs = StockMovement.objects.filter(product=self.product, movement_type='out').order_by('pk')
+        self.assertEqual(
+            [(out.source_warehouse_id, out.quantity) for out in outs],
+            [(None, 3), (self.north.pk, 5), (self.south.pk, 1)],
+        )
+        self.assertEqual(movement.pk, outs[0].pk)
+        self.assertEqual(movement.idempotency_key, "count-1")
+        self.north.refresh_from_db()
+        self.assertEqual((self.north.current_utilization, self.north.total_skus), (0, 0))
+
+        # Replaying the key changes nothing
+        self.assertTrue(record_quantity_change(self.product, 4, idempotency_key="count-1").replayed)
+        self.assertEqual(outs.count(), 3)
+
+    def test_remove_without_warehouse_draws_from_warehouses(self):
+        record_movement(self.product, 'in', 2, destination_warehouse_id=self.north.pk)
+        record_movement(self.product, 'in', 4, destination_warehouse_id=self.south.pk)
+
+        movement = remove_stock(self.product, 5, idempotency_key="pick-1")
+
+        self.assertEqual(self.balances(), {self.north.pk: 0, self.south.pk: 1})
+        self.assertEqual(self.product.quantity, 1)
+        self.assertEqual((movement.source_warehouse_id, movement.quantity), (self.north.pk, 2))
+        self.assertTrue(remove_stock(self.product, 5, idempotency_key="pick-1").replayed)
+
+        with self.assertRaises(InsufficientStock):
+            remove_stock(self.product, 2)
+        self.assertEqual(self.balances(), {self.north.pk: 0, self.south.pk: 1})
+
+
+class AdjustStockIdempotencyTests(TestCase):
+    """The adjust_stock action applies a keyed request once and refuses keys reused elsewhere"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Adjust Co", code="adjust-co")
+        cls.user = User.objects.create(email="adjust@example.com")
+        cls.widget = Product.objects.create(tenant_id=cls.tenant.id, product_code="PRD-001", sku="SKU-1", name="Widget")
+        cls.gadget = Product.objects.create(tenant_id=cls.tenant.id, product_code="PRD-002", sku="SKU-2", name="Gadget")
+
+    def adjust(self, product, key, **data):
+        body = {'product_id': product.pk, 'adjustment_type': 'add', 'quantity': 5, **data}
+        request = APIRequestFactory().post(
+            f'/api/products/{product.pk}/adjust_stock/', body, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+        force_authenticate(request, user=self.user)
+        request.tenant = self.tenant
+        return ProductViewSet.as_view({'post': 'adjust_stock'})(request, pk=product.pk)
+
+    def test_retry_is_applied_once(self):
+        first = self.adjust(self.widget, "order-42")
+        retry = self.adjust(self.widget, "order-42")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn('Idempotent-Replayed', first)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['quantity'], 5)
+        self.assertEqual(StockMovement.objects.filter(idempotency_key="order-42").count(), 1)
+
+    def test_key_reused_for_another_product(self):
+        self.adjust(self.widget, "order-43")
+        response = self.adjust(self.gadget, "order-43")
+
+        self.assertEqual(response.status_code, 409)
+        self.gadget.refresh_from_db()
+        self.assertEqual(self.gadget.quantity, 0)
+
+    def test_insufficient_stock(self):
+        response = self.adjust(self.widget, "order-44", adjustment_type='remove')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(StockMovement.objects.filter(idempotency_key="order-44").exists())
+
+    def test_remove_without_warehouse_uses_warehouse_stock(self):
+        warehouse = Warehouse.objects.create(tenant_id=self.tenant.id, warehouse_code="WH-1", name="Main")
+        record_movement(self.widget, 'in', 8, destination_warehouse_id=warehouse.pk)
+
+        response = self.adjust(self.widget, "order-45", adjustment_type='remove', quantity=3)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['quantity'], 5)
+        self.assertEqual(StockLevel.objects.get(product=self.widget, warehouse=warehouse).on_hand, 5)
+
+
+class BulkAdjustTests(TestCase):
+    """bulk_adjust applies the valid lines and reports the others in request order"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Bulk Co", code="bulk-co")
+        cls.user = User.objects.create(email="bulk@example.com")
+        cls.warehouse = Warehouse.objects.create(tenant_id=cls.tenant.id, warehouse_code="WH-1", name="Main")
+        cls.widget = Product.objects.create(tenant_id=cls.tenant.id, product_code="PRD-001", sku="SKU-1", name="Widget")
+        cls.gadget = Product.objects.create(tenant_id=cls.tenant.id, product_code="PRD-002", sku="SKU-2", name="Gadget")
+        record_movement(cls.gadget, 'in', 3, destination_warehouse_id=cls.warehouse.pk)
+
+    def bulk_adjust(self, lines):
+        request = APIRequestFactory().post('/api/products/bulk_adjust/', lines, format='json')
+        force_authenticate(request, user=self.user)
+        request.tenant = self.tenant
+        return ProductViewSet.as_view({'post': 'bulk_adjust'})(request)
+
+    def test_partial_failure(self):
+        response = self.bulk_adjust([
+            {'product_id': self.widget.pk, 'adjustment_type': 'add', 'quantity': 5, 'warehouse_id': self.warehouse.pk},
+            {'product_id': self.gadget.pk, 'adjustment_type': 'remove', 'quantity': 10, 'warehouse_id': self.warehouse.pk},
+            {'product_id': self.gadget.pk, 'adjustment_type': 'add'},
+            {'product_id': self.widget.pk, 'adjustment_type': 'set', 'quantity': 5},
+            {'product_id': 0, 'adjustment_type': 'add', 'quantity': 1},
+            {'product_id': self.gadget.pk, 'adjustment_type': 'remove', 'quantity': 2, 'warehouse_id': self.warehouse.pk},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.data['applied'], response.data['unchanged'], response.data['failed']), (2, 1, 3)
+        )
+        results = response.data['results']
+        self.assertEqual([result['index'] for result in results], list(range(6)))
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['applied', 'error', 'error', 'unchanged', 'error', 'applied'],
+        )
+        self.assertEqual(results[1]['error'], "Insufficient stock")
+        self.assertIn('quantity', results[2]['errors'])
+        self.assertEqual(results[4]['error'], "Product not found")
+        self.assertEqual(results[5]['quantity'], 1)
+
+        self.assertEqual(
+            dict(StockLevel.objects.filter(warehouse=self.warehouse).values_list('product_id', 'on_hand')),
+            {self.widget.pk: 5, self.gadget.pk: 1},
+        )
+        self.warehouse.refresh_from_db()
+        self.assertEqual((self.warehouse.current_utilization, self.warehouse.total_skus), (6, 2))
+        # Each applied line records its own movement
+        self.assertEqual(
+            StockMovement.objects.get(pk=results[0]['movement_id']).product_id, self.widget.pk
+        )
+        self.assertEqual(StockMovement.objects.filter(tenant_id=self.tenant.id).count(), 3)
+
+    def test_remove_without_warehouse_uses_warehouse_stock(self):
+        response = self.bulk_adjust([
+            {'product_id': self.gadget.pk, 'adjustment_type': 'remove', 'quantity': 2},
+            {'product_id': self.gadget.pk, 'adjustment_type': 'remove', 'quantity': 2},
+        ])
+
+        self.assertEqual([result['status'] for result in response.data['results']], ['applied', 'error'])
+        self.assertEqual(response.data['results'][0]['quantity'], 1)
+        self.assertEqual(StockLevel.objects.get(product=self.gadget, warehouse=self.warehouse).on_hand, 1)
+        self.gadget.refresh_from_db()
+        self.assertEqual(self.gadget.quantity, 1)
+
+    def test_set_decrease_spreads_over_balances(self):
+        record_movement(self.gadget, 'in', 2)
+
+        response = self.bulk_adjust([{'product_id': self.gadget.pk, 'adjustment_type': 'set', 'quantity': 1}])
+
+        self.assertEqual(response.data['results'][0]['quantity'], 1)
+        self.assertEqual(
+            dict(StockLevel.objects.filter(product=self.gadget).values_list('warehouse_id', 'on_hand')),
+            {None: 0, self.warehouse.pk: 1},
+        )
+        self.gadget.refresh_from_db()
+        self.assertEqual(self.gadget.quantity, 1)
+
+
+class ProductImportTests(TestCase):
+    """Imports upsert on SKU and book quantities through the stock ledger"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Import Co", code="import-co")
+        cls.user = User.objects.create(email="import@example.com")
+        # Numbered from the product sequence, as the imported products will be
+        cls.existing = Product.objects.create(tenant_id=cls.tenant.id, sku="SKU-1", name="Old name")
+
+    def run_import(self, content, filename='catalog.csv'):
+        return import_products(self.tenant, io.BytesIO(content.encode()), filename, user=self.user)
+
+    def test_creates_and_updates_on_sku(self):
+        summary = self.run_import(
+            "SKU,Name,Quantity,Unit_Cost\n"
+            "SKU-1,Widget,4,2.50\n"
+            "SKU-2,Gadget,7,\n"
+            ",Missing SKU,1,\n"
+            "SKU-2,Gadget v2,9,\n"
+        )
+
+        self.assertEqual(summary['rows'], 4)
+        self.assertEqual((summary['created'], summary['updated'], summary['failed']), (1, 1, 1))
+        self.assertEqual(summary['errors'][0]['row'], 4)
+        self.assertIn('sku', summary['errors'][0]['errors'])
+
+        products = {product.sku: product for product in Product.objects.filter(tenant_id=self.tenant.id)}
+        self.assertEqual(set(products), {"SKU-1", "SKU-2"})
+        self.assertEqual(products["SKU-1"].pk, self.existing.pk)
+        self.assertEqual(products["SKU-1"].product_code, "PRD-001")
+        self.assertEqual((products["SKU-1"].name, products["SKU-1"].quantity), ("Widget", 4))
+        # A SKU repeated in the file keeps its last row
+        self.assertEqual((products["SKU-2"].name, products["SKU-2"].quantity), ("Gadget v2", 9))
+        self.assertTrue(products["SKU-2"].product_code)
+        self.assertEqual(
+            StockLevel.objects.get(product=products["SKU-2"], warehouse__isnull=True).on_hand, 9
+        )
+
+    def test_omitted_quantity_keeps_stock(self):
+        record_movement(self.existing, 'in', 6)
+
+        summary = self.run_import("sku,name\nSKU-1,Renamed\n")
+
+        self.assertEqual(summary['updated'], 1)
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.name, self.existing.quantity), ("Renamed", 6))
+
+    def test_unbookable_stock_is_reported(self):
+        # Quantity recorded before the ledger existed, with no balance behind it
+        Product.objects.filter(pk=self.existing.pk).update(quantity=5)
+
+        summary = self.run_import("sku,name,quantity\nSKU-1,Widget,2\n")
+
+        self.assertEqual((summary['updated'], summary['failed']), (0, 1))
+        self.assertEqual(summary['errors'][0]['row'], 2)
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.name, self.existing.quantity), ("Widget", 5))
+
+    def test_unsupported_file_type(self):
+        with self.assertRaises(ImportFileError):
+            self.run_import("sku,name\n", filename='catalog.txt')
+
+
+class StockCheckpointTests(TestCase):
+    """Historical balances from checkpoints match a replay of the movements"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="History Co", code="history-co")
+        cls.warehouse = Warehouse.objects.create(tenant_id=cls.tenant.id, warehouse_code="WH-1", name="Main")
+        cls.product = Product.objects.create(tenant_id=cls.tenant.id, product_code="PRD-001", sku="SKU-1", name="Widget")
+        cls.day = checkpoint_boundary() - timedelta(days=3)
+
+        # 10 in the day before the baseline, +5 on the first day after it, -3 on the second
+        for movement_type, quantity, at in (
+            ('in', 10, cls.day - timedelta(hours=20)),
+            ('in', 5, cls.day + timedelta(hours=2)),
+            ('out', 3, cls.day + timedelta(days=1, hours=2)),
+        ):
+            movement = record_movement(
+                cls.product, movement_type, quantity,
+                source_warehouse_id=cls.warehouse.pk if movement_type == 'out' else None,
+                destination_warehouse_id=cls.warehouse.pk if movement_type == 'in' else None,
+            )
+            StockMovement.objects.filter(pk=movement.pk).update(timestamp=at)
+
+        # The first run records the baseline, the next one the days since
+        write_checkpoints(cls.tenant.id, until=cls.day)
+        write_checkpoints(cls.tenant.id, until=cls.day + timedelta(days=2))
+
+    def balance(self, at):
+        return stock_as_of(self.tenant.id, at).get((self.product.pk, self.warehouse.pk), 0)
+
+    def test_checkpoints(self):
+        checkpoints = StockCheckpoint.objects.filter(product=self.product).order_by('as_of')
+        self.assertEqual(
+            [(checkpoint.as_of, checkpoint.on_hand) for checkpoint in checkpoints],
+            [(self.day, 10), (self.day + timedelta(days=1), 15), (self.day + timedelta(days=2), 12)],
+        )
+        # Nothing new to checkpoint
+        self.assertEqual(write_checkpoints(self.tenant.id, until=self.day + timedelta(days=2)), 0)
+
+    def test_stock_as_of(self):
+        self.assertEqual(self.balance(self.day - timedelta(days=1)), 0)
+        self.assertEqual(self.balance(self.day - timedelta(hours=1)), 10)
+        self.assertEqual(self.balance(self.day + timedelta(hours=3)), 15)
+        self.assertEqual(self.balance(self.day + timedelta(days=1, hours=3)), 12)
+        self.assertEqual(self.balance(self.day + timedelta(days=5)), 12)
+
+    def test_drift(self):
+        self.assertEqual(find_checkpoint_drift(self.tenant.id), [])
+
+        as_of = self.day + timedelta(days=1)
+        StockCheckpoint.objects.filter(product=self.product, as_of=as_of).update(on_hand=14)
+        self.assertEqual(
+            find_checkpoint_drift(self.tenant.id),
+            [(self.product.pk, self.warehouse.pk, as_of, 14, 15)],
+        )
+
+
+class StockCheckpointBaselineTests(TransactionTestCase):
+    """The first checkpoint run works back from StockLevel in its own transaction"""
+
+    def test_baseline_excludes_later_movements(self):
+        tenant = Tenant.objects.create(name="Baseline Co", code="baseline-co")
+        warehouse = Warehouse.objects.create(tenant_id=tenant.id, warehouse_code="WH-1", name="Main")
+        product = Product.objects.create(tenant_id=tenant.id, product_code="PRD-001", sku="SKU-1", name="Widget")
+        boundary = checkpoint_boundary()
+
+        record_movement(product, 'in', 8, destination_warehouse_id=warehouse.pk)
+        record_movement(product, 'in', 2)
+        StockMovement.objects.filter(product=product).update(timestamp=boundary - timedelta(hours=1))
+        # After the boundary, so backed out of the baseline
+        record_movement(product, 'in', 3, destination_warehouse_id=warehouse.pk)
+        record_movement(product, 'transfer', 1, source_warehouse_id=warehouse.pk)
+
+        self.assertEqual(write_checkpoints(tenant.id, until=boundary), 2)
+
+        baseline = dict(
+            StockCheckpoint.objects.filter(product=product, as_of=boundary).values_list('warehouse_id', 'on_hand')
+        )
+        self.assertEqual(baseline, {warehouse.pk: 8, None: 2})
+        self.assertEqual(find_checkpoint_drift(tenant.id), [])
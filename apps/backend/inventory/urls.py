@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, StockMovementViewSet
+from .views import ProductViewSet, StockMovementViewSet, StockLevelViewSet, StockHistoryViewSet
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
 router.register(r'stock-movements', StockMovementViewSet, basename='stockmovement')
+router.register(r'stock-levels', StockLevelViewSet, basename='stocklevel')
+router.register(r'stock-history', StockHistoryViewSet, basename='stockhistory')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,14 +1,40 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db import models
-from .models import Product, StockMovement
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import (
+    Product, StockLevel, StockMovement,
+    STOCK_STATUS_IN, STOCK_STATUS_LOW, STOCK_STATUS_OUT
+)
 from .serializers import (
     ProductSerializer, ProductCreateUpdateSerializer,
-    StockMovementSerializer, StockAdjustmentSerializer
+    StockMovementSerializer, StockAdjustmentSerializer, StockLevelSerializer
+)
+from .history import ALL_WAREHOUSES, month_end, stock_as_of, stock_valuation
+from .importer import ImportFileError, import_products
+from .stock import (
+    IdempotencyKeyReused, InsufficientStock,
+    apply_adjustments, record_movement, record_quantity_change, remove_stock
 )
 from tenants.permissions import TenantPermissionMixin
+from common.mixins import StreamingExportMixin
+from common.pagination import TimelineCursorPagination
+from common.search import TrigramSearchFilter
+
+# ?stock_status= values accepted by ProductViewSet
+STOCK_STATUS_FILTERS = {
+    'in': STOCK_STATUS_IN,
+    'low': STOCK_STATUS_LOW,
+    'out': STOCK_STATUS_OUT,
+}
+
+# Upper bound on lines per bulk_adjust request
+BULK_ADJUST_MAX_LINES = 10000
 
 
 class TenantScopedMixin:
@@ -33,7 +59,7 @@ class TenantScopedMixin:
         serializer.save(tenant_id=tenant.id)
 
 
-class ProductViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+class ProductViewSet(TenantScopedMixin, StreamingExportMixin, viewsets.ModelViewSet):
     """
     ViewSet for Product management.
     
@@ -44,19 +70,65 @@ class ProductViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     partial_update: Partially update product
     destroy: Delete product
     adjust_stock: Custom action to adjust stock levels
+    bulk_adjust: Apply many stock adjustments in one request
+    import_catalog: Import products from a CSV/XLSX upload (POST products/import/)
+    export: Stream the filtered product list as CSV/NDJSON
     """
     queryset = Product.objects.select_related('supplier').all()
     permission_classes = [permissions.IsAuthenticated]  # Simple authentication requirement
+    # Search is served by the trigram indexes on these fields and ranked by similarity
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'status', 'supplier']
     search_fields = ['name', 'sku', 'product_code', 'description']
     ordering_fields = ['name', 'quantity', 'unit_cost', 'created_at']
     ordering = ['-created_at']
+    # Column names match the import format so exports can be re-imported
+    export_filename = 'products'
+    export_fields = [
+        ('id', 'id'),
+        ('product_code', 'product_code'),
+        ('sku', 'sku'),
+        ('name', 'name'),
+        ('description', 'description'),
+        ('category', 'category'),
+        ('unit', 'unit'),
+        ('unit_cost', 'unit_cost'),
+        ('selling_price', 'selling_price'),
+        ('quantity', 'quantity'),
+        ('reorder_level', 'reorder_level'),
+        ('status', 'status'),
+        ('stock_status', 'stock_status'),
+        ('supplier_code', 'supplier__supplier_code'),
+        ('supplier_name', 'supplier__name'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return ProductCreateUpdateSerializer
         return ProductSerializer
     
+    def perform_create(self, serializer):
+        """Create the product and book its initial quantity as opening stock"""
+        tenant = getattr(self.request, "tenant", None)
+        if not tenant:
+            return Response(
+                {"error": "No tenant specified"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        quantity = serializer.validated_data.pop('quantity', 0)
+        product = serializer.save(tenant_id=tenant.id)
+        if quantity:
+            record_movement(product, 'in', quantity, reason="Opening stock", performed_by=self.request.user)
+    
+    def perform_update(self, serializer):
+        """Record quantity edits as stock movements instead of overwriting the total"""
+        quantity = serializer.validated_data.pop('quantity', None)
+        product = serializer.save()
+        if quantity is not None:
+            record_quantity_change(product, quantity, reason="Quantity edited", performed_by=self.request.user)
+    
     def get_queryset(self):
         """
         Override to add custom stock status filtering
@@ -64,12 +136,9 @@ class ProductViewSet(TenantScopedMixin, viewsets.ModelViewSet):
         queryset = super().get_queryset()
         stock_status = self.request.query_params.get('stock_status')
         
-        if stock_status == 'low':
-            # Products with quantity > 0 and quantity <= reorder_level
-            queryset = queryset.filter(quantity__gt=0, quantity__lte=models.F('reorder_level'))
-        elif stock_status == 'out':
-            # Products with quantity = 0
-            queryset = queryset.filter(quantity=0)
+        # Served by the (tenant_id, stock_status) and partial low/out-of-stock indexes
+        if stock_status in STOCK_STATUS_FILTERS:
+            queryset = queryset.filter(stock_status=STOCK_STATUS_FILTERS[stock_status])
         
         return queryset
     
@@ -85,6 +154,9 @@ class ProductViewSet(TenantScopedMixin, viewsets.ModelViewSet):
             "warehouse_id": 1,  # optional
             "reason": "Received shipment"
         }
+        
+        Send an Idempotency-Key header to make retries safe: a repeated key
+        returns the product without applying the adjustment again.
         """
         product = self.get_object()
         serializer = StockAdjustmentSerializer(data=request.data)
@@ -93,47 +165,149 @@ class ProductViewSet(TenantScopedMixin, viewsets.ModelViewSet):
             data = serializer.validated_data
             adjustment_type = data['adjustment_type']
             quantity_change = data['quantity']
+            warehouse_id = data.get('warehouse_id')
+            reason = data.get('reason', '')
             
-            # Adjust quantity based on type
-            if adjustment_type == 'add':
-                product.quantity += quantity_change
-                movement_type = 'in'
-            elif adjustment_type == 'remove':
-                product.quantity -= quantity_change
-                if product.quantity < 0:
-                    return Response(
-                        {"error": "Insufficient stock"},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                movement_type = 'out'
-            else:  # set
-                product.quantity = quantity_change
-                movement_type = 'in' if quantity_change > product.quantity else 'out'
-            
-            product.save()
+            # Retries carrying the same key are applied once
+            idempotency_key = request.headers.get('Idempotency-Key') or None
             
-            # Create stock movement record
-            StockMovement.objects.create(
-                tenant_id=request.tenant.id,
-                product=product,
-                quantity=quantity_change,
-                movement_type=movement_type,
-                reason=data.get('reason', ''),
-                performed_by=request.user,
-                destination_warehouse_id=data.get('warehouse_id')
-            )
+            # Movements update the warehouse balance and product quantity together
+            # with conditional UPDATEs; nothing is read and saved back
+            try:
+                if adjustment_type == 'add':
+                    movement = record_movement(
+                        product, 'in', quantity_change, destination_warehouse_id=warehouse_id,
+                        reason=reason, performed_by=request.user, idempotency_key=idempotency_key
+                    )
+                elif adjustment_type == 'remove':
+                    # Without a warehouse the units are drawn from any balance holding them
+                    movement = remove_stock(
+                        product, quantity_change, warehouse_id=warehouse_id,
+                        reason=reason, performed_by=request.user, idempotency_key=idempotency_key
+                    )
+                else:  # set
+                    movement = record_quantity_change(
+                        product, quantity_change, warehouse_id=warehouse_id,
+                        reason=reason, performed_by=request.user, idempotency_key=idempotency_key
+                    )
+            except InsufficientStock:
+                return Response(
+                    {"error": "Insufficient stock"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            except IdempotencyKeyReused:
+                return Response(
+                    {"error": "Idempotency-Key was already used for another product"},
+                    status=status.HTTP_409_CONFLICT
+                )
             
+            if movement is not None and movement.replayed:
+                return Response(ProductSerializer(product).data, headers={'Idempotent-Replayed': 'true'})
             return Response(ProductSerializer(product).data)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    
+    @action(detail=False, methods=['post'])
+    def bulk_adjust(self, request):
+        """
+        Apply many stock adjustments in one transaction.
+        
+        Body: a list of adjustments (or {"adjustments": [...]}), each
+        {
+            "product_id": 1,
+            "adjustment_type": "add|remove|set",
+            "quantity": 100,
+            "warehouse_id": 1,  # optional
+            "reason": "Cycle count"
+        }
+        
+        Lines that fail validation or would leave a balance negative are
+        reported and skipped; the rest are applied. Results are returned in
+        request order.
+        """
+        tenant = getattr(request, "tenant", None)
+        if not tenant:
+            return Response(
+                {"error": "No tenant specified"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        lines = request.data.get('adjustments') if isinstance(request.data, dict) else request.data
+        if not isinstance(lines, list) or not lines:
+            return Response(
+                {"error": "Expected a non-empty list of adjustments"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(lines) > BULK_ADJUST_MAX_LINES:
+            return Response(
+                {"error": f"At most {BULK_ADJUST_MAX_LINES} adjustments per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # One serializer validates every line so each gets its own errors
+        validator = StockAdjustmentSerializer()
+        valid = {}
+        results = [None] * len(lines)
+        for index, line in enumerate(lines):
+            try:
+                valid[index] = validator.run_validation(line)
+            except ValidationError as exc:
+                results[index] = {'status': 'error', 'errors': exc.detail}
+        
+        applied = apply_adjustments(tenant.id, list(valid.values()), performed_by=request.user)
+        for index, result in zip(valid, applied):
+            results[index] = result
+        
+        for index, (line, result) in enumerate(zip(lines, results)):
+            product_id = line.get('product_id') if isinstance(line, dict) else None
+            results[index] = {'index': index, 'product_id': product_id, **result}
+        
+        return Response({
+            'applied': sum(result['status'] == 'applied' for result in results),
+            'unchanged': sum(result['status'] == 'unchanged' for result in results),
+            'failed': sum(result['status'] == 'error' for result in results),
+            'results': results,
+        })
 
-class StockMovementViewSet(TenantScopedMixin, viewsets.ReadOnlyModelViewSet):
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_catalog(self, request):
+        """
+        Import or update products from an uploaded CSV or XLSX file.
+        
+        Multipart field "file". The first row names the columns: sku and
+        name are required; description, category, unit, unit_cost,
+        selling_price, quantity, reorder_level, status and supplier_code are
+        optional. Existing products are matched on SKU and updated.
+        """
+        tenant = getattr(request, "tenant", None)
+        if not tenant:
+            return Response(
+                {"error": "No tenant specified"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {"error": "Upload the catalog in the 'file' field"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            summary = import_products(tenant, upload, upload.name, user=request.user)
+        except ImportFileError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary)
+
+
+class StockMovementViewSet(TenantScopedMixin, StreamingExportMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Stock Movement history (read-only).
     
-    list: Get all stock movements
+    list: Get all stock movements (cursor-paginated, newest first)
     retrieve: Get single stock movement
+    export: Stream the filtered movement history as CSV/NDJSON
     """
     queryset = StockMovement.objects.select_related(
         'product', 'source_warehouse', 'destination_warehouse', 'performed_by'
@@ -141,4 +315,120 @@ class StockMovementViewSet(TenantScopedMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = StockMovementSerializer
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['product', 'movement_type', 'source_warehouse', 'destination_warehouse']
-    ordering = ['-timestamp']
+    pagination_class = TimelineCursorPagination
+    ordering = ['-timestamp', '-id']
+    export_filename = 'stock-movements'
+    export_fields = [
+        ('id', 'id'),
+        ('timestamp', 'timestamp'),
+        ('product_id', 'product_id'),
+        ('product_code', 'product__product_code'),
+        ('product_name', 'product__name'),
+        ('movement_type', 'movement_type'),
+        ('quantity', 'quantity'),
+        ('source_warehouse', 'source_warehouse__name'),
+        ('destination_warehouse', 'destination_warehouse__name'),
+        ('reason', 'reason'),
+        ('performed_by', 'performed_by__email'),
+    ]
+
+
+class StockLevelViewSet(TenantScopedMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for per-warehouse stock balances (read-only).
+    Balances change only through stock movements.
+    
+    list: Get all stock levels
+    retrieve: Get single stock level
+    """
+    queryset = StockLevel.objects.select_related('product', 'warehouse').all()
+    serializer_class = StockLevelSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    filterset_fields = ['product', 'warehouse']
+    ordering_fields = ['on_hand', 'reserved', 'updated_at']
+    ordering = ['product_id', 'warehouse_id']
+
+
+class StockHistoryViewSet(viewsets.ViewSet):
+    """
+    Historical stock balances, read from daily checkpoints plus the movements since.
+    
+    as_of: On-hand quantities at a point in time
+    valuation: Stock quantity and value at a point in time or month end
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def _parse_at(self, request):
+        """Point in time from ?month=YYYY-MM (month end) or ?at=<ISO datetime>"""
+        month = request.query_params.get('month')
+        if month:
+            try:
+                year, month = (int(part) for part in month.split('-'))
+                return month_end(year, month)
+            except ValueError:
+                raise ValidationError({'month': "Use the format YYYY-MM"})
+        at = request.query_params.get('at')
+        if not at:
+            return timezone.now()
+        parsed = parse_datetime(at)
+        if parsed is None:
+            raise ValidationError({'at': "Use an ISO 8601 datetime"})
+        return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+    
+    @action(detail=False, methods=['get'])
+    def as_of(self, request):
+        """
+        On-hand quantity per product and warehouse at a point in time.
+        
+        Query params:
+            at: ISO datetime (default: now), or month: YYYY-MM for month end
+            product: Product ID
+            warehouse: Warehouse ID, or "none" for stock not assigned to a warehouse
+        """
+        tenant = getattr(request, "tenant", None)
+        if not tenant:
+            return Response({"error": "No tenant specified"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        at = self._parse_at(request)
+        product_id = request.query_params.get('product')
+        warehouse = request.query_params.get('warehouse')
+        try:
+            product_id = int(product_id) if product_id else None
+            warehouse_id = ALL_WAREHOUSES if not warehouse else None if warehouse == 'none' else int(warehouse)
+        except ValueError:
+            raise ValidationError("product and warehouse must be IDs")
+        
+        balances = stock_as_of(tenant.id, at, product_id=product_id, warehouse_id=warehouse_id)
+        products = Product.objects.filter(
+            tenant_id=tenant.id, pk__in={product_id for product_id, _ in balances}
+        ).in_bulk(field_name='id')
+        results = [
+            {
+                'product_id': product_id,
+                'product_code': products[product_id].product_code if product_id in products else None,
+                'product_name': products[product_id].name if product_id in products else None,
+                'warehouse_id': warehouse_id,
+                'on_hand': on_hand,
+            }
+            for (product_id, warehouse_id), on_hand in sorted(
+                balances.items(), key=lambda item: (item[0][0], item[0][1] or 0)
+            )
+        ]
+        return Response({
+            'as_of': at,
+            'total_on_hand': sum(row['on_hand'] for row in results),
+            'results': results,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def valuation(self, request):
+        """
+        Stock quantity and value per product at a point in time.
+        
+        Query params:
+            month: YYYY-MM for month-end valuation, or at: ISO datetime (default: now)
+        """
+        tenant = getattr(request, "tenant", None)
+        if not tenant:
+            return Response({"error": "No tenant specified"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(stock_valuation(tenant.id, self._parse_at(request)))
@@ -3,7 +3,7 @@ from django.core.mail import send_mail, send_mass_mail
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
-from inventory.models import Product
+from inventory.models import Product, STOCK_STATUS_LOW, STOCK_STATUS_OUT
 from sales.models import Order
 from notifications.models import Notification
 from tenants.models import Tenant, Membership
@@ -121,9 +121,8 @@ def check_low_stock_alerts():
     for tenant in Tenant.objects.filter(is_active=True):
         # Find products at or below reorder level
         low_stock_products = Product.objects.filter(
-            tenant=tenant,
-            quantity__lte=models.F('reorder_level'),
-            quantity__gt=0,
+            tenant_id=tenant.id,
+            stock_status=STOCK_STATUS_LOW,
             status='active'
         )
         
@@ -153,10 +152,10 @@ def send_daily_summary(tenant_id=None):
             continue
         
         # Gather statistics
-        total_products = Product.objects.filter(tenant=tenant).count()
+        total_products = Product.objects.filter(tenant_id=tenant.id).count()
         low_stock = Product.objects.filter(
-            tenant=tenant,
-            quantity__lte=models.F('reorder_level'),
+            tenant_id=tenant.id,
+            stock_status__in=[STOCK_STATUS_LOW, STOCK_STATUS_OUT],
             status='active'
         ).count()
         
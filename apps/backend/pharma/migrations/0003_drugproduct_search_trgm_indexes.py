@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-17 04:48
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.conf import settings
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking the table against writes
+    atomic = False
+
+    dependencies = [
+        ('pharma', '0002_initial'),
+        ('procurement', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddIndexConcurrently(
+            model_name='drugproduct',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['generic_name'], name='drug_generic_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='drugproduct',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['brand_name'], name='drug_brand_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='drugproduct',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['barcode'], name='drug_barcode_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='drugproduct',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['gtin'], name='drug_gtin_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='drugproduct',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['active_ingredients'], name='drug_ingredients_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='drugproduct',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['therapeutic_class'], name='drug_class_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
@@ -112,15 +113,20 @@ class DrugProduct(TenantAwareModel):
             models.Index(fields=['tenant_id', 'brand_name']),
             models.Index(fields=['tenant_id', 'barcode']),
             models.Index(fields=['tenant_id', 'status']),
+            # Serve DrugProductViewSet search (common.search.TrigramSearchFilter)
+            GinIndex(fields=['generic_name'], opclasses=['gin_trgm_ops'], name='drug_generic_name_trgm'),
+            GinIndex(fields=['brand_name'], opclasses=['gin_trgm_ops'], name='drug_brand_name_trgm'),
+            GinIndex(fields=['barcode'], opclasses=['gin_trgm_ops'], name='drug_barcode_trgm'),
+            GinIndex(fields=['gtin'], opclasses=['gin_trgm_ops'], name='drug_gtin_trgm'),
+            GinIndex(fields=['active_ingredients'], opclasses=['gin_trgm_ops'], name='drug_ingredients_trgm'),
+            GinIndex(fields=['therapeutic_class'], opclasses=['gin_trgm_ops'], name='drug_class_trgm'),
         ]
         ordering = ['generic_name', 'strength']
     
     def save(self, *args, **kwargs):
         if not self.product_code:
             from common.utils import get_next_number
-            from tenants.models import Tenant
-            tenant = Tenant.objects.get(id=self.tenant_id)
-            self.product_code = get_next_number(tenant, 'drug_product')
+            self.product_code = get_next_number(self.tenant_id, 'drug_product')
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -387,9 +393,7 @@ class DrugDispensing(TenantAwareModel):
         # Auto-generate dispensing number
         if not self.dispensing_number:
             from common.utils import get_next_number
-            from tenants.models import Tenant
-            tenant = Tenant.objects.get(id=self.tenant_id)
-            self.dispensing_number = get_next_number(tenant, 'dispensing')
+            self.dispensing_number = get_next_number(self.tenant_id, 'dispensing')
         
         # Calculate base units
         self.quantity_in_base_units = self.packaging_level.convert_to_base_units(self.quantity_dispensed)
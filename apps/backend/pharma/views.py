@@ -8,6 +8,8 @@ from datetime import timedelta
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
 from common.mixins import TenantScopedMixin
+from common.pagination import TimelineCursorPagination
+from common.search import TrigramSearchFilter
 from .models import (
     DrugProduct, PackagingLevel, DrugBatch,
     DrugDispensing, DrugInventory
@@ -26,7 +28,8 @@ class DrugProductViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     """
     queryset = DrugProduct.objects.all()
     serializer_class = DrugProductSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Search is served by the trigram indexes on search_fields and ranked by similarity
+    filter_backends = [DjangoFilterBackend, TrigramSearchFilter, filters.OrderingFilter]
     filterset_fields = [
         'dosage_form', 'route_of_administration', 'therapeutic_class',
         'status', 'requires_prescription', 'is_controlled_substance'
@@ -342,7 +345,9 @@ class DrugDispensingViewSet(TenantScopedMixin, viewsets.ModelViewSet):
         'prescriber_name'
     ]
     ordering_fields = ['dispensing_date', 'total_price']
-    ordering = ['-dispensing_date']
+    # Keyset pages on the (tenant_id, -dispensing_date) index
+    pagination_class = TimelineCursorPagination
+    ordering = ['-dispensing_date', '-id']
     
     @extend_schema(
         summary="Get available batches for dispensing (FEFO)",
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils.functional import cached_property
 from common.models import TenantAwareModel
 
 
@@ -22,20 +23,19 @@ class Supplier(TenantAwareModel):
     def save(self, *args, **kwargs):
         if not self.supplier_code:
             from common.utils import get_next_number
-            from tenants.models import Tenant
-            tenant = Tenant.objects.get(id=self.tenant_id)
-            self.supplier_code = get_next_number(tenant, 'supplier')
+            self.supplier_code = get_next_number(self.tenant_id, 'supplier')
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.supplier_code} - {self.name}"
     
-    @property
+    # Cached so SupplierViewSet's queryset annotations of the same names take precedence
+    @cached_property
     def total_orders(self):
         """Count total purchase orders from this supplier"""
         return self.purchase_orders.count()
     
-    @property
+    @cached_property
     def active_orders(self):
         """Count active (non-delivered) purchase orders"""
         return self.purchase_orders.exclude(status='delivered').count()
@@ -78,9 +78,7 @@ class PurchaseRequest(TenantAwareModel):
     def save(self, *args, **kwargs):
         if not self.request_number:
             from common.utils import get_next_number
-            from tenants.models import Tenant
-            tenant = Tenant.objects.get(id=self.tenant_id)
-            self.request_number = get_next_number(tenant, 'purchase_request')
+            self.request_number = get_next_number(self.tenant_id, 'purchase_request')
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -119,9 +117,7 @@ class PurchaseOrder(TenantAwareModel):
     def save(self, *args, **kwargs):
         if not self.po_number:
             from common.utils import get_next_number
-            from tenants.models import Tenant
-            tenant = Tenant.objects.get(id=self.tenant_id)
-            self.po_number = get_next_number(tenant, 'purchase_order')
+            self.po_number = get_next_number(self.tenant_id, 'purchase_order')
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -4,8 +4,9 @@ from .models import Supplier, PurchaseRequest, PurchaseOrder
 
 class SupplierSerializer(serializers.ModelSerializer):
     """Serializer for Supplier model"""
-    total_orders = serializers.SerializerMethodField()
-    active_orders = serializers.SerializerMethodField()
+    # Annotated by SupplierViewSet; Supplier computes them when not annotated
+    total_orders = serializers.ReadOnlyField()
+    active_orders = serializers.ReadOnlyField()
     
     class Meta:
         model = Supplier
@@ -15,14 +16,6 @@ class SupplierSerializer(serializers.ModelSerializer):
             "created_at", "updated_at"
         ]
         read_only_fields = ["id", "supplier_code", "total_orders", "active_orders", "created_at", "updated_at"]
-    
-    def get_total_orders(self, obj) -> int:
-        """Count total purchase orders from this supplier"""
-        return obj.purchase_orders.count()
-    
-    def get_active_orders(self, obj) -> int:
-        """Count active (non-delivered) purchase orders"""
-        return obj.purchase_orders.exclude(status='delivered').count()
 
 
 class PurchaseRequestSerializer(serializers.ModelSerializer):
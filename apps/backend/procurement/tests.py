@@ -1,3 +1,58 @@
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
 
-# Create your tests here.
+from procurement.models import PurchaseOrder, Supplier
+from procurement.views import SupplierViewSet
+from tenants.models import Tenant
+from users.models import User
+
+
+class SupplierListQueryCountTests(TestCase):
+    """Supplier order counts come from queryset annotations, not per-row queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Supplier Co", code="supplier-co")
+        cls.user = User.objects.create(email="suppliers@example.com")
+        suppliers = Supplier.objects.bulk_create([
+            Supplier(tenant_id=cls.tenant.id, supplier_code=f"SUP-{i:03d}", name=f"Supplier {i:02d}")
+            for i in range(30)
+        ])
+        # Supplier i has i % 4 purchase orders, the first of them delivered
+        PurchaseOrder.objects.bulk_create([
+            PurchaseOrder(
+                tenant_id=cls.tenant.id, po_number=f"PO-{supplier.pk}-{n}", supplier=supplier,
+                status='delivered' if n == 0 else 'pending',
+            )
+            for i, supplier in enumerate(suppliers)
+            for n in range(i % 4)
+        ])
+
+    def list(self, **params):
+        request = APIRequestFactory().get('/api/suppliers/', params)
+        force_authenticate(request, user=self.user)
+        request.tenant = self.tenant
+        return SupplierViewSet.as_view({'get': 'list'})(request)
+
+    def test_page_query_count_is_constant(self):
+        # One COUNT for the paginator and one annotated SELECT for the whole page
+        with self.assertNumQueries(2):
+            response = self.list()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_annotated_counts(self):
+        response = self.list(ordering='name')
+
+        counts = {row['name']: (row['total_orders'], row['active_orders']) for row in response.data['results']}
+        self.assertEqual(counts["Supplier 03"], (3, 2))
+        self.assertEqual(counts["Supplier 04"], (0, 0))
+
+    def test_ordering_by_annotation(self):
+        response = self.list(ordering='-active_orders')
+
+        active = [row['active_orders'] for row in response.data['results']]
+        self.assertEqual(active, sorted(active, reverse=True))
+        self.assertEqual(active[0], 2)
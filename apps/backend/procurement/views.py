@@ -1,6 +1,7 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Count, Q
 from .models import Supplier, PurchaseRequest, PurchaseOrder
 from .serializers import (
     SupplierSerializer, PurchaseRequestSerializer,
@@ -13,11 +14,16 @@ from tenants.permissions import TenantPermissionMixin
 class SupplierViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     """
     ViewSet for Supplier management.
+    Purchase order counts are annotated in the list query, not counted per supplier.
     """
-    queryset = Supplier.objects.all()
+    queryset = Supplier.objects.annotate(
+        total_orders=Count('purchase_orders'),
+        active_orders=Count('purchase_orders', filter=~Q(purchase_orders__status='delivered')),
+    )
     serializer_class = SupplierSerializer
     permission_classes = [permissions.IsAuthenticated]
     search_fields = ['name', 'supplier_code', 'contact_person', 'email']
+    ordering_fields = ['name', 'supplier_code', 'rating', 'created_at', 'total_orders', 'active_orders']
     ordering = ['name']
 
 
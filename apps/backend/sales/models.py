@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils.functional import cached_property
 from common.models import TenantAwareModel
 
 
@@ -25,13 +26,22 @@ class Customer(TenantAwareModel):
     def save(self, *args, **kwargs):
         if not self.customer_code:
             from common.utils import get_next_number
-            from tenants.models import Tenant
-            tenant = Tenant.objects.get(id=self.tenant_id)
-            self.customer_code = get_next_number(tenant, 'customer')
+            self.customer_code = get_next_number(self.tenant_id, 'customer')
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.customer_code} - {self.name}"
+    
+    # Cached so CustomerViewSet's queryset annotations of the same names take precedence
+    @cached_property
+    def total_orders(self):
+        """Count orders placed by this customer"""
+        return self.orders.count()
+    
+    @cached_property
+    def total_revenue(self):
+        """Sum of this customer's order totals"""
+        return self.orders.aggregate(total=models.Sum('total_amount'))['total'] or 0
 
 
 class Order(TenantAwareModel):
@@ -79,17 +89,19 @@ class Order(TenantAwareModel):
     def save(self, *args, **kwargs):
         if not self.order_number:
             from common.utils import get_next_number
-            from tenants.models import Tenant
-            tenant = Tenant.objects.get(id=self.tenant_id)
-            self.order_number = get_next_number(tenant, 'order')
+            self.order_number = get_next_number(self.tenant_id, 'order')
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.order_number} - {self.customer.name}"
     
-    @property
+    # Cached so OrderViewSet's items_count annotation takes precedence
+    @cached_property
     def items_count(self):
-        """Get count of items in this order"""
+        """Get count of items in this order, from the prefetched items if loaded"""
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        if 'items' in prefetched:
+            return len(prefetched['items'])
         return self.items.count()
 
 
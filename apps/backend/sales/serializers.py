@@ -5,8 +5,9 @@ from inventory.models import Product
 
 class CustomerSerializer(serializers.ModelSerializer):
     """Serializer for Customer model"""
-    total_orders = serializers.SerializerMethodField()
-    total_revenue = serializers.SerializerMethodField()
+    # Annotated by CustomerViewSet; Customer computes them when not annotated
+    total_orders = serializers.ReadOnlyField()
+    total_revenue = serializers.ReadOnlyField()
     
     class Meta:
         model = Customer
@@ -15,14 +16,6 @@ class CustomerSerializer(serializers.ModelSerializer):
             "total_orders", "total_revenue", "created_at", "updated_at"
         ]
         read_only_fields = ["id", "customer_code", "created_at", "updated_at"]
-    
-    def get_total_orders(self, obj):
-        return obj.orders.count()
-    
-    def get_total_revenue(self, obj):
-        from django.db.models import Sum
-        result = obj.orders.aggregate(total=Sum('total_amount'))
-        return result['total'] or 0
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -58,8 +51,15 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "order_number", "items_count", "created_at", "updated_at"]
     
     def get_items_count(self, obj) -> int:
-        """Get count of items in this order"""
-        return obj.items.count()
+        """Get count of items in this order (prefetched or annotated, no extra query)"""
+        return obj.items_count
+
+
+class OrderSummarySerializer(OrderSerializer):
+    """Order list rows without nested items, for the orders grid"""
+    
+    class Meta(OrderSerializer.Meta):
+        fields = [field for field in OrderSerializer.Meta.fields if field != "items"]
 
 
 class OrderCreateSerializer(serializers.ModelSerializer):
@@ -1,3 +1,106 @@
+from decimal import Decimal
+
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from inventory.models import Product
+from sales.models import Customer, Order, OrderItem
+from sales.views import CustomerViewSet, OrderViewSet
+from tenants.models import Tenant
+from users.models import User
+
+
+class CustomerListQueryCountTests(TestCase):
+    """Customer order totals come from queryset annotations, not per-row queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Customer Co", code="customer-co")
+        cls.user = User.objects.create(email="customers@example.com")
+        customers = Customer.objects.bulk_create([
+            Customer(tenant_id=cls.tenant.id, customer_code=f"CUST-{i:03d}", name=f"Customer {i:02d}")
+            for i in range(30)
+        ])
+        # Customer i has i % 4 orders of 10.00 each
+        Order.objects.bulk_create([
+            Order(
+                tenant_id=cls.tenant.id, order_number=f"ORD-{customer.pk}-{n}", customer=customer,
+                total_amount=Decimal('10.00'), status='delivered' if n else 'pending',
+            )
+            for i, customer in enumerate(customers)
+            for n in range(i % 4)
+        ])
+
+    def list(self, **params):
+        request = APIRequestFactory().get('/api/customers/', params)
+        force_authenticate(request, user=self.user)
+        request.tenant = self.tenant
+        return CustomerViewSet.as_view({'get': 'list'})(request)
+
+    def test_page_query_count_is_constant(self):
+        # One COUNT for the paginator and one annotated SELECT for the whole page
+        with self.assertNumQueries(2):
+            response = self.list()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_annotated_totals(self):
+        response = self.list(ordering='name')
+
+        totals = {row['name']: (row['total_orders'], row['total_revenue']) for row in response.data['results']}
+        self.assertEqual(totals["Customer 03"], (3, Decimal('30.00')))
+        self.assertEqual(totals["Customer 04"], (0, Decimal('0.00')))
+
+    def test_ordering_by_annotation(self):
+        response = self.list(ordering='-total_revenue')
+
+        revenue = [row['total_revenue'] for row in response.data['results']]
+        self.assertEqual(revenue, sorted(revenue, reverse=True))
+        self.assertEqual(response.data['results'][0]['total_orders'], 3)
+
+
+class OrderListQueryCountTests(TestCase):
+    """Order items_count never costs a query per order"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tenant = Tenant.objects.create(name="Order Co", code="order-co")
+        cls.user = User.objects.create(email="orders@example.com")
+        customer = Customer.objects.create(tenant_id=cls.tenant.id, customer_code="CUST-001", name="Buyer")
+        product = Product.objects.create(tenant_id=cls.tenant.id, product_code="PRD-001", sku="SKU-1", name="Widget")
+        orders = Order.objects.bulk_create([
+            Order(tenant_id=cls.tenant.id, order_number=f"ORD-{i:03d}", customer=customer)
+            for i in range(25)
+        ])
+        # Order i has i % 3 items
+        OrderItem.objects.bulk_create([
+            OrderItem(tenant_id=cls.tenant.id, order=order, product=product, quantity=1, price=Decimal('5.00'))
+            for i, order in enumerate(orders)
+            for _ in range(i % 3)
+        ])
+
+    def list(self, **params):
+        request = APIRequestFactory().get('/api/orders/', params)
+        force_authenticate(request, user=self.user)
+        request.tenant = self.tenant
+        return OrderViewSet.as_view({'get': 'list'})(request)
+
+    def test_full_list_counts_prefetched_items(self):
+        # COUNT, orders with customers, then one prefetch each for items and their products
+        with self.assertNumQueries(4):
+            response = self.list()
+
+        self.assertEqual(len(response.data['results']), 20)
+        for row in response.data['results']:
+            self.assertEqual(row['items_count'], len(row['items']))
+
+    def test_summary_list_has_no_items(self):
+        # COUNT and one SELECT with the item counts annotated
+        with self.assertNumQueries(2):
+            response = self.list(summary='true', ordering='order_number')
 
-# Create your tests here.
+        rows = response.data['results']
+        self.assertNotIn('items', rows[0])
+        self.assertEqual([row['items_count'] for row in rows[:4]], [0, 1, 2, 0])
@@ -2,9 +2,11 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db.models import Count, DecimalField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from .models import Customer, Order, OrderItem
 from .serializers import (
-    CustomerSerializer, OrderSerializer,
+    CustomerSerializer, OrderSerializer, OrderSummarySerializer,
     OrderCreateSerializer, OrderUpdateSerializer
 )
 from inventory.views import TenantScopedMixin
@@ -14,18 +16,29 @@ from tenants.permissions import TenantPermissionMixin
 class CustomerViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     """
     ViewSet for Customer management.
+    Order totals are annotated in the list query, not counted per customer.
     """
-    queryset = Customer.objects.all()
+    queryset = Customer.objects.annotate(
+        total_orders=Count('orders'),
+        total_revenue=Coalesce(
+            Sum('orders__total_amount'), 0,
+            output_field=DecimalField(max_digits=20, decimal_places=2),
+        ),
+    )
     serializer_class = CustomerSerializer
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['name']
     search_fields = ['name', 'email', 'customer_code']
+    ordering_fields = ['name', 'customer_code', 'created_at', 'total_orders', 'total_revenue']
     ordering = ['-created_at']
 
 
 class OrderViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     """
     ViewSet for Order management.
+    
+    list: Get orders with their items; ?summary=true returns rows without
+        nested items, with items_count counted in the same query
     """
     queryset = Order.objects.select_related('customer').prefetch_related('items__product').all()
     permission_classes = [permissions.IsAuthenticated]
@@ -33,11 +46,33 @@ class OrderViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     search_fields = ['order_number', 'customer__name']
     ordering = ['-created_at']
     
+    def is_summary(self):
+        return (
+            self.action == 'list'
+            and self.request.query_params.get('summary', '').lower() in ('1', 'true', 'yes')
+        )
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.is_summary():
+            # Correlated count instead of a GROUP BY join, so only the rows
+            # on the requested page are counted
+            items = (
+                OrderItem.objects.filter(order=OuterRef('pk'))
+                .order_by().values('order').annotate(count=Count('id')).values('count')
+            )
+            queryset = queryset.prefetch_related(None).annotate(
+                items_count=Coalesce(Subquery(items), 0)
+            )
+        return queryset
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return OrderCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return OrderUpdateSerializer
+        elif self.is_summary():
+            return OrderSummarySerializer
         return OrderSerializer
     
     @action(detail=True, methods=['post'])
@@ -16,7 +16,8 @@ django.setup()
 from django.utils import timezone
 from users.models import User
 from tenants.models import Tenant, Membership
-from inventory.models import Product, StockMovement
+from inventory.models import Product
+from inventory.stock import record_movement
 from sales.models import Customer, Order, OrderItem
 from procurement.models import Supplier, PurchaseOrder, PurchaseRequest
 from warehouse.models import Warehouse, Transfer
@@ -120,9 +121,7 @@ wh1_t1 = Warehouse.objects.create(
     name="Central Distribution Center",
     location="New York, NY",
     max_capacity=1000,
-    current_utilization=850,
     active_clients=12,
-    total_skus=450,
     status="active"
 )
 print(f"   ✅ {wh1_t1.warehouse_code} - {wh1_t1.name}")
@@ -132,9 +131,7 @@ wh2_t1 = Warehouse.objects.create(
     name="West Coast Hub",
     location="Los Angeles, CA",
     max_capacity=800,
-    current_utilization=550,
     active_clients=8,
-    total_skus=320,
     status="active"
 )
 print(f"   ✅ {wh2_t1.warehouse_code} - {wh2_t1.name}")
@@ -145,9 +142,7 @@ wh1_t2 = Warehouse.objects.create(
     name="Main Warehouse",
     location="Chicago, IL",
     max_capacity=1200,
-    current_utilization=900,
     active_clients=15,
-    total_skus=580,
     status="active"
 )
 print(f"   ✅ {wh1_t2.warehouse_code} - {wh1_t2.name}")
@@ -197,7 +192,6 @@ for name, sku, category, unit, qty, reorder, cost, price in product_data:
         sku=sku,
         category=category,
         unit=unit,
-        quantity=qty,
         reorder_level=reorder,
         unit_cost=Decimal(str(cost)),
         selling_price=Decimal(str(price)),
@@ -205,6 +199,12 @@ for name, sku, category, unit, qty, reorder, cost, price in product_data:
         description=f"High quality {name.lower()} for industrial use",
         status="active"
     )
+    # Stock is booked through the ledger so StockLevel and the warehouse totals agree
+    if qty:
+        record_movement(
+            product, 'in', qty, destination_warehouse_id=wh1_t1.id,
+            reason="Opening stock", performed_by=user1
+        )
     products_t1.append(product)
     status_emoji = "📦" if qty > reorder else "⚠️" if qty > 0 else "❌"
     print(f"   {status_emoji} {product.product_code} - {product.name} ({qty} {unit})")
@@ -218,12 +218,12 @@ for i in range(5):
         sku=f"WS-{i+1:03d}",
         category="Wholesale",
         unit="pcs",
-        quantity=100 + (i * 50),
         reorder_level=50,
         unit_cost=Decimal('25.00'),
         selling_price=Decimal('45.00'),
         status="active"
     )
+    record_movement(product, 'in', 100 + (i * 50), destination_warehouse_id=wh1_t2.id, reason="Opening stock")
     products_t2.append(product)
     print(f"   📦 {product.product_code} - {product.name}")
 
@@ -377,15 +377,11 @@ movements = [
 ]
 
 for product, qty, movement_type, reason in movements:
-    sm = StockMovement.objects.create(
-        tenant_id=tenant1.id,
-        product=product,
-        quantity=qty,
-        movement_type=movement_type,
-        reason=reason,
-        performed_by=user1,
-        source_warehouse=wh1_t1 if movement_type == 'transfer' else None,
-        destination_warehouse=wh2_t1 if movement_type == 'transfer' else wh1_t1
+    record_movement(
+        product, movement_type, qty,
+        source_warehouse_id=wh1_t1.id if movement_type != 'in' else None,
+        destination_warehouse_id={'in': wh1_t1.id, 'transfer': wh2_t1.id}.get(movement_type),
+        reason=reason, performed_by=user1
     )
     print(f"   ✅ {movement_type.upper()}: {product.name} ({qty} units)")
 
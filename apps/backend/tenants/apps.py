@@ -4,3 +4,5 @@ from django.apps import AppConfig
 class TenantsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tenants'
+    def ready(self):
+        import tenants.signals
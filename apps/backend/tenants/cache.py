@@ -0,0 +1,277 @@
+"""
+Shared tenant and membership caches.
+
+Tenants change rarely but are looked up constantly, so lookups by id go through
+a small in-process LRU (with a TTL) backed by Django's cache. Tenant
+post_save/post_delete signals invalidate both layers; other processes pick up
+the change from the shared cache once their local entry expires.
+
+Membership checks made by TenantMiddleware are cached per (user, X-Tenant-ID
+header) for a short TTL, including negative results for denied access. Entries
+are keyed by a global tenants version and the user's membership version, so
+bumping either one invalidates them without having to find every key.
+
+The membership version is persisted on User.membership_version (it is also
+embedded in JWT membership claims, see tenants.tokens) and mirrored here.
+
+Every lookup has an async twin (aget_*) so ASGI middleware can use it
+without a thread hop.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+# Seconds an entry stays in this process before re-checking the shared cache
+LOCAL_TTL = 30
+# Seconds an entry stays in the shared (Django) cache
+SHARED_TTL = 300
+# Maximum number of tenants kept in this process
+LOCAL_MAX_SIZE = 1024
+# Seconds a membership check (granted or denied) is reused
+MEMBERSHIP_TTL = 60
+
+# Cached in place of a Membership when access was denied
+DENIED = 'denied'
+
+TENANTS_VERSION_KEY = 'tenants:version'
+
+_local = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cache_key(tenant_id):
+    return f"tenants:tenant:{tenant_id}"
+
+
+def _local_get(tenant_id):
+    """Return the tenant cached in this process, or None if missing or expired"""
+    with _lock:
+        entry = _local.get(tenant_id)
+        if entry and entry[1] > time.monotonic():
+            _local.move_to_end(tenant_id)
+            return entry[0]
+    return None
+
+
+def _local_put(tenant_id, tenant):
+    with _lock:
+        _local[tenant_id] = (tenant, time.monotonic() + LOCAL_TTL)
+        _local.move_to_end(tenant_id)
+        while len(_local) > LOCAL_MAX_SIZE:
+            _local.popitem(last=False)
+
+
+def get_tenant(tenant_id):
+    """
+    Get a Tenant by id without hitting the database when it is cached.
+
+    Args:
+        tenant_id: Tenant primary key
+
+    Returns:
+        Tenant: The tenant instance
+
+    Raises:
+        Tenant.DoesNotExist: If no tenant has this id
+    """
+    from tenants.models import Tenant
+
+    tenant_id = int(tenant_id)
+    tenant = _local_get(tenant_id)
+    if tenant is not None:
+        return tenant
+
+    tenant = cache.get(_cache_key(tenant_id))
+    if tenant is None:
+        tenant = Tenant.objects.get(id=tenant_id)
+        cache.set(_cache_key(tenant_id), tenant, SHARED_TTL)
+
+    _local_put(tenant_id, tenant)
+    return tenant
+
+
+async def aget_tenant(tenant_id):
+    """Async version of get_tenant()"""
+    from tenants.models import Tenant
+
+    tenant_id = int(tenant_id)
+    tenant = _local_get(tenant_id)
+    if tenant is not None:
+        return tenant
+
+    tenant = await cache.aget(_cache_key(tenant_id))
+    if tenant is None:
+        tenant = await Tenant.objects.aget(id=tenant_id)
+        await cache.aset(_cache_key(tenant_id), tenant, SHARED_TTL)
+
+    _local_put(tenant_id, tenant)
+    return tenant
+
+
+def get_tenant_by_code(code):
+    """
+    Get a Tenant by its code, caching the code to id mapping.
+
+    Raises:
+        Tenant.DoesNotExist: If no tenant has this code
+    """
+    from tenants.models import Tenant
+
+    key = f"tenants:code:{code}"
+    tenant_id = cache.get(key)
+    if tenant_id is None:
+        tenant_id = Tenant.objects.values_list('id', flat=True).get(code=code)
+        cache.set(key, tenant_id, SHARED_TTL)
+    return get_tenant(tenant_id)
+
+
+async def aget_tenant_by_code(code):
+    """Async version of get_tenant_by_code()"""
+    from tenants.models import Tenant
+
+    key = f"tenants:code:{code}"
+    tenant_id = await cache.aget(key)
+    if tenant_id is None:
+        tenant_id = await Tenant.objects.values_list('id', flat=True).aget(code=code)
+        await cache.aset(key, tenant_id, SHARED_TTL)
+    return await aget_tenant(tenant_id)
+
+
+def invalidate_tenant(tenant_id, code=None):
+    """Remove a tenant from this process and from the shared cache"""
+    tenant_id = int(tenant_id)
+    with _lock:
+        _local.pop(tenant_id, None)
+    keys = [_cache_key(tenant_id)]
+    if code:
+        keys.append(f"tenants:code:{code}")
+    cache.delete_many(keys)
+    # Any membership decision may depend on this tenant (active flag, code)
+    _bump_version(TENANTS_VERSION_KEY)
+
+
+def _user_version_key(user_id):
+    return f"tenants:memberships:version:{user_id}"
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_membership_version(user_id):
+    """
+    Return the user's current membership version.
+    Read from the shared cache, falling back to User.membership_version.
+    """
+    from users.models import User
+
+    key = _user_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list('membership_version', flat=True).first() or 0
+        cache.set(key, version, SHARED_TTL)
+    return version
+
+
+async def aget_membership_version(user_id):
+    """Async version of get_membership_version()"""
+    from users.models import User
+
+    key = _user_version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = await User.objects.filter(pk=user_id).values_list('membership_version', flat=True).afirst() or 0
+        await cache.aset(key, version, SHARED_TTL)
+    return version
+
+
+def _membership_key(tenants_version, user_version, user_id, tenant_header):
+    """Build the cache key for a membership check from the current versions"""
+    return f"tenants:membership:{tenants_version}:{user_version}:{user_id}:{tenant_header}"
+
+
+def _membership_filters(user, tenant_header):
+    filters = {'user': user, 'tenant__is_active': True, 'is_active': True}
+    if tenant_header.isdigit():
+        filters['tenant_id'] = int(tenant_header)
+    else:
+        filters['tenant__code'] = tenant_header
+    return filters
+
+
+def get_membership(user, tenant_header):
+    """
+    Resolve the user's active membership for an X-Tenant-ID header value.
+
+    Args:
+        user: Authenticated user
+        tenant_header: Tenant ID (digits) or tenant code from the X-Tenant-ID header
+
+    Returns:
+        Membership: Active membership with its tenant loaded, or None if access is denied
+    """
+    from tenants.models import Membership
+
+    key = _membership_key(
+        cache.get(TENANTS_VERSION_KEY, 0), get_membership_version(user.id), user.id, tenant_header
+    )
+    membership = cache.get(key)
+
+    if membership is None:
+        filters = _membership_filters(user, tenant_header)
+        membership = Membership.objects.select_related('tenant').filter(**filters).first() or DENIED
+        cache.set(key, membership, MEMBERSHIP_TTL)
+
+    if membership == DENIED:
+        return None
+    # Reuse the already-loaded user instead of letting membership.user query it
+    membership.user = user
+    return membership
+
+
+async def aget_membership(user, tenant_header):
+    """Async version of get_membership()"""
+    from tenants.models import Membership
+
+    key = _membership_key(
+        await cache.aget(TENANTS_VERSION_KEY, 0), await aget_membership_version(user.id), user.id, tenant_header
+    )
+    membership = await cache.aget(key)
+
+    if membership is None:
+        filters = _membership_filters(user, tenant_header)
+        membership = await Membership.objects.select_related('tenant').filter(**filters).afirst() or DENIED
+        await cache.aset(key, membership, MEMBERSHIP_TTL)
+
+    if membership == DENIED:
+        return None
+    membership.user = user
+    return membership
+
+
+def bump_membership_version(user_id):
+    """
+    Persist a new membership version for a user.
+    Call inside the transaction that changes the membership, then
+    invalidate_memberships() once it has committed.
+    """
+    from django.db.models import F
+    from users.models import User
+
+    User.objects.filter(pk=user_id).update(membership_version=F('membership_version') + 1)
+
+
+def invalidate_memberships(user_id):
+    """Invalidate every cached membership check for a user"""
+    cache.delete(_user_version_key(user_id))
+
+
+def clear_local():
+    """Empty this process's tenant cache (mainly for tests)"""
+    with _lock:
+        _local.clear()
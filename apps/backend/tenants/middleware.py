@@ -1,78 +1,168 @@
-from django.utils.deprecation import MiddlewareMixin
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from tenants.models import Tenant, Membership
+from tenants.cache import (
+    aget_membership, aget_tenant, aget_tenant_by_code,
+    get_membership, get_tenant, get_tenant_by_code,
+)
+from tenants.tokens import aclaims_are_current, claims_are_current, find_membership_claim
 import logging
 
 logger = logging.getLogger('tenancy.audit')
 
 
-class TenantMiddleware(MiddlewareMixin):
+class TenantMiddleware:
     """
     Extracts tenant from request headers and validates user has access.
     Sets request.tenant for use in views and querysets.
+
+    Membership checks are served from tenants.cache, so repeated requests
+    (including repeated denied ones) do not query the database. Requests
+    authenticated with a JWT are authorized from its membership claims
+    (see tenants.tokens) without touching the database at all.
+
+    Runs natively under both WSGI and ASGI: in an async stack every lookup
+    goes through the async cache/ORM API instead of a thread hop.
     """
-    
+
+    sync_capable = True
+    async_capable = True
+
+    jwt_authentication = JWTAuthentication()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.process_request(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        await self.aprocess_request(request)
+        return await self.get_response(request)
+
     def process_request(self, request):
         # Initialize tenant to None
         request.tenant = None
-        
+        request.membership = None
+        request.tenant_token_stale = False
+
         # Get tenant ID from header
         tenant_id = request.headers.get("X-Tenant-ID")
         if not tenant_id:
             return
-        
+
         # For authenticated users, verify they have access to this tenant
         if request.user and request.user.is_authenticated:
+            # Handle both tenant ID (integer) and tenant code (string)
+            membership = get_membership(request.user, tenant_id)
+            self.set_membership(request, request.user.id, tenant_id, membership)
+        elif (token := self.get_jwt(request)) is not None:
+            if not claims_are_current(token):
+                # Memberships changed since the token was issued
+                request.tenant_token_stale = True
+                return
+            claim = find_membership_claim(token, tenant_id)
+            tenant = None
+            if claim:
+                try:
+                    tenant = get_tenant(claim[0])
+                except Tenant.DoesNotExist:
+                    pass
+            self.set_claimed_membership(request, token, tenant_id, tenant, claim)
+        else:
+            # For unauthenticated requests (e.g., login), just verify tenant exists
             try:
-                # Handle both tenant ID (integer) and tenant code (string)
                 if tenant_id.isdigit():
                     # tenant_id is a numeric ID
-                    membership = Membership.objects.select_related('tenant').get(
-                        user=request.user,
-                        tenant_id=int(tenant_id),
-                        tenant__is_active=True,
-                        is_active=True
-                    )
+                    tenant = get_tenant(int(tenant_id))
                 else:
                     # tenant_id is a tenant code
-                    membership = Membership.objects.select_related('tenant').get(
-                        user=request.user,
-                        tenant__code=tenant_id,
-                        tenant__is_active=True,
-                        is_active=True
-                    )
-                request.tenant = membership.tenant
-                request.membership = membership  # Add membership context for permissions
-                
-                # Audit log tenant context establishment
-                logger.info(
-                    f"Tenant context established: "
-                    f"user={request.user.id} "
-                    f"tenant={membership.tenant.id} "
-                    f"role={membership.role} "
-                    f"path={request.path}"
-                )
-            except Membership.DoesNotExist:
-                # User doesn't have access to this tenant
+                    tenant = get_tenant_by_code(tenant_id)
+                request.tenant = tenant if tenant.is_active else None
+            except Tenant.DoesNotExist:
                 request.tenant = None
-                request.membership = None
-                
-                # Audit log access denied
-                logger.warning(
-                    f"Tenant access denied: "
-                    f"user={request.user.id} "
-                    f"requested_tenant={tenant_id} "
-                    f"path={request.path}"
-                )
+
+    async def aprocess_request(self, request):
+        """Async version of process_request()"""
+        request.tenant = None
+        request.membership = None
+        request.tenant_token_stale = False
+
+        tenant_id = request.headers.get("X-Tenant-ID")
+        if not tenant_id:
+            return
+
+        user = await request.auser() if hasattr(request, 'auser') else None
+        if user and user.is_authenticated:
+            membership = await aget_membership(user, tenant_id)
+            self.set_membership(request, user.id, tenant_id, membership)
+        elif (token := self.get_jwt(request)) is not None:
+            if not await aclaims_are_current(token):
+                request.tenant_token_stale = True
+                return
+            claim = find_membership_claim(token, tenant_id)
+            tenant = None
+            if claim:
+                try:
+                    tenant = await aget_tenant(claim[0])
+                except Tenant.DoesNotExist:
+                    pass
+            self.set_claimed_membership(request, token, tenant_id, tenant, claim)
         else:
-            # For unauthenticated requests (e.g., login), just verify tenant exists
             try:
                 if tenant_id.isdigit():
-                    # tenant_id is a numeric ID
-                    request.tenant = Tenant.objects.get(id=int(tenant_id), is_active=True)
+                    tenant = await aget_tenant(int(tenant_id))
                 else:
-                    # tenant_id is a tenant code
-                    request.tenant = Tenant.objects.get(code=tenant_id, is_active=True)
-                request.membership = None  # No membership for unauthenticated users
+                    tenant = await aget_tenant_by_code(tenant_id)
+                request.tenant = tenant if tenant.is_active else None
             except Tenant.DoesNotExist:
                 request.tenant = None
-                request.membership = None
+
+    def set_membership(self, request, user_id, tenant_id, membership):
+        """Set tenant context from a resolved membership (None if access is denied)"""
+        if membership:
+            request.tenant = membership.tenant
+            request.membership = membership  # Add membership context for permissions
+
+            # Audit log tenant context establishment
+            logger.debug(
+                "Tenant context established: user=%s tenant=%s role=%s path=%s",
+                user_id, membership.tenant.id, membership.role, request.path
+            )
+        else:
+            # Audit log access denied
+            logger.warning(
+                "Tenant access denied: user=%s requested_tenant=%s path=%s",
+                user_id, tenant_id, request.path
+            )
+
+    def set_claimed_membership(self, request, token, tenant_id, tenant, claim):
+        """Set tenant context from a JWT membership claim"""
+        user_id = token.get(jwt_settings.USER_ID_CLAIM)
+        membership = None
+        if tenant and tenant.is_active:
+            membership = Membership(user_id=user_id, tenant=tenant, role=claim[1], is_active=True)
+        self.set_membership(request, user_id, tenant_id, membership)
+
+    def get_jwt(self, request):
+        """
+        Return the validated JWT from the Authorization header, or None.
+        Invalid tokens are ignored here; DRF authentication rejects them later.
+        """
+        header = self.jwt_authentication.get_header(request)
+        if header is None:
+            return None
+        try:
+            raw_token = self.jwt_authentication.get_raw_token(header)
+            if raw_token is None:
+                return None
+            return self.jwt_authentication.get_validated_token(raw_token)
+        except AuthenticationFailed:
+            return None
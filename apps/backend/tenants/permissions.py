@@ -6,7 +6,7 @@ within their tenant context and have appropriate permissions for actions.
 """
 
 from rest_framework import permissions
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
 
 
 class HasTenantAccess(permissions.BasePermission):
@@ -23,11 +23,20 @@ class HasTenantAccess(permissions.BasePermission):
         - User is authenticated
         - User has active membership in the current tenant
         - Tenant context is properly set
+        
+        Context set from JWT membership claims needs no database access here.
+        Tokens whose claims predate a membership change must be refreshed.
         """
         # Must be authenticated
         if not request.user or not request.user.is_authenticated:
             return False
         
+        # Token was issued before the user's memberships last changed
+        if getattr(request, 'tenant_token_stale', False):
+            raise AuthenticationFailed(
+                "Tenant memberships have changed; refresh your token.", code='token_not_valid'
+            )
+        
         # Must have tenant context
         if not hasattr(request, 'tenant') or not request.tenant:
             return False
@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from tenants.cache import bump_membership_version, invalidate_tenant, invalidate_memberships
+from tenants.models import Tenant, Membership
+
+
+@receiver(post_save, sender=Tenant)
+def tenant_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_tenant(instance.id, instance.code))
+
+
+@receiver(post_delete, sender=Tenant)
+def tenant_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_tenant(instance.id, instance.code))
+
+
+@receiver(post_save, sender=Membership)
+def membership_saved(sender, instance, **kwargs):
+    bump_membership_version(instance.user_id)
+    transaction.on_commit(lambda: invalidate_memberships(instance.user_id))
+
+
+@receiver(post_delete, sender=Membership)
+def membership_deleted(sender, instance, **kwargs):
+    bump_membership_version(instance.user_id)
+    transaction.on_commit(lambda: invalidate_memberships(instance.user_id))
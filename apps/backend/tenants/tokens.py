@@ -0,0 +1,104 @@
+"""
+Tenant membership claims for JWTs.
+
+Tokens issued at login, registration and refresh carry the user's active
+memberships and their membership version, so TenantMiddleware can authorize
+a request from the token alone. Changing a membership bumps the version;
+tokens carrying an older version are rejected until the client refreshes.
+"""
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from tenants.cache import aget_membership_version, get_membership_version
+
+# [[tenant_id, tenant_code, role], ...] for every active membership
+MEMBERSHIPS_CLAIM = 'tenants'
+# User.membership_version the memberships were read at
+VERSION_CLAIM = 'tenants_version'
+
+
+def add_tenant_claims(token, user_id):
+    """
+    Add the user's active memberships and membership version to a token.
+
+    Args:
+        token: simplejwt Token to update
+        user_id: ID of the user the token is issued to
+
+    Returns:
+        Token: The same token
+    """
+    from tenants.models import Membership
+
+    # Read the version first so a concurrent change leaves the claims stale, not wrong
+    version = get_membership_version(user_id)
+    memberships = Membership.objects.filter(
+        user_id=user_id, is_active=True, tenant__is_active=True
+    ).values_list('tenant_id', 'tenant__code', 'role')
+
+    token[MEMBERSHIPS_CLAIM] = [list(membership) for membership in memberships]
+    token[VERSION_CLAIM] = version
+    return token
+
+
+def get_tokens_for_user(user):
+    """
+    Issue a refresh token (and its access token) carrying membership claims.
+
+    Returns:
+        RefreshToken: Refresh token; use .access_token for the access token
+    """
+    return add_tenant_claims(RefreshToken.for_user(user), user.id)
+
+
+def find_membership_claim(token, tenant_header):
+    """
+    Look up the membership claim matching an X-Tenant-ID header value.
+
+    Returns:
+        tuple: (tenant_id, role), or None if the token grants no access to the tenant
+    """
+    for tenant_id, code, role in token.get(MEMBERSHIPS_CLAIM, []):
+        if tenant_header == str(tenant_id) or tenant_header == code:
+            return tenant_id, role
+    return None
+
+
+def claims_are_current(token):
+    """Whether the token's membership claims match the user's current membership version"""
+    from rest_framework_simplejwt.settings import api_settings
+
+    if MEMBERSHIPS_CLAIM not in token or VERSION_CLAIM not in token:
+        return False
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    return user_id is not None and token[VERSION_CLAIM] == get_membership_version(user_id)
+
+
+async def aclaims_are_current(token):
+    """Async version of claims_are_current()"""
+    from rest_framework_simplejwt.settings import api_settings
+
+    if MEMBERSHIPS_CLAIM not in token or VERSION_CLAIM not in token:
+        return False
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    return user_id is not None and token[VERSION_CLAIM] == await aget_membership_version(user_id)
+
+
+class TenantTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that re-reads membership claims instead of copying
+    them from the refresh token, so a refresh always picks up changes.
+    """
+
+    def validate(self, attrs):
+        from rest_framework_simplejwt.settings import api_settings
+
+        data = super().validate(attrs)
+        user_id = RefreshToken(attrs['refresh'], verify=False)[api_settings.USER_ID_CLAIM]
+
+        access = add_tenant_claims(AccessToken(data['access'], verify=False), user_id)
+        data['access'] = str(access)
+        if 'refresh' in data:
+            refresh = add_tenant_claims(RefreshToken(data['refresh'], verify=False), user_id)
+            data['refresh'] = str(refresh)
+        return data
@@ -7,5 +7,9 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'  # Use email as username
     REQUIRED_FIELDS = []  # No required fields since email is the username
     
+    # Bumped whenever one of the user's memberships changes; tokens carrying
+    # membership claims from an older version must be refreshed
+    membership_version = models.PositiveIntegerField(default=0)
+    
     def __str__(self): 
         return self.email
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
+from tenants.tokens import TenantTokenRefreshSerializer
 from .views import UserViewSet, AuthViewSet
 
 router = DefaultRouter()
@@ -9,5 +10,5 @@ router.register(r'auth', AuthViewSet, basename='auth')
 
 urlpatterns = [
     path('', include(router.urls)),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', TokenRefreshView.as_view(serializer_class=TenantTokenRefreshSerializer), name='token_refresh'),
 ]
@@ -1,9 +1,9 @@
 from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from drf_spectacular.utils import extend_schema, OpenApiParameter
+from tenants.tokens import get_tokens_for_user
 from .models import User
 from .serializers import (
     UserSerializer, UserCreateSerializer,
@@ -74,6 +74,7 @@ class AuthViewSet(viewsets.ViewSet):
     def login(self, request):
         """
         Login user and return JWT tokens.
+        The tokens carry the user's tenant memberships (see tenants.tokens).
         
         Body: {"username": "user", "password": "pass"}
         """
@@ -98,7 +99,7 @@ class AuthViewSet(viewsets.ViewSet):
                 pass
         
         if user:
-            refresh = RefreshToken.for_user(user)
+            refresh = get_tokens_for_user(user)
             return Response({
                 "refresh": str(refresh),
                 "access": str(refresh.access_token),
@@ -122,7 +123,7 @@ class AuthViewSet(viewsets.ViewSet):
         
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = get_tokens_for_user(user)
             
             return Response({
                 "message": "User created successfully",
@@ -3,6 +3,10 @@ from common.models import TenantAwareModel
 
 
 class Warehouse(TenantAwareModel):
+    # Maintained by the stock ledger (inventory.stock) with F() deltas; a
+    # full-row save() of an existing warehouse leaves them untouched
+    LEDGER_FIELDS = ('current_utilization', 'total_skus')
+    
     # User-facing formatted number (e.g., "WH001")
     warehouse_code = models.CharField(max_length=100, blank=True, db_index=True)
     
@@ -38,9 +42,12 @@ class Warehouse(TenantAwareModel):
     def save(self, *args, **kwargs):
         if not self.warehouse_code:
             from common.utils import get_next_number
-            from tenants.models import Tenant
-            tenant = Tenant.objects.get(id=self.tenant_id)
-            self.warehouse_code = get_next_number(tenant, 'warehouse')
+            self.warehouse_code = get_next_number(self.tenant_id, 'warehouse')
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.LEDGER_FIELDS
+            ]
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -98,9 +105,7 @@ class Transfer(TenantAwareModel):
     def save(self, *args, **kwargs):
         if not self.transfer_number:
             from common.utils import get_next_number
-            from tenants.models import Tenant
-            tenant = Tenant.objects.get(id=self.tenant_id)
-            self.transfer_number = get_next_number(tenant, 'transfer')
+            self.transfer_number = get_next_number(self.tenant_id, 'transfer')
         super().save(*args, **kwargs)
     
     def __str__(self):
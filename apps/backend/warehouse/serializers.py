@@ -14,7 +14,11 @@ class WarehouseSerializer(serializers.ModelSerializer):
             "active_clients", "total_skus", "status",
             "created_at", "updated_at"
         ]
-        read_only_fields = ["id", "warehouse_code", "capacity_percentage", "created_at", "updated_at"]
+        # Utilization and SKU count are maintained by the stock ledger
+        read_only_fields = [
+            "id", "warehouse_code", "current_utilization", "capacity_percentage",
+            "total_skus", "created_at", "updated_at",
+        ]
     
     def get_capacity_percentage(self, obj) -> int:
         """Calculate capacity utilization as percentage"""